@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Question, Case
+from .models import Category, Question, Case, PrecedentSummary, CaseAnalysis, BackgroundJob
 
 
 @admin.register(Category)
@@ -58,3 +58,34 @@ class CaseAdmin(admin.ModelAdmin):
 
     what_preview.short_description = '사건 내용 요약'
 
+
+@admin.register(PrecedentSummary)
+class PrecedentSummaryAdmin(admin.ModelAdmin):
+    """판례 AI 요약 저장소 관리 (행을 삭제하면 다음 조회 시 다시 생성)"""
+    list_display = ('case_no', 'prompt_version', 'status', 'model_name', 'updated_at')
+    list_filter = ('prompt_version', 'status', 'model_name')
+    search_fields = ('case_no',)
+    readonly_fields = ('content_hash', 'lease_until', 'created_at', 'updated_at')
+    ordering = ('-updated_at',)
+
+
+@admin.register(CaseAnalysis)
+class CaseAnalysisAdmin(admin.ModelAdmin):
+    """사건-판례 심층 분석 저장소 관리 (행을 삭제하면 다음 요청 시 다시 생성)"""
+    list_display = ('case', 'precedent_no', 'prompt_version', 'status', 'model_name', 'updated_at')
+    list_filter = ('prompt_version', 'status', 'model_name')
+    search_fields = ('precedent_no',)
+    raw_id_fields = ('case',)
+    readonly_fields = ('content_hash', 'lease_until', 'created_at', 'updated_at')
+    ordering = ('-updated_at',)
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    """백그라운드 작업 큐 관리 (failed 작업의 status를 queued로 바꾸면 워커가 다시 실행)"""
+    list_display = ('job_id', 'kind', 'status', 'attempts', 'max_attempts', 'worker', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('job_id',)
+    readonly_fields = ('payload', 'result', 'error', 'worker', 'locked_until', 'created_at', 'updated_at',
+                       'started_at', 'finished_at')
+    ordering = ('-created_at',)
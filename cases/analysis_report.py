@@ -0,0 +1,223 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, List, Optional, Tuple
+
+from .analysis_store import CaseAnalysisStore
+from .models import Case
+from .precedent_store import PrecedentStore
+from .threads import with_db_cleanup
+
+# 여러 판례 심층 분석: 요청 하나가 동시에 실행할 최대 LLM 호출 수와 호출당 제한 시간(초)
+# (프로세스 전체의 LLM 동시 호출 수는 LLM 게이트웨이의 LLM_MAX_CONCURRENCY로 제한)
+ANALYSIS_MAX_CONCURRENCY = int(os.environ.get("ANALYSIS_MAX_CONCURRENCY", 5))
+ANALYSIS_CALL_TIMEOUT = float(os.environ.get("ANALYSIS_CALL_TIMEOUT", 60))
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _number(value: Any) -> Optional[float]:
+    """"70", "70%", 70 처럼 LLM이 돌려준 값에서 숫자를 추출"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value or "").replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def _mean(values: List[Optional[float]]) -> Optional[float]:
+    values = [value for value in values if value is not None]
+    return round(sum(values) / len(values), 1) if values else None
+
+
+def _merge_by_label(items: List[List[Dict[str, Any]]], label: str, fields: List[str]) -> List[Dict[str, Any]]:
+    """판례별 목록을 label(name/subject/range) 기준으로 묶어 fields 값의 평균을 계산 (처음 등장한 순서 유지)"""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for entries in items:
+        for entry in entries or []:
+            if isinstance(entry, dict) and entry.get(label) is not None:
+                groups.setdefault(str(entry[label]), []).append(entry)
+    merged = []
+    for name, entries in groups.items():
+        item = {label: name}
+        for field in fields:
+            item[field] = _mean([_number(entry.get(field)) for entry in entries])
+        merged.append(item)
+    return merged
+
+
+def merge_analyses(analyses: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    판례별 심층 분석을 하나의 보고서로 합칩니다 (요청한 판례 순서 기준).
+    - 가능성/분포/레이더 점수: 판례별 값의 평균 (형량 분포는 합이 100이 되도록 정규화)
+    - 예상 결과·배상액·기간, 법리: 판례별로 나열
+    - 행동 로드맵: 첫 번째(가장 유사한) 판례의 분석을 사용
+    """
+    outcomes = {
+        precedent_no: analysis.get("outcome_prediction") or {} for precedent_no, analysis in analyses.items()
+    }
+    sentence_distribution = _merge_by_label(
+        [outcome.get("sentence_distribution") for outcome in outcomes.values()], "name", ["value"]
+    )
+    total = sum(item["value"] or 0 for item in sentence_distribution)
+    if total:
+        for item in sentence_distribution:
+            item["value"] = round((item["value"] or 0) * 100 / total, 1)
+
+    compensation_distribution = _merge_by_label(
+        [outcome.get("compensation_distribution") for outcome in outcomes.values()], "range", ["count"]
+    )
+    targets = {
+        str(entry.get("range"))
+        for outcome in outcomes.values()
+        for entry in outcome.get("compensation_distribution") or []
+        if isinstance(entry, dict) and entry.get("is_target")
+    }
+    for item in compensation_distribution:
+        item["is_target"] = item["range"] in targets
+
+    radar_data = _merge_by_label(
+        [outcome.get("radar_data") for outcome in outcomes.values()], "subject", ["A", "B", "fullMark"]
+    )
+    first = next(iter(analyses.values()), {})
+    return {
+        "outcome_prediction": {
+            "probability": _mean([_number(outcome.get("probability")) for outcome in outcomes.values()]),
+            "probability_by_precedent": {
+                precedent_no: _number(outcome.get("probability")) for precedent_no, outcome in outcomes.items()
+            },
+            "expected_results": [
+                {
+                    "case_number": precedent_no,
+                    "expected_result": outcome.get("expected_result"),
+                    "expected_compensation": outcome.get("expected_compensation"),
+                    "estimated_duration": outcome.get("estimated_duration"),
+                }
+                for precedent_no, outcome in outcomes.items()
+            ],
+            "sentence_distribution": sentence_distribution,
+            "radar_data": radar_data,
+            "compensation_distribution": compensation_distribution,
+        },
+        "action_roadmap": first.get("action_roadmap", []),
+        "legal_foundation": {
+            "logic": [
+                {"case_number": precedent_no, "logic": (analysis.get("legal_foundation") or {}).get("logic")}
+                for precedent_no, analysis in analyses.items()
+            ],
+            "relevant_precedents": [
+                precedent
+                for analysis in analyses.values()
+                for precedent in (analysis.get("legal_foundation") or {}).get("relevant_precedents") or []
+            ],
+        },
+    }
+
+
+class MultiPrecedentAnalysisService:
+    """
+    한 사건을 여러 판례와 동시에 비교 분석하고 결과를 하나의 보고서로 합칩니다.
+    각 분석은 CaseAnalysisStore를 거치므로 저장된 결과는 바로 재사용되고, 제한 시간을 넘긴 판례는 failed에 담깁니다.
+    """
+
+    @staticmethod
+    def _load(precedent_ids: List[str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """(판례 사건번호 → 원문, 실패 사유)"""
+        documents = PrecedentStore.get_many(precedent_ids, ["content"])
+        contents = {precedent_no: documents[precedent_no].get("content") or "" for precedent_no in documents}
+        failed = {precedent_no: "not_found" for precedent_no in precedent_ids if precedent_no not in documents}
+        return contents, failed
+
+    @staticmethod
+    def _report(precedent_ids: List[str], analyses: Dict[str, Dict[str, Any]], failed: Dict[str, str],
+                started: float) -> Dict[str, Any]:
+        # 요청한 판례 순서대로 정렬
+        ordered = {precedent_no: analyses[precedent_no] for precedent_no in precedent_ids if precedent_no in analyses}
+        return {
+            "report": merge_analyses(ordered) if ordered else None,
+            "analyses": ordered,
+            "failed": {precedent_no: failed[precedent_no] for precedent_no in precedent_ids if precedent_no in failed},
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    @classmethod
+    def analyze(cls, case: Case, precedent_ids: List[str], refresh: bool = False) -> Dict[str, Any]:
+        started = time.perf_counter()
+        precedent_ids = list(dict.fromkeys(str(precedent_no) for precedent_no in precedent_ids))
+        contents, failed = cls._load(precedent_ids)
+        analyses: Dict[str, Dict[str, Any]] = {}
+
+        run_started: Dict[str, float] = {}
+
+        def run(precedent_no: str) -> Dict[str, Any]:
+            run_started[precedent_no] = time.monotonic()
+            return CaseAnalysisStore.get_analysis(case, precedent_no, contents[precedent_no], refresh=refresh)
+
+        if not contents:
+            return cls._report(precedent_ids, analyses, failed, started)
+        run = with_db_cleanup(run)
+        # 요청마다 스레드 풀을 따로 만들어, 제한 시간을 넘겨 계속 실행 중인 호출이 다른 요청의 자리를 차지하지 않게 함.
+        # 제한 시간을 넘긴 호출도 끝까지 실행되어 결과가 CaseAnalysis에 저장되므로 다음 요청에서 재사용됩니다.
+        executor = ThreadPoolExecutor(
+            max_workers=min(ANALYSIS_MAX_CONCURRENCY, len(contents)), thread_name_prefix="case-analysis"
+        )
+        submitted = time.monotonic()
+        futures = {executor.submit(run, precedent_no): precedent_no for precedent_no in contents}
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+            # 호출 시작 후(대기열에 머문 경우 제출 후) 제한 시간이 지난 판례는 기다리지 않음
+            deadlines = {
+                future: run_started.get(futures[future], submitted) + ANALYSIS_CALL_TIMEOUT for future in pending
+            }
+            for future, deadline in deadlines.items():
+                if deadline <= now:
+                    future.cancel()
+                    failed[futures[future]] = "timeout"
+            pending = {future for future in pending if futures[future] not in failed}
+            if not pending:
+                break
+            done, pending = wait(
+                pending, timeout=max(min(deadlines[future] for future in pending) - now, 0.01),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                precedent_no = futures[future]
+                try:
+                    analyses[precedent_no] = future.result()
+                except Exception as e:
+                    logging.error(f"Case analysis failed for {precedent_no}: {str(e)}")
+                    failed[precedent_no] = str(e)
+        # 아직 시작하지 않은 호출은 취소하고, 실행 중인 호출은 기다리지 않음 (끝나면 스레드도 종료)
+        executor.shutdown(wait=False, cancel_futures=True)
+        return cls._report(precedent_ids, analyses, failed, started)
+
+    @classmethod
+    async def aanalyze(cls, case: Case, precedent_ids: List[str], refresh: bool = False) -> Dict[str, Any]:
+        started = time.perf_counter()
+        precedent_ids = list(dict.fromkeys(str(precedent_no) for precedent_no in precedent_ids))
+        documents = await PrecedentStore.aget_many(precedent_ids, ["content"])
+        contents = {precedent_no: documents[precedent_no].get("content") or "" for precedent_no in documents}
+        failed = {precedent_no: "not_found" for precedent_no in precedent_ids if precedent_no not in documents}
+        analyses: Dict[str, Dict[str, Any]] = {}
+        # 이벤트 루프마다 따로 만들어야 하므로 요청 단위 세마포어로 동시 호출 수 제한
+        semaphore = asyncio.Semaphore(ANALYSIS_MAX_CONCURRENCY)
+
+        async def run(precedent_no: str) -> None:
+            async with semaphore:
+                task = asyncio.ensure_future(
+                    CaseAnalysisStore.aget_analysis(case, precedent_no, contents[precedent_no], refresh=refresh)
+                )
+                try:
+                    # shield: 제한 시간이 지나도 호출은 끝까지 실행되어 결과가 저장됨
+                    analyses[precedent_no] = await asyncio.wait_for(asyncio.shield(task), ANALYSIS_CALL_TIMEOUT)
+                except asyncio.TimeoutError:
+                    failed[precedent_no] = "timeout"
+                except Exception as e:
+                    logging.error(f"Case analysis failed for {precedent_no}: {str(e)}")
+                    failed[precedent_no] = str(e)
+
+        await asyncio.gather(*[run(precedent_no) for precedent_no in contents])
+        return cls._report(precedent_ids, analyses, failed, started)
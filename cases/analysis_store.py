@@ -0,0 +1,307 @@
+import os
+import time
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+
+from .context_selector import PrecedentContextSelector
+from .json_stream import JsonSectionParser
+from .metrics import CASE_ANALYSIS_REQUESTS
+from .models import Case, CaseAnalysis
+from .service import GeminiService, ANALYSIS_PROMPT_VERSION, ANALYSIS_SECTIONS
+from .single_flight import SingleFlight, AsyncSingleFlight
+from .summary_store import content_hash
+
+# 분석 생성 점유(lease) 시간, 다른 요청의 생성 결과를 기다리는 최대 시간과 확인 간격(초)
+ANALYSIS_LEASE_SECONDS = int(os.environ.get("ANALYSIS_LEASE_SECONDS", 180))
+ANALYSIS_WAIT_TIMEOUT = float(os.environ.get("ANALYSIS_WAIT_TIMEOUT", 150))
+ANALYSIS_POLL_INTERVAL = float(os.environ.get("ANALYSIS_POLL_INTERVAL", 0.5))
+
+# (사건 ID, 판례 사건번호, 원문 해시, 프롬프트 버전-원문 선택 설정, 모델)
+AnalysisKey = Tuple[int, str, str, str, str]
+Event = Tuple[str, Any]
+
+
+def case_situation(case: Case) -> Dict[str, Any]:
+    """심층 분석 프롬프트에 넣는 사용자 상황"""
+    return {"who": case.who, "detail": case.detail}
+
+
+class CaseAnalysisStore:
+    """
+    사건-판례 심층 분석 read-through 저장소 (Postgres). 구조는 PrecedentSummaryStore와 같습니다.
+    - 같은 프로세스의 동시 요청은 SingleFlight로, 워커 간 동시 요청은 pending 행 점유로 한 번의 LLM 호출로 합침
+    - refresh=True이면 저장된 결과를 지우고 다시 생성 (동시에 들어온 재생성 요청도 한 번으로 합침)
+    저장소(DB) 장애 시에는 분석을 직접 생성해 응답합니다.
+    """
+    _flight = SingleFlight()
+    _aflight = AsyncSingleFlight()
+
+    @staticmethod
+    def make_key(case: Case, precedent_no: str, content: str) -> AnalysisKey:
+        version = f"{ANALYSIS_PROMPT_VERSION}-{PrecedentContextSelector.version()}"
+        return case.id, str(precedent_no), content_hash(content), version, GeminiService.llm_model_name()
+
+    @staticmethod
+    def _filter(key: AnalysisKey):
+        case_id, precedent_no, digest, version, model_name = key
+        return CaseAnalysis.objects.filter(
+            case_id=case_id, precedent_no=precedent_no, content_hash=digest,
+            prompt_version=version, model_name=model_name,
+        )
+
+    @classmethod
+    def _lookup(cls, key: AnalysisKey) -> Optional[CaseAnalysis]:
+        return cls._filter(key).only("id", "status", "result", "lease_until").first()
+
+    @classmethod
+    def _claim(cls, key: AnalysisKey, row: Optional[CaseAnalysis]) -> bool:
+        """생성 권한 획득 시 True (pending 행 삽입 또는 만료된 점유 인계)"""
+        now = timezone.now()
+        lease_until = now + timedelta(seconds=ANALYSIS_LEASE_SECONDS)
+        if row is None:
+            case_id, precedent_no, digest, version, model_name = key
+            try:
+                with transaction.atomic():
+                    CaseAnalysis.objects.create(
+                        case_id=case_id, precedent_no=precedent_no, content_hash=digest,
+                        prompt_version=version, model_name=model_name,
+                        status=CaseAnalysis.STATUS_PENDING, lease_until=lease_until,
+                    )
+                return True
+            except IntegrityError:
+                return False
+        if row.status == CaseAnalysis.STATUS_PENDING and (row.lease_until is None or row.lease_until < now):
+            # 조건부 UPDATE로 여러 워커 중 하나만 인계
+            return CaseAnalysis.objects.filter(
+                pk=row.pk, status=CaseAnalysis.STATUS_PENDING, lease_until=row.lease_until
+            ).update(lease_until=lease_until) == 1
+        return False
+
+    @classmethod
+    def _store(cls, key: AnalysisKey, result: Dict[str, Any]) -> None:
+        try:
+            cls._filter(key).update(
+                result=result,
+                status=CaseAnalysis.STATUS_READY,
+                lease_until=None,
+                updated_at=timezone.now(),
+            )
+        except DatabaseError as e:
+            logging.warning(f"Case analysis store write error: {str(e)}")
+
+    @classmethod
+    def _release(cls, key: AnalysisKey) -> None:
+        """생성 실패 시 pending 행을 지워 다른 요청이 바로 재시도할 수 있게 함"""
+        try:
+            cls._filter(key).filter(status=CaseAnalysis.STATUS_PENDING).delete()
+        except DatabaseError as e:
+            logging.warning(f"Case analysis store release error: {str(e)}")
+
+    @classmethod
+    def _discard(cls, key: AnalysisKey) -> None:
+        """refresh: 저장된 결과를 지워 다음 _poll에서 새로 점유하게 함 (생성 중인 pending 행은 유지)"""
+        cls._filter(key).filter(status=CaseAnalysis.STATUS_READY).delete()
+
+    @classmethod
+    def _poll(cls, key: AnalysisKey, waited: bool) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """(저장된 결과, 생성 권한 획득 여부)"""
+        row = cls._lookup(key)
+        if row is not None and row.status == CaseAnalysis.STATUS_READY:
+            CASE_ANALYSIS_REQUESTS.labels(result="waited" if waited else "hit").inc()
+            return row.result, False
+        return None, cls._claim(key, row)
+
+    # --- 동기 경로 (WSGI) ---
+
+    @staticmethod
+    def _analyze(key: AnalysisKey, situation: Dict[str, Any], content: str) -> Dict[str, Any]:
+        # 판례 원문 중 사용자 상황과 관련된 구간만 토큰 예산 안에서 프롬프트에 넣음
+        context = PrecedentContextSelector.select(situation, key[1], content)
+        return GeminiService.analyze_case_deeply(situation, context)
+
+    @classmethod
+    def _generate(cls, key: AnalysisKey, situation: Dict[str, Any], content: str, refresh: bool) -> Dict[str, Any]:
+        try:
+            result = cls._analyze(key, situation, content)
+        except Exception:
+            cls._release(key)
+            raise
+        cls._store(key, result)
+        CASE_ANALYSIS_REQUESTS.labels(result="refresh" if refresh else "generated").inc()
+        return result
+
+    @classmethod
+    def _fill(cls, key: AnalysisKey, situation: Dict[str, Any], content: str, refresh: bool) -> Dict[str, Any]:
+        if refresh:
+            cls._discard(key)
+        deadline = time.monotonic() + ANALYSIS_WAIT_TIMEOUT
+        waited = False
+        while True:
+            result, claimed = cls._poll(key, waited)
+            if result is not None:
+                return result
+            if claimed:
+                return cls._generate(key, situation, content, refresh)
+            if time.monotonic() > deadline:
+                logging.warning(f"Case analysis wait timed out for case {key[0]} × {key[1]}, generating without store")
+                CASE_ANALYSIS_REQUESTS.labels(result="bypass").inc()
+                return cls._analyze(key, situation, content)
+            waited = True
+            time.sleep(ANALYSIS_POLL_INTERVAL)
+
+    @classmethod
+    def get_analysis(cls, case: Case, precedent_no: str, content: str, refresh: bool = False) -> Dict[str, Any]:
+        """저장된 분석 결과를 반환하고, 없거나 refresh=True이면 생성해 저장합니다."""
+        situation = case_situation(case)
+        key = cls.make_key(case, precedent_no, content)
+        try:
+            return cls._flight.do((key, refresh), lambda: cls._fill(key, situation, content, refresh))
+        except DatabaseError as e:
+            logging.warning(f"Case analysis store unavailable: {str(e)}")
+            CASE_ANALYSIS_REQUESTS.labels(result="bypass").inc()
+            return cls._analyze(key, situation, content)
+
+    # --- 비동기 경로 (ASGI) ---
+
+    @staticmethod
+    async def _aanalyze(key: AnalysisKey, situation: Dict[str, Any], content: str) -> Dict[str, Any]:
+        context = await PrecedentContextSelector.aselect(situation, key[1], content)
+        return await GeminiService.aanalyze_case_deeply(situation, context)
+
+    @classmethod
+    async def _agenerate(cls, key: AnalysisKey, situation: Dict[str, Any], content: str,
+                         refresh: bool) -> Dict[str, Any]:
+        try:
+            result = await cls._aanalyze(key, situation, content)
+        except Exception:
+            await sync_to_async(cls._release)(key)
+            raise
+        await sync_to_async(cls._store)(key, result)
+        CASE_ANALYSIS_REQUESTS.labels(result="refresh" if refresh else "generated").inc()
+        return result
+
+    @classmethod
+    async def _afill(cls, key: AnalysisKey, situation: Dict[str, Any], content: str,
+                     refresh: bool) -> Dict[str, Any]:
+        if refresh:
+            await sync_to_async(cls._discard)(key)
+        deadline = time.monotonic() + ANALYSIS_WAIT_TIMEOUT
+        waited = False
+        while True:
+            result, claimed = await sync_to_async(cls._poll)(key, waited)
+            if result is not None:
+                return result
+            if claimed:
+                return await cls._agenerate(key, situation, content, refresh)
+            if time.monotonic() > deadline:
+                logging.warning(f"Case analysis wait timed out for case {key[0]} × {key[1]}, generating without store")
+                CASE_ANALYSIS_REQUESTS.labels(result="bypass").inc()
+                return await cls._aanalyze(key, situation, content)
+            waited = True
+            await asyncio.sleep(ANALYSIS_POLL_INTERVAL)
+
+    @classmethod
+    async def aget_analysis(cls, case: Case, precedent_no: str, content: str,
+                            refresh: bool = False) -> Dict[str, Any]:
+        situation = case_situation(case)
+        key = cls.make_key(case, precedent_no, content)
+        try:
+            return await cls._aflight.do((key, refresh), lambda: cls._afill(key, situation, content, refresh))
+        except DatabaseError as e:
+            logging.warning(f"Case analysis store unavailable: {str(e)}")
+            CASE_ANALYSIS_REQUESTS.labels(result="bypass").inc()
+            return await cls._aanalyze(key, situation, content)
+
+    # --- 스트리밍 경로 (SSE) ---
+
+    @staticmethod
+    def _stored_events(result: Dict[str, Any]) -> Iterator[Event]:
+        """저장된(또는 다른 요청이 생성한) 결과도 생성 중일 때와 같은 이벤트 순서로 전달"""
+        for name, value in result.items():
+            yield "section", {"name": name, "data": value}
+        yield "analysis", result
+
+    @classmethod
+    def _stream_start(cls, key: AnalysisKey, refresh: bool) -> Tuple[Optional[Dict[str, Any]], Optional[bool]]:
+        """(저장된 결과, 생성 권한 획득 여부). 저장소 장애 시 (None, None)으로 저장 없이 생성"""
+        try:
+            if refresh:
+                cls._discard(key)
+            return cls._poll(key, False)
+        except DatabaseError as e:
+            logging.warning(f"Case analysis store unavailable: {str(e)}")
+            CASE_ANALYSIS_REQUESTS.labels(result="bypass").inc()
+            return None, None
+
+    @classmethod
+    def stream_analysis(cls, case: Case, precedent_no: str, content: str,
+                        refresh: bool = False) -> Iterator[Event]:
+        """
+        심층 분석 JSON의 최상위 섹션(outcome_prediction, action_roadmap, legal_foundation)이 완성될 때마다
+        ("section", {"name", "data"})를 보내고, 마지막에 전체를 검증한 ("analysis", 결과)를 보냅니다.
+        저장된 결과가 있거나 다른 요청이 이미 생성 중이면 그 결과를 같은 순서로 보냅니다.
+        """
+        situation = case_situation(case)
+        key = cls.make_key(case, precedent_no, content)
+        result, claimed = cls._stream_start(key, refresh)
+        if result is not None:
+            yield from cls._stored_events(result)
+            return
+        if claimed is False:
+            yield from cls._stored_events(cls.get_analysis(case, precedent_no, content))
+            return
+
+        stored = False
+        try:
+            context = PrecedentContextSelector.select(situation, key[1], content)
+            parser = JsonSectionParser()
+            for chunk in GeminiService.stream_analysis(situation, context):
+                for name, value in parser.feed(chunk):
+                    yield "section", {"name": name, "data": value}
+            result = parser.result(ANALYSIS_SECTIONS)
+            if claimed:
+                cls._store(key, result)
+                stored = True
+                CASE_ANALYSIS_REQUESTS.labels(result="refresh" if refresh else "generated").inc()
+            yield "analysis", result
+        finally:
+            # 생성 실패나 클라이언트 연결 종료 시 점유를 풀어 다른 요청이 생성하도록 함
+            if claimed and not stored:
+                cls._release(key)
+
+    @classmethod
+    async def astream_analysis(cls, case: Case, precedent_no: str, content: str,
+                               refresh: bool = False) -> AsyncIterator[Event]:
+        """stream_analysis의 비동기 버전"""
+        situation = case_situation(case)
+        key = cls.make_key(case, precedent_no, content)
+        result, claimed = await sync_to_async(cls._stream_start)(key, refresh)
+        if result is None and claimed is False:
+            result = await cls.aget_analysis(case, precedent_no, content)
+        if result is not None:
+            for event in cls._stored_events(result):
+                yield event
+            return
+
+        stored = False
+        try:
+            context = await PrecedentContextSelector.aselect(situation, key[1], content)
+            parser = JsonSectionParser()
+            async for chunk in GeminiService.astream_analysis(situation, context):
+                for name, value in parser.feed(chunk):
+                    yield "section", {"name": name, "data": value}
+            result = parser.result(ANALYSIS_SECTIONS)
+            if claimed:
+                await sync_to_async(cls._store)(key, result)
+                stored = True
+                CASE_ANALYSIS_REQUESTS.labels(result="refresh" if refresh else "generated").inc()
+            yield "analysis", result
+        finally:
+            if claimed and not stored:
+                await sync_to_async(cls._release)(key)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CasesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cases'
+
+    def ready(self):
+        # Category 저장/삭제 시 카테고리 캐시 무효화
+        from . import signals  # noqa: F401
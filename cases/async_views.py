@@ -0,0 +1,257 @@
+import json
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from .case_service import CaseService
+from .models import Case
+from .serializers import (
+    CaseSerializer, CaseMultiAnswerRequestSerializer, PrecedentBatchRequestSerializer, PrecedentDetailQuerySerializer,
+)
+from .search import PrecedentSearchService
+from .precedent_store import PrecedentStore
+from .summary_store import PrecedentSummaryStore, content_hash
+from .analysis_store import CaseAnalysisStore
+from .analysis_report import MultiPrecedentAnalysisService
+from .jobs import JobQueue, job_accepted_data, job_data, wants_job
+from .sse import event_stream_response, wants_event_stream
+from .http_cache import (
+    PRECEDENT_CACHE_MAX_AGE, PRECEDENT_CACHE_S_MAXAGE,
+    apply_validators, is_conditional, not_modified_response, precedent_validators,
+)
+from .views import (
+    server_timing_header, precedent_detail_data, precedent_batch_data,
+    precedent_source_fields, precedent_wants_summary, wants_refresh, multi_answer_status,
+)
+
+# ASGI(uvicorn 워커) 배포용 비동기 엔드포인트.
+# 임베딩/OpenSearch/LLM 대기 중에도 이벤트 루프가 다른 요청을 처리하므로
+# 한 프로세스가 I/O 대기 중인 요청 여러 개를 동시에 처리할 수 있습니다.
+# 응답 형식은 cases/views.py의 동기 버전과 같습니다.
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={"ensure_ascii": False})
+
+
+async def _precedent_detail_events(precedents_id, precedent, query=None):
+    # cases/views.py의 precedent_detail_events와 같은 이벤트 순서
+    yield "precedent", precedent_detail_data(precedent, query)
+    if precedent_wants_summary(query):
+        try:
+            async for event in PrecedentSummaryStore.astream_summary(precedents_id, precedent.get("content") or ""):
+                yield event
+        except Exception as e:
+            logging.error(f"Async Summary Stream Error: {str(e)}")
+            yield "error", {"message": str(e)}
+    yield "done", {}
+
+
+async def _case_answer_events(case_obj, precedents_id, precedent, refresh=False):
+    # cases/views.py의 case_answer_events와 같은 이벤트 순서
+    try:
+        async for event in CaseAnalysisStore.astream_analysis(
+            case_obj, precedents_id, precedent.get("content", ""), refresh=refresh
+        ):
+            yield event
+    except Exception as e:
+        logging.error(f"Async Analysis Stream Error: {str(e)}")
+        yield "error", {"message": str(e)}
+    yield "done", {}
+
+
+def _parse_body(request):
+    try:
+        return json.loads(request.body or b"{}")
+    except json.JSONDecodeError:
+        return None
+
+
+# 1. 유사 판례 검색 및 상황 저장 (Search, async)
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncCaseSearchView(View):
+    async def post(self, request):
+        data = _parse_body(request)
+        if data is None:
+            return _json({"status": "error", "message": "JSON 본문을 해석할 수 없습니다."}, status=400)
+        serializer = CaseSerializer(data=data)
+        if not serializer.is_valid():
+            return _json(serializer.errors, status=400)
+        v_data = serializer.validated_data
+
+        try:
+            # 사건 저장과 임베딩/검색을 동시에 실행
+            persist_timings = {}
+            new_case, (precedents, search_info) = await asyncio.gather(
+                CaseService.acreate_case(v_data, persist_timings),
+                PrecedentSearchService.asearch(v_data['detail'], k=5, filters=v_data.get('filters')),
+            )
+            timings = {**persist_timings, **search_info["timings_ms"]}
+
+            response = _json({
+                "status": "success",
+                "code": 201,
+                "message": "유사 판례 검색 완료",
+                "data": {
+                    "case_id": new_case.id,
+                    "total_count": len(precedents),
+                    "results": precedents,
+                    "search_mode": search_info["mode"],
+                    "cached": search_info["cached"],
+                    "timings_ms": timings
+                }
+            }, status=201)
+            response["Server-Timing"] = server_timing_header(timings)
+            return response
+
+        except Exception as e:
+            logging.error(f"Async Search Error: {str(e)}")
+            return _json({"status": "error", "message": str(e)}, status=500)
+
+
+# 2. 판례 상세 조회 및 AI 분석 (Detail, async)
+class AsyncPrecedentDetailView(View):
+    async def get(self, request, precedents_id):
+        query_serializer = PrecedentDetailQuerySerializer(data=request.GET)
+        if not query_serializer.is_valid():
+            return _json(query_serializer.errors, status=400)
+        query = dict(query_serializer.validated_data)
+
+        stream = wants_event_stream(request)
+        if not stream and is_conditional(request):
+            validators = await sync_to_async(precedent_validators)(precedents_id, variant=query)
+            not_modified = not_modified_response(
+                request, validators, PRECEDENT_CACHE_MAX_AGE, PRECEDENT_CACHE_S_MAXAGE
+            )
+            if not_modified is not None:
+                return not_modified
+
+        precedent = await PrecedentStore.aget(precedents_id, precedent_source_fields(query))
+        if precedent is None:
+            return _json({"message": "판례를 찾을 수 없습니다."}, status=404)
+
+        if stream:
+            return event_stream_response(_precedent_detail_events(precedents_id, precedent, query))
+
+        data = precedent_detail_data(precedent, query)
+        content = precedent.get("content")
+        if precedent_wants_summary(query):
+            data["summary"] = await PrecedentSummaryStore.aget_summary(precedents_id, content or "")
+
+        response = _json({"status": "success", "data": data})
+        validators = await sync_to_async(precedent_validators)(
+            precedents_id, content_hash(content) if content is not None else None, variant=query
+        )
+        return apply_validators(response, validators, PRECEDENT_CACHE_MAX_AGE, PRECEDENT_CACHE_S_MAXAGE)
+
+
+# 3. 판례 기반 심층 분석 (Answer, async)
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncCaseAnswerView(View):
+    async def post(self, request, precedents_id):
+        data = _parse_body(request) or {}
+        case_id = data.get('case_id')
+        try:
+            case_obj = await Case.objects.aget(id=case_id)
+            precedent = await PrecedentStore.aget(precedents_id)
+
+            if precedent is None:
+                return _json({"error": "판례 정보 없음"}, status=404)
+
+            if wants_job(request):
+                job = await sync_to_async(JobQueue.submit)("case_analysis", {
+                    "case_id": case_obj.id, "precedent_no": precedents_id, "refresh": wants_refresh(request),
+                })
+                data = job_accepted_data(request, job)
+                response = _json({"status": "accepted", "data": data}, status=202)
+                response["Location"] = data["status_url"]
+                return response
+
+            if wants_event_stream(request):
+                return event_stream_response(
+                    _case_answer_events(case_obj, precedents_id, precedent, refresh=wants_refresh(request))
+                )
+
+            analysis = await CaseAnalysisStore.aget_analysis(
+                case_obj, precedents_id, precedent.get("content", ""), refresh=wants_refresh(request)
+            )
+
+            return _json({"status": "success", "data": analysis})
+        except Case.DoesNotExist:
+            return _json({"error": "사건 ID를 찾을 수 없습니다."}, status=404)
+        except Exception as e:
+            return _json({"status": "error", "message": str(e)}, status=500)
+
+
+# 4. 판례 일괄 조회 (Batch, async)
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncPrecedentBatchView(View):
+    async def post(self, request):
+        data = _parse_body(request)
+        if data is None:
+            return _json({"status": "error", "message": "JSON 본문을 해석할 수 없습니다."}, status=400)
+        serializer = PrecedentBatchRequestSerializer(data=data)
+        if not serializer.is_valid():
+            return _json(serializer.errors, status=400)
+        case_nos = serializer.validated_data["case_nos"]
+        fields = serializer.validated_data["fields"]
+
+        try:
+            source_fields = [field for field in fields if field != "summary"]
+            documents = await PrecedentStore.aget_many(case_nos, source_fields)
+            summaries = {}
+            if "summary" in fields:
+                summaries = await sync_to_async(PrecedentSummaryStore.stored_summaries)(list(documents))
+            return _json({
+                "status": "success",
+                "data": precedent_batch_data(case_nos, fields, documents, summaries)
+            })
+        except Exception as e:
+            logging.error(f"Async Batch Error: {str(e)}")
+            return _json({"status": "error", "message": str(e)}, status=500)
+
+
+# 5. 여러 판례 기반 심층 분석 (Multi Answer, async)
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncCaseMultiAnswerView(View):
+    async def post(self, request):
+        data = _parse_body(request)
+        if data is None:
+            return _json({"status": "error", "message": "JSON 본문을 해석할 수 없습니다."}, status=400)
+        serializer = CaseMultiAnswerRequestSerializer(data=data)
+        if not serializer.is_valid():
+            return _json(serializer.errors, status=400)
+        try:
+            case_obj = await Case.objects.aget(id=serializer.validated_data["case_id"])
+            result = await MultiPrecedentAnalysisService.aanalyze(
+                case_obj, serializer.validated_data["precedent_ids"], refresh=wants_refresh(request)
+            )
+            response = _json({"status": "success" if result["analyses"] else "error", "data": result},
+                             status=multi_answer_status(result))
+            response["Server-Timing"] = server_timing_header({"analysis": result["elapsed_ms"]})
+            return response
+        except Case.DoesNotExist:
+            return _json({"error": "사건 ID를 찾을 수 없습니다."}, status=404)
+        except Exception as e:
+            logging.error(f"Async Multi Answer Error: {str(e)}")
+            return _json({"status": "error", "message": str(e)}, status=500)
+
+
+# 6. 백그라운드 작업 상태 조회 (Job, async)
+class AsyncJobStatusView(View):
+    async def get(self, request, job_id):
+        job = await sync_to_async(JobQueue.get)(job_id)
+        if job is None:
+            return _json({"error": "작업을 찾을 수 없습니다."}, status=404)
+        if wants_event_stream(request):
+            # 상태 확인 간격 동안 이벤트 루프를 점유하지 않음
+            return event_stream_response(JobQueue.aevents(job_id))
+        response = _json({"status": "success", "data": job_data(job)})
+        if not job.is_finished:
+            response["Retry-After"] = "1"
+        return response
@@ -0,0 +1,68 @@
+import time
+from typing import Dict, Any
+
+from django.db import IntegrityError
+
+from .category_cache import CategoryCache
+from .metrics import SEARCH_LATENCY
+from .models import Case
+from .threads import with_db_cleanup
+
+
+def _record(timings: Dict[str, float], stage: str, started: float) -> None:
+    timings[stage] = round((time.perf_counter() - started) * 1000, 2)
+    SEARCH_LATENCY.labels(stage=stage).observe(timings[stage] / 1000)
+
+
+class CaseService:
+    """검색 요청의 사건 저장 (카테고리 조회는 CategoryCache 사용)"""
+
+    @staticmethod
+    def _case_fields(v_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "who": v_data['who'],
+            "when": v_data['when'],
+            "what": v_data['what'],
+            "want": v_data['want'],
+            "detail": v_data['detail'],
+        }
+
+    @classmethod
+    def create_case(cls, v_data: Dict[str, Any], timings: Dict[str, float]) -> Case:
+        category_name = v_data.get('category', '일반')
+        started = time.perf_counter()
+        category_id = CategoryCache.get_id(category_name)
+        _record(timings, "category_lookup", started)
+
+        started = time.perf_counter()
+        try:
+            new_case = Case.objects.create(category_id=category_id, **cls._case_fields(v_data))
+        except IntegrityError:
+            # 다른 워커에서 카테고리가 삭제되어 캐시된 id가 무효한 경우: 캐시를 비우고 한 번 재시도
+            CategoryCache.invalidate()
+            category_id = CategoryCache.get_id(category_name)
+            new_case = Case.objects.create(category_id=category_id, **cls._case_fields(v_data))
+        _record(timings, "case_insert", started)
+        return new_case
+
+    @classmethod
+    def create_case_in_thread(cls, v_data: Dict[str, Any], timings: Dict[str, float]) -> Case:
+        """스레드 풀에서 실행할 때 사용 (작업 전후 DB 연결 정리)"""
+        return with_db_cleanup(cls.create_case)(v_data, timings)
+
+    @classmethod
+    async def acreate_case(cls, v_data: Dict[str, Any], timings: Dict[str, float]) -> Case:
+        category_name = v_data.get('category', '일반')
+        started = time.perf_counter()
+        category_id = await CategoryCache.aget_id(category_name)
+        _record(timings, "category_lookup", started)
+
+        started = time.perf_counter()
+        try:
+            new_case = await Case.objects.acreate(category_id=category_id, **cls._case_fields(v_data))
+        except IntegrityError:
+            CategoryCache.invalidate()
+            category_id = await CategoryCache.aget_id(category_name)
+            new_case = await Case.objects.acreate(category_id=category_id, **cls._case_fields(v_data))
+        _record(timings, "case_insert", started)
+        return new_case
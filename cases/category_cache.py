@@ -0,0 +1,38 @@
+import threading
+from typing import Dict
+
+from asgiref.sync import sync_to_async
+
+from .models import Category
+
+
+class CategoryCache:
+    """
+    카테고리 이름 → category_id 프로세스 내 캐시.
+    검색 요청마다 발생하던 get_or_create 조회를 없애기 위한 것으로,
+    Category 저장/삭제 시그널(cases/signals.py)에서 invalidate()가 호출됩니다.
+    """
+    _ids: Dict[str, int] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_id(cls, name: str) -> int:
+        category_id = cls._ids.get(name)
+        if category_id is None:
+            category_obj, _ = Category.objects.get_or_create(name=name)
+            category_id = category_obj.category_id
+            with cls._lock:
+                cls._ids[name] = category_id
+        return category_id
+
+    @classmethod
+    async def aget_id(cls, name: str) -> int:
+        category_id = cls._ids.get(name)
+        if category_id is None:
+            category_id = await sync_to_async(cls.get_id)(name)
+        return category_id
+
+    @classmethod
+    def invalidate(cls) -> None:
+        with cls._lock:
+            cls._ids.clear()
@@ -0,0 +1,266 @@
+import os
+import re
+import math
+import logging
+from typing import Any, Dict, List, Set, Tuple
+
+import numpy as np
+from asgiref.sync import sync_to_async
+
+from .cache import TTLLRUCache
+from .embedding_cache import EmbeddingCacheService
+from .metrics import ANALYSIS_CONTEXT_TOKENS
+from .service import EmbeddingProvider, OpenSearchService
+from .summary_store import content_hash
+from .threads import with_db_cleanup
+from .vector_store import get_local_vector_index
+
+# 심층 분석에 넣을 판례 원문 선택 방식
+# relevance: 사용자 상황과 관련도가 높은 구간을 토큰 예산만큼 선택 | truncate: 원문 앞부분만 사용 (이전 방식)
+ANALYSIS_CONTEXT_MODE = os.environ.get("ANALYSIS_CONTEXT_MODE", "relevance").lower()
+# truncate 방식에서 사용할 원문 앞부분 글자 수
+ANALYSIS_CONTEXT_TRUNCATE_CHARS = int(os.environ.get("ANALYSIS_CONTEXT_TRUNCATE_CHARS", 10000))
+# 판례 원문에 쓸 토큰 예산과 토큰 수 추정용 글자 수/토큰 (한국어 판례 기준 근사치)
+ANALYSIS_CONTEXT_TOKEN_BUDGET = int(os.environ.get("ANALYSIS_CONTEXT_TOKEN_BUDGET", 3000))
+ANALYSIS_CONTEXT_CHARS_PER_TOKEN = float(os.environ.get("ANALYSIS_CONTEXT_CHARS_PER_TOKEN", 1.5))
+# 구간(passage) 최대 글자 수
+ANALYSIS_CONTEXT_PASSAGE_CHARS = int(os.environ.get("ANALYSIS_CONTEXT_PASSAGE_CHARS", 600))
+# 관련도 점수에서 임베딩 유사도의 비중 (나머지는 어휘 겹침)
+ANALYSIS_CONTEXT_EMBEDDING_WEIGHT = float(os.environ.get("ANALYSIS_CONTEXT_EMBEDDING_WEIGHT", 0.6))
+# 색인된 청크 벡터로 점수를 매길 수 없는 구간을 임베딩 API로 계산할지 여부
+ANALYSIS_CONTEXT_EMBED_PASSAGES = os.environ.get("ANALYSIS_CONTEXT_EMBED_PASSAGES", "true").lower() == "true"
+# 관련도와 무관하게 먼저 넣는 섹션 (판결 결과와 요지)
+ANALYSIS_CONTEXT_PINNED_SECTIONS = tuple(
+    name.strip() for name in os.environ.get("ANALYSIS_CONTEXT_PINNED_SECTIONS", "주문,판시사항,판결요지").split(",")
+    if name.strip()
+)
+# 청크 원문의 바이그램이 이 비율 이상 포함된 구간에 그 청크 벡터를 사용
+CHUNK_MATCH_THRESHOLD = 0.6
+
+_SECTION = re.compile(r"【\s*([^】]+?)\s*】")
+_SENTENCE_END = re.compile(r"(?<=\.)\s+")
+_WORD = re.compile(r"[가-힣A-Za-z0-9]+")
+OMISSION = "(중략)"
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / ANALYSIS_CONTEXT_CHARS_PER_TOKEN)
+
+
+def bigrams(text: str) -> Set[str]:
+    """교착어 특성상 단어 대신 단어 내부 글자 바이그램으로 어휘 겹침을 계산"""
+    grams = set()
+    for word in _WORD.findall(text or ""):
+        word = word.lower()
+        if len(word) == 1:
+            grams.add(word)
+        grams.update(word[i:i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+def _normalized(values: np.ndarray) -> np.ndarray:
+    low, high = float(np.min(values)), float(np.max(values))
+    if high <= low:
+        return np.ones_like(values)
+    return (values - low) / (high - low)
+
+
+def _pack(pieces: List[str], limit: int) -> List[str]:
+    """pieces를 순서대로 이어 붙여 limit 글자 이하의 묶음으로 만듦 (한 조각이 limit보다 길면 잘라서 나눔)"""
+    packed, current = [], ""
+    for piece in pieces:
+        while len(piece) > limit:
+            if current:
+                packed.append(current)
+                current = ""
+            packed.append(piece[:limit])
+            piece = piece[limit:]
+        if current and len(current) + 1 + len(piece) > limit:
+            packed.append(current)
+            current = ""
+        current = f"{current}\n{piece}" if current else piece
+    if current:
+        packed.append(current)
+    return packed
+
+
+def split_passages(content: str) -> List[Dict[str, Any]]:
+    """판례 원문을 【섹션】 단위로 나눈 뒤, 긴 섹션은 줄/문장 경계에서 ANALYSIS_CONTEXT_PASSAGE_CHARS 이하로 분할"""
+    parts = _SECTION.split(content or "")
+    sections = [("", parts[0])] + list(zip(parts[1::2], parts[2::2]))
+    passages = []
+    for section, body in sections:
+        pieces = []
+        for line in body.split("\n"):
+            line = line.strip()
+            if len(line) > ANALYSIS_CONTEXT_PASSAGE_CHARS:
+                pieces.extend(sentence for sentence in _SENTENCE_END.split(line) if sentence)
+            elif line:
+                pieces.append(line)
+        for text in _pack(pieces, ANALYSIS_CONTEXT_PASSAGE_CHARS):
+            passages.append({"section": section, "text": text})
+    return passages
+
+
+def situation_query(situation: Dict[str, Any]) -> str:
+    return " ".join(str(situation.get(field) or "") for field in ("who", "what", "detail", "want")).strip()
+
+
+class PrecedentContextSelector:
+    """
+    판례 원문 중 사용자 상황과 관련된 구간만 골라 토큰 예산 안에서 심층 분석 프롬프트에 넣습니다.
+    - 관련도: 임베딩 코사인 유사도(색인된 청크 벡터 재사용, 없으면 구간 임베딩) + 글자 바이그램 겹침
+    - 주문/판시사항/판결요지는 먼저 넣고, 나머지 예산은 관련도 순으로 채운 뒤 원문 순서대로 이어 붙임
+    임베딩 계산에 실패하면 어휘 겹침만으로 고릅니다.
+    """
+    # 판례 원문 해시 → 구간 벡터 (같은 판례를 여러 사건에서 분석할 때 재사용)
+    _passage_vectors = TTLLRUCache(maxsize=256, ttl=3600)
+
+    @staticmethod
+    def version() -> str:
+        """분석 결과 저장 키에 넣는 원문 선택 설정"""
+        if ANALYSIS_CONTEXT_MODE == "truncate":
+            return f"trunc{ANALYSIS_CONTEXT_TRUNCATE_CHARS}"
+        return f"rel{ANALYSIS_CONTEXT_TOKEN_BUDGET}"
+
+    @staticmethod
+    def lexical_scores(query: str, passages: List[Dict[str, Any]]) -> np.ndarray:
+        query_grams = bigrams(query)
+        scores = np.zeros(len(passages), dtype=np.float32)
+        if not query_grams:
+            return scores
+        for i, passage in enumerate(passages):
+            grams = bigrams(passage["text"])
+            if grams:
+                scores[i] = len(query_grams & grams) / math.sqrt(len(query_grams) * len(grams))
+        return scores
+
+    @staticmethod
+    def _chunk_vectors(precedent_no: str) -> Tuple[List[str], np.ndarray]:
+        local_index = get_local_vector_index()
+        if local_index is not None:
+            return local_index.chunk_vectors(precedent_no)
+        chunks = OpenSearchService.get_chunk_vectors(precedent_no)
+        if not chunks:
+            return [], np.empty((0, 0), dtype=np.float32)
+        vectors = np.asarray([chunk["content_embedding"] for chunk in chunks], dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return [chunk.get("chunk_content", "") for chunk in chunks], vectors
+
+    @classmethod
+    def _embed_passages(cls, content: str, passages: List[Dict[str, Any]], indices: List[int]) -> Dict[int, np.ndarray]:
+        key = content_hash(content)
+        cached: Dict[int, np.ndarray] = cls._passage_vectors.get(key) or {}
+        missing = [i for i in indices if i not in cached]
+        if missing:
+            vectors = EmbeddingProvider.create_embeddings([passages[i]["text"] for i in missing], is_query=False)
+            cached = dict(cached)
+            for i, vector in zip(missing, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                cached[i] = vector / (np.linalg.norm(vector) or 1.0)
+            cls._passage_vectors.set(key, cached)
+        return {i: cached[i] for i in indices}
+
+    @classmethod
+    def embedding_scores(cls, query: str, precedent_no: str, content: str,
+                         passages: List[Dict[str, Any]]) -> np.ndarray:
+        """구간별 코사인 유사도 (계산할 수 없는 구간은 nan)"""
+        query_vector = np.asarray(EmbeddingCacheService.get_embedding(query, is_query=True), dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+        scores = np.full(len(passages), np.nan, dtype=np.float32)
+
+        try:
+            chunk_texts, chunk_vectors = cls._chunk_vectors(precedent_no)
+        except Exception as e:
+            logging.warning(f"Chunk vectors unavailable for {precedent_no}: {str(e)}")
+            chunk_texts, chunk_vectors = [], None
+        if chunk_texts:
+            passage_grams = [bigrams(passage["text"]) for passage in passages]
+            chunk_scores = chunk_vectors @ query_vector
+            for text, score in zip(chunk_texts, chunk_scores):
+                grams = bigrams(text)
+                if not grams:
+                    continue
+                overlaps = [len(grams & candidate) / len(grams) for candidate in passage_grams]
+                best = int(np.argmax(overlaps))
+                if overlaps[best] >= CHUNK_MATCH_THRESHOLD:
+                    scores[best] = score if np.isnan(scores[best]) else max(scores[best], score)
+
+        missing = [i for i in range(len(passages)) if np.isnan(scores[i])]
+        if missing and ANALYSIS_CONTEXT_EMBED_PASSAGES:
+            for i, vector in cls._embed_passages(content, passages, missing).items():
+                scores[i] = float(vector @ query_vector)
+        return scores
+
+    @classmethod
+    def relevance(cls, situation: Dict[str, Any], precedent_no: str, content: str,
+                  passages: List[Dict[str, Any]]) -> np.ndarray:
+        query = situation_query(situation)
+        lexical = _normalized(cls.lexical_scores(query, passages))
+        try:
+            embedding = cls.embedding_scores(query, precedent_no, content, passages)
+        except Exception as e:
+            logging.warning(f"Context selection embedding failed for {precedent_no}, using lexical only: {str(e)}")
+            return lexical
+        known = ~np.isnan(embedding)
+        if not known.any():
+            return lexical
+        combined = lexical.copy()
+        combined[known] = (
+            ANALYSIS_CONTEXT_EMBEDDING_WEIGHT * _normalized(embedding[known])
+            + (1 - ANALYSIS_CONTEXT_EMBEDDING_WEIGHT) * lexical[known]
+        )
+        return combined
+
+    @staticmethod
+    def render(passages: List[Dict[str, Any]], selected: Set[int]) -> str:
+        """선택한 구간을 원문 순서대로 섹션 제목과 함께 이어 붙이고, 빠진 부분은 (중략)으로 표시"""
+        lines, last_section, last_index = [], None, -1
+        for i in sorted(selected):
+            passage = passages[i]
+            if last_index >= 0 and i != last_index + 1:
+                lines.append(OMISSION)
+            if passage["section"] != last_section:
+                if passage["section"]:
+                    lines.append(f"【{passage['section']}】")
+                last_section = passage["section"]
+            lines.append(passage["text"])
+            last_index = i
+        return "\n".join(lines)
+
+    @classmethod
+    def select(cls, situation: Dict[str, Any], precedent_no: str, content: str) -> str:
+        """토큰 예산 안에 들어가는 판례 원문 (예산보다 짧은 판례는 원문 그대로)"""
+        original_tokens = estimate_tokens(content or "")
+        ANALYSIS_CONTEXT_TOKENS.labels(kind="original").observe(original_tokens)
+        if ANALYSIS_CONTEXT_MODE == "truncate":
+            context = (content or "")[:ANALYSIS_CONTEXT_TRUNCATE_CHARS]
+            ANALYSIS_CONTEXT_TOKENS.labels(kind="selected").observe(estimate_tokens(context))
+            return context
+        if original_tokens <= ANALYSIS_CONTEXT_TOKEN_BUDGET:
+            ANALYSIS_CONTEXT_TOKENS.labels(kind="selected").observe(original_tokens)
+            return content
+
+        passages = split_passages(content)
+        scores = cls.relevance(situation, precedent_no, content, passages)
+        is_pinned = [passage["section"] in ANALYSIS_CONTEXT_PINNED_SECTIONS for passage in passages]
+        ranked = [i for i in range(len(passages)) if is_pinned[i]]
+        ranked += [int(i) for i in np.argsort(-scores, kind="stable") if not is_pinned[int(i)]]
+
+        selected: Set[int] = set()
+        remaining = ANALYSIS_CONTEXT_TOKEN_BUDGET
+        for i in ranked:
+            # 섹션 제목/(중략) 표시에 드는 몫을 여유로 포함
+            cost = estimate_tokens(passages[i]["text"]) + 4
+            if cost <= remaining:
+                selected.add(i)
+                remaining -= cost
+
+        context = cls.render(passages, selected)
+        ANALYSIS_CONTEXT_TOKENS.labels(kind="selected").observe(estimate_tokens(context))
+        return context
+
+    @classmethod
+    async def aselect(cls, situation: Dict[str, Any], precedent_no: str, content: str) -> str:
+        # 로컬 벡터 인덱스(numpy)와 임베딩 캐시(DB) 조회가 동기 코드이므로 스레드에서 실행
+        return await sync_to_async(with_db_cleanup(cls.select), thread_sensitive=False)(situation, precedent_no, content)
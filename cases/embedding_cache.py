@@ -0,0 +1,143 @@
+import os
+import re
+import hashlib
+import random
+import logging
+import unicodedata
+from array import array
+from datetime import timedelta
+from typing import List, Optional
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from .cache import TTLLRUCache
+from .metrics import EMBEDDING_CACHE_HITS, EMBEDDING_CACHE_MISSES, EMBEDDING_CACHE_EVICTIONS
+from .models import EmbeddingCache
+from .service import GeminiService, EMBEDDING_MODEL_NAME, EMBEDDING_DIMENSION
+
+# 1차(프로세스 내 LRU) / 2차(Postgres) 캐시 설정
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", 1024))
+EMBEDDING_CACHE_TTL = int(os.environ.get("EMBEDDING_CACHE_TTL", 3600))
+# DB 캐시 행 수명(일). 만료 행은 조회 시 무시되고, 저장할 때 EMBEDDING_CACHE_PURGE_PROBABILITY 확률로
+# 최대 EMBEDDING_CACHE_PURGE_BATCH건씩 삭제됩니다. 한 번에 정리하려면 manage.py purge_embedding_cache를 실행하세요.
+EMBEDDING_CACHE_DB_TTL_DAYS = int(os.environ.get("EMBEDDING_CACHE_DB_TTL_DAYS", 30))
+EMBEDDING_CACHE_PURGE_PROBABILITY = float(os.environ.get("EMBEDDING_CACHE_PURGE_PROBABILITY", 0.01))
+EMBEDDING_CACHE_PURGE_BATCH = int(os.environ.get("EMBEDDING_CACHE_PURGE_BATCH", 1000))
+
+
+class EmbeddingCacheService:
+    _memory = TTLLRUCache(
+        maxsize=EMBEDDING_CACHE_SIZE,
+        ttl=EMBEDDING_CACHE_TTL,
+        on_evict=lambda reason: EMBEDDING_CACHE_EVICTIONS.labels(reason=reason).inc(),
+    )
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """공백/대소문자/유니코드 표기 차이만 있는 입력을 같은 키로 모으기 위한 정규화"""
+        text = unicodedata.normalize("NFKC", text or "")
+        return re.sub(r"\s+", " ", text).strip().lower()
+
+    @classmethod
+    def make_key(cls, text: str, task_type: str) -> str:
+        model = GeminiService._clean_model_name(EMBEDDING_MODEL_NAME)
+        raw = f"{model}|{task_type}|{EMBEDDING_DIMENSION}|{cls.normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def expires_before():
+        return timezone.now() - timedelta(days=EMBEDDING_CACHE_DB_TTL_DAYS)
+
+    @classmethod
+    def purge_expired(cls, batch_size: Optional[int] = None) -> int:
+        """만료된 DB 캐시 행을 삭제하고 삭제 건수를 반환 (batch_size를 주면 최대 그 수만큼)"""
+        queryset = EmbeddingCache.objects.filter(updated_at__lt=cls.expires_before())
+        if batch_size is not None:
+            # 큰 테이블에서 한 번의 DELETE가 오래 잠기지 않도록 키를 먼저 골라 나눠 삭제
+            keys = list(queryset.values_list("cache_key", flat=True)[:batch_size])
+            if not keys:
+                return 0
+            queryset = EmbeddingCache.objects.filter(cache_key__in=keys)
+        return queryset.delete()[0]
+
+    @classmethod
+    def _load_from_db(cls, key: str) -> Optional[List[float]]:
+        try:
+            row = EmbeddingCache.objects.filter(cache_key=key).only("vector", "updated_at").first()
+        except Exception as e:
+            logging.warning(f"Embedding cache DB read error: {str(e)}")
+            return None
+        if row is None:
+            return None
+        if row.updated_at < cls.expires_before():
+            return None
+        return array("f", bytes(row.vector)).tolist()
+
+    @classmethod
+    def _save_to_db(cls, key: str, task_type: str, vector: List[float]) -> None:
+        try:
+            EmbeddingCache.objects.update_or_create(
+                cache_key=key,
+                defaults={
+                    "model_name": GeminiService._clean_model_name(EMBEDDING_MODEL_NAME),
+                    "task_type": task_type,
+                    "dimension": len(vector),
+                    "vector": array("f", vector).tobytes(),
+                },
+            )
+        except Exception as e:
+            # 캐시 저장 실패가 검색 자체를 막아서는 안 됨
+            logging.warning(f"Embedding cache DB write error: {str(e)}")
+            return
+        if random.random() < EMBEDDING_CACHE_PURGE_PROBABILITY:
+            try:
+                cls.purge_expired(EMBEDDING_CACHE_PURGE_BATCH)
+            except Exception as e:
+                logging.warning(f"Embedding cache purge error: {str(e)}")
+
+    @classmethod
+    def get_embedding(cls, content: str, is_query: bool = True) -> List[float]:
+        """메모리 → DB → 임베딩 API 순서로 조회하고, 미스 시 두 계층 모두에 채워 넣습니다."""
+        task_type = "RETRIEVAL_QUERY" if is_query else "RETRIEVAL_DOCUMENT"
+        key = cls.make_key(content, task_type)
+
+        vector = cls._memory.get(key)
+        if vector is not None:
+            EMBEDDING_CACHE_HITS.labels(tier="memory").inc()
+            return vector
+
+        vector = cls._load_from_db(key)
+        if vector is not None:
+            EMBEDDING_CACHE_HITS.labels(tier="db").inc()
+            cls._memory.set(key, vector)
+            return vector
+
+        EMBEDDING_CACHE_MISSES.inc()
+        vector = list(GeminiService.create_embedding(content, is_query=is_query))
+        cls._save_to_db(key, task_type, vector)
+        cls._memory.set(key, vector)
+        return vector
+
+    @classmethod
+    async def aget_embedding(cls, content: str, is_query: bool = True) -> List[float]:
+        """get_embedding의 비동기 버전 (DB 계층은 sync_to_async, 임베딩 API는 비동기 클라이언트 사용)"""
+        task_type = "RETRIEVAL_QUERY" if is_query else "RETRIEVAL_DOCUMENT"
+        key = cls.make_key(content, task_type)
+
+        vector = cls._memory.get(key)
+        if vector is not None:
+            EMBEDDING_CACHE_HITS.labels(tier="memory").inc()
+            return vector
+
+        vector = await sync_to_async(cls._load_from_db)(key)
+        if vector is not None:
+            EMBEDDING_CACHE_HITS.labels(tier="db").inc()
+            cls._memory.set(key, vector)
+            return vector
+
+        EMBEDDING_CACHE_MISSES.inc()
+        vector = list(await GeminiService.acreate_embedding(content, is_query=is_query))
+        await sync_to_async(cls._save_to_db)(key, task_type, vector)
+        cls._memory.set(key, vector)
+        return vector
@@ -0,0 +1,108 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from django.db import DatabaseError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import Category, Question, PrecedentSummary, SearchIndexGeneration
+from .search_cache import CHUNKED_INDEX_NAME
+from .service import SUMMARY_PROMPT_VERSION
+
+# 브라우저(max-age)와 공유 캐시(s-maxage, Traefik 등)의 캐시 유지 시간(초)
+# 판례 원문/요약은 재색인이나 프롬프트 버전 변경 시에만 바뀌고, 초기 데이터는 관리자 수정 시에만 바뀝니다.
+PRECEDENT_CACHE_MAX_AGE = int(os.environ.get("PRECEDENT_CACHE_MAX_AGE", 3600))
+PRECEDENT_CACHE_S_MAXAGE = int(os.environ.get("PRECEDENT_CACHE_S_MAXAGE", 86400))
+INIT_CACHE_MAX_AGE = int(os.environ.get("INIT_CACHE_MAX_AGE", 60))
+INIT_CACHE_S_MAXAGE = int(os.environ.get("INIT_CACHE_S_MAXAGE", 600))
+
+# (ETag, Last-Modified)
+Validators = Tuple[str, Optional[datetime]]
+
+
+def strong_etag(*parts) -> str:
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def is_conditional(request) -> bool:
+    return "HTTP_IF_NONE_MATCH" in request.META or "HTTP_IF_MODIFIED_SINCE" in request.META
+
+
+def not_modified_response(request, validators: Optional[Validators], max_age: int, s_maxage: int):
+    """If-None-Match / If-Modified-Since가 현재 검증자와 일치하면 304 응답, 아니면 None"""
+    if validators is None:
+        return None
+    etag, last_modified = validators
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        apply_validators(response, validators, max_age, s_maxage)
+    return response
+
+
+def apply_validators(response, validators: Optional[Validators], max_age: int, s_maxage: int):
+    # 같은 URL이 Accept에 따라 JSON 또는 SSE로 응답하므로 공유 캐시가 둘을 섞지 않도록 Vary 지정
+    patch_vary_headers(response, ["Accept"])
+    if validators is None:
+        # 검증자를 만들 수 없으면(요약 저장소 장애 등) 캐시하지 않음
+        patch_cache_control(response, no_cache=True)
+        return response
+    etag, last_modified = validators
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, public=True, max_age=max_age, s_maxage=s_maxage)
+    return response
+
+
+def _index_generation() -> Tuple[int, Optional[datetime]]:
+    row = (
+        SearchIndexGeneration.objects.filter(index_name=CHUNKED_INDEX_NAME)
+        .values_list("generation", "updated_at").first()
+    )
+    return row or (0, None)
+
+
+def precedent_validators(case_no: str, digest: Optional[str] = None,
+                         variant: Optional[Dict[str, Any]] = None) -> Optional[Validators]:
+    """
+    판례 상세 응답의 검증자. 저장된 요약 행(원문 해시, 프롬프트 버전, 모델)과 인덱스 세대 번호로 만들므로
+    OpenSearch나 LLM을 호출하지 않고 DB 조회만으로 계산됩니다. 저장된 요약이 없으면 None.
+    digest(원문 해시)를 주면 방금 조회한 원문과 같은 요약 행만 사용합니다.
+    variant(fields, offset, length 등 응답 모양을 바꾸는 쿼리)는 ETag에 포함됩니다.
+    """
+    rows = PrecedentSummary.objects.filter(
+        case_no=str(case_no), prompt_version=SUMMARY_PROMPT_VERSION, status=PrecedentSummary.STATUS_READY,
+    )
+    if digest is not None:
+        rows = rows.filter(content_hash=digest)
+    try:
+        row = rows.order_by("-updated_at").values("content_hash", "model_name", "updated_at").first()
+        if row is None:
+            return None
+        generation, generation_updated = _index_generation()
+    except DatabaseError as e:
+        logging.warning(f"Precedent validators unavailable: {str(e)}")
+        return None
+    etag = strong_etag(
+        "precedent", case_no, row["content_hash"], SUMMARY_PROMPT_VERSION, row["model_name"], generation,
+        json.dumps(variant or {}, sort_keys=True, ensure_ascii=False),
+    )
+    return etag, max(filter(None, [row["updated_at"], generation_updated]))
+
+
+def init_data_validators() -> Validators:
+    """카테고리/질문 테이블의 행 수와 최종 수정 시각으로 만든 초기 데이터 버전"""
+    categories = Category.objects.aggregate(count=Count("pk"), updated=Max("updated_at"))
+    questions = Question.objects.aggregate(count=Count("pk"), updated=Max("updated_at"))
+    etag = strong_etag(
+        "init", categories["count"], categories["updated"], questions["count"], questions["updated"]
+    )
+    last_modified = max(filter(None, [categories["updated"], questions["updated"]]), default=None)
+    return etag, last_modified
@@ -0,0 +1,351 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterator, AsyncIterator, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .analysis_store import CaseAnalysisStore
+from .metrics import BACKGROUND_JOBS, BACKGROUND_JOB_DURATION, BACKGROUND_JOB_QUEUE_WAIT
+from .models import BackgroundJob, Case
+from .precedent_store import PrecedentStore
+from .threads import with_db_cleanup
+
+# 실행 점유(lease) 시간: 이 시간 안에 끝나지 않은 running 작업은 워커가 중단된 것으로 보고 다시 실행
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", 300))
+# 실행 중인 작업의 점유를 연장하는 간격(초). 핸들러가 점유 시간보다 오래 걸려도 다른 워커가 가져가지 않음
+JOB_HEARTBEAT_INTERVAL = float(os.environ.get("JOB_HEARTBEAT_INTERVAL", JOB_LEASE_SECONDS / 3))
+# 최대 실행 횟수와 재시도 대기 시간(초, 재시도마다 2배 + 지터)
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_BACKOFF = float(os.environ.get("JOB_RETRY_BACKOFF", 5))
+# SSE로 작업 상태를 전달할 때 DB 확인 간격과 최대 대기 시간(초)
+JOB_STREAM_POLL_INTERVAL = float(os.environ.get("JOB_STREAM_POLL_INTERVAL", 1.0))
+JOB_STREAM_TIMEOUT = float(os.environ.get("JOB_STREAM_TIMEOUT", 300))
+
+JobHandler = Callable[[Dict[str, Any]], Any]
+Event = Tuple[str, Any]
+
+_handlers: Dict[str, JobHandler] = {}
+# 현재 스레드에서 실행 중인 작업 (job_checkpoint/record_job_checkpoint용)
+_current_job: ContextVar[Optional[BackgroundJob]] = ContextVar("background_job", default=None)
+
+
+class PermanentJobError(Exception):
+    """재시도해도 성공할 수 없는 오류 (대상 사건/문서 삭제 등). 바로 failed로 처리합니다."""
+
+
+class JobLeaseLost(Exception):
+    """점유가 만료되어 다른 워커가 작업을 가져간 경우. 이 워커는 결과를 기록하지 않고 실행을 멈춥니다."""
+
+
+def job_handler(kind: str):
+    """작업 종류 등록 데코레이터. 핸들러는 payload(dict)를 받아 JSON으로 저장할 결과를 반환합니다."""
+    def register(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def job_checkpoint(key: str) -> Any:
+    """현재 작업의 이전 실행에서 record_job_checkpoint로 기록한 값 (없으면 None)"""
+    job = _current_job.get()
+    return (job.checkpoints or {}).get(key) if job is not None else None
+
+
+def record_job_checkpoint(key: str, create: Callable[[], Any]) -> Any:
+    """
+    재실행되면 안 되는 부수효과(문서 생성 등)를 실행하고 그 결과(JSON 값)를 작업에 기록합니다.
+    이 워커가 여전히 작업을 점유하고 있을 때만 같은 트랜잭션 안에서 실행하며, 이미 기록된 값이 있으면 그 값을 반환합니다.
+    (작업 밖에서 호출하면 create()를 그대로 실행)
+    """
+    job = _current_job.get()
+    if job is None:
+        return create()
+    with transaction.atomic():
+        locked = JobQueue._running(job).select_for_update().first()
+        if locked is None:
+            raise JobLeaseLost(f"작업 {job.job_id}의 점유가 만료되었습니다.")
+        checkpoints = dict(locked.checkpoints or {})
+        if key not in checkpoints:
+            checkpoints[key] = create()
+            locked.checkpoints = checkpoints
+            locked.save(update_fields=["checkpoints", "updated_at"])
+    job.checkpoints = checkpoints
+    return checkpoints[key]
+
+
+def wants_job(request) -> bool:
+    """?async=1 쿼리 또는 Prefer: respond-async 헤더로 백그라운드 작업 모드를 요청했는지 확인"""
+    if request.GET.get("async", "").lower() in ("1", "true"):
+        return True
+    return "respond-async" in request.headers.get("Prefer", "")
+
+
+def job_data(job: BackgroundJob) -> Dict[str, Any]:
+    return {
+        "job_id": str(job.job_id),
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "result": job.result,
+        "error": job.error or None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def job_accepted_data(request, job: BackgroundJob) -> Dict[str, Any]:
+    """작업 제출 응답(202)의 data: 상태 조회 URL은 폴링(JSON)과 SSE(Accept: text/event-stream) 모두 지원"""
+    status_url = request.build_absolute_uri(reverse("job_status", kwargs={"job_id": job.job_id}))
+    return {"job_id": str(job.job_id), "status": job.status, "status_url": status_url}
+
+
+class JobQueue:
+    """
+    Postgres 테이블(BackgroundJob) 기반 작업 큐. 별도 브로커 없이 워커(manage.py run_jobs)가
+    SELECT ... FOR UPDATE SKIP LOCKED로 작업을 하나씩 점유하므로 여러 워커/스레드가 같은 작업을 중복 실행하지 않습니다.
+    """
+
+    @staticmethod
+    def submit(kind: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> BackgroundJob:
+        if kind not in _handlers:
+            raise ValueError(f"등록되지 않은 작업 종류: {kind}")
+        return BackgroundJob.objects.create(
+            kind=kind, payload=payload, max_attempts=max_attempts or JOB_MAX_ATTEMPTS
+        )
+
+    @staticmethod
+    def get(job_id) -> Optional[BackgroundJob]:
+        return BackgroundJob.objects.filter(job_id=job_id).first()
+
+    @staticmethod
+    def claim(worker: str, kinds: Optional[List[str]] = None) -> Optional[BackgroundJob]:
+        """실행 가능한 작업 하나를 점유 (queued 이면서 run_after가 지났거나, 점유가 만료된 running)"""
+        now = timezone.now()
+        with transaction.atomic():
+            queryset = BackgroundJob.objects.select_for_update(skip_locked=True).filter(
+                Q(status=BackgroundJob.STATUS_QUEUED, run_after__lte=now)
+                | Q(status=BackgroundJob.STATUS_RUNNING, locked_until__lt=now)
+            )
+            if kinds:
+                queryset = queryset.filter(kind__in=kinds)
+            job = queryset.order_by("run_after").first()
+            if job is None:
+                return None
+            job.status = BackgroundJob.STATUS_RUNNING
+            job.attempts += 1
+            job.worker = worker
+            job.locked_until = now + timedelta(seconds=JOB_LEASE_SECONDS)
+            job.started_at = now
+            job.save(update_fields=["status", "attempts", "worker", "locked_until", "started_at", "updated_at"])
+        if job.attempts == 1:
+            BACKGROUND_JOB_QUEUE_WAIT.labels(kind=job.kind).observe((now - job.created_at).total_seconds())
+        return job
+
+    @staticmethod
+    def _running(job: BackgroundJob):
+        # 점유가 만료되어 다른 워커가 가져간 작업의 결과는 기록하지 않음
+        return BackgroundJob.objects.filter(
+            job_id=job.job_id, status=BackgroundJob.STATUS_RUNNING, worker=job.worker, attempts=job.attempts
+        )
+
+    @staticmethod
+    def _count(job: BackgroundJob, result: str, updated: int) -> bool:
+        """결과가 실제로 기록된 경우에만 집계 (점유를 잃은 워커의 결과는 _running 조건으로 버려짐)"""
+        if not updated:
+            logging.warning(f"Job {job.job_id} ({job.kind}) lease lost, {result} result discarded")
+            return False
+        BACKGROUND_JOBS.labels(kind=job.kind, result=result).inc()
+        return True
+
+    @classmethod
+    def _succeed(cls, job: BackgroundJob, result: Any) -> None:
+        updated = cls._running(job).update(
+            status=BackgroundJob.STATUS_SUCCEEDED, result=result, error="",
+            locked_until=None, finished_at=timezone.now(), updated_at=timezone.now(),
+        )
+        cls._count(job, "succeeded", updated)
+
+    @classmethod
+    def _fail(cls, job: BackgroundJob, error: Exception) -> None:
+        now = timezone.now()
+        if not isinstance(error, PermanentJobError) and job.attempts < job.max_attempts:
+            delay = JOB_RETRY_BACKOFF * (2 ** (job.attempts - 1)) * random.uniform(1.0, 1.5)
+            updated = cls._running(job).update(
+                status=BackgroundJob.STATUS_QUEUED, error=str(error), locked_until=None,
+                run_after=now + timedelta(seconds=delay), updated_at=now,
+            )
+            if cls._count(job, "retried", updated):
+                logging.warning(f"Job {job.job_id} ({job.kind}) attempt {job.attempts} failed, retry in {delay:.1f}s: {error}")
+            return
+        updated = cls._running(job).update(
+            status=BackgroundJob.STATUS_FAILED, error=str(error), locked_until=None, finished_at=now, updated_at=now,
+        )
+        if cls._count(job, "failed", updated):
+            logging.error(f"Job {job.job_id} ({job.kind}) failed after {job.attempts} attempt(s): {error}")
+
+    @classmethod
+    @contextmanager
+    def _heartbeat(cls, job: BackgroundJob) -> Iterator[None]:
+        """핸들러가 실행되는 동안 별도 스레드에서 JOB_HEARTBEAT_INTERVAL마다 점유(locked_until)를 연장"""
+        stop = threading.Event()
+
+        def beat():
+            try:
+                while not stop.wait(JOB_HEARTBEAT_INTERVAL):
+                    now = timezone.now()
+                    try:
+                        renewed = cls._running(job).update(
+                            locked_until=now + timedelta(seconds=JOB_LEASE_SECONDS), updated_at=now
+                        )
+                    except Exception as e:
+                        logging.warning(f"Job {job.job_id} ({job.kind}) heartbeat failed: {str(e)}")
+                        continue
+                    if not renewed:
+                        logging.warning(f"Job {job.job_id} ({job.kind}) lease lost to another worker")
+                        return
+            finally:
+                # 스레드별 DB 연결은 스레드가 끝나도 자동으로 닫히지 않음
+                connection.close()
+
+        thread = threading.Thread(target=beat, name=f"job-heartbeat-{job.job_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    @classmethod
+    def run(cls, job: BackgroundJob) -> None:
+        started = time.perf_counter()
+        token = _current_job.set(job)
+        try:
+            handler = _handlers.get(job.kind)
+            if handler is None:
+                raise PermanentJobError(f"등록되지 않은 작업 종류: {job.kind}")
+            if job.attempts > job.max_attempts:
+                # 실행 도중 워커가 반복해서 중단된 작업
+                raise PermanentJobError(f"최대 실행 횟수({job.max_attempts}) 초과")
+            with cls._heartbeat(job):
+                result = handler(job.payload)
+        except JobLeaseLost as e:
+            logging.warning(f"Job {job.job_id} ({job.kind}) abandoned: {str(e)}")
+        except Exception as e:
+            cls._fail(job, e)
+        else:
+            cls._succeed(job, result)
+        finally:
+            _current_job.reset(token)
+            BACKGROUND_JOB_DURATION.labels(kind=job.kind).observe(time.perf_counter() - started)
+
+    @classmethod
+    def run_next(cls, worker: str, kinds: Optional[List[str]] = None) -> bool:
+        """작업 하나를 점유해 실행 (실행할 작업이 없으면 False)"""
+        job = cls.claim(worker, kinds)
+        if job is None:
+            return False
+        cls.run(job)
+        return True
+
+    @classmethod
+    def work(cls, worker: str, stop: threading.Event, kinds: Optional[List[str]] = None,
+             poll_interval: float = 1.0, drain: bool = False) -> None:
+        """워커 스레드 루프. stop이 설정되면 실행 중인 작업을 마친 뒤 종료합니다 (drain=True면 큐가 비면 종료)."""
+        run_next = with_db_cleanup(cls.run_next)
+        while not stop.is_set():
+            try:
+                if run_next(worker, kinds):
+                    continue
+            except Exception as e:
+                # DB 연결 오류 등: 잠시 뒤 다시 시도
+                logging.error(f"Job worker {worker} error: {str(e)}")
+            if drain:
+                return
+            stop.wait(poll_interval)
+
+    # --- 상태 스트림 (SSE) ---
+
+    @classmethod
+    def events(cls, job_id) -> Iterator[Event]:
+        """작업 상태가 바뀔 때마다 status 이벤트, 끝나면 result 또는 error 이벤트 후 done"""
+        deadline = time.monotonic() + JOB_STREAM_TIMEOUT
+        last = None
+        while True:
+            job = cls.get(job_id)
+            if job is None:
+                yield "error", {"message": "작업을 찾을 수 없습니다."}
+                return
+            event = cls._event(job, last)
+            if event is not None:
+                yield event
+                last = (job.status, job.attempts)
+            if job.is_finished:
+                yield cls._final_event(job)
+                yield "done", {}
+                return
+            if time.monotonic() > deadline:
+                yield "error", {"message": "작업 상태 대기 시간이 초과되었습니다. 상태 조회 URL로 다시 확인하세요."}
+                return
+            time.sleep(JOB_STREAM_POLL_INTERVAL)
+
+    @classmethod
+    async def aevents(cls, job_id) -> AsyncIterator[Event]:
+        deadline = time.monotonic() + JOB_STREAM_TIMEOUT
+        last = None
+        while True:
+            job = await sync_to_async(cls.get)(job_id)
+            if job is None:
+                yield "error", {"message": "작업을 찾을 수 없습니다."}
+                return
+            event = cls._event(job, last)
+            if event is not None:
+                yield event
+                last = (job.status, job.attempts)
+            if job.is_finished:
+                yield cls._final_event(job)
+                yield "done", {}
+                return
+            if time.monotonic() > deadline:
+                yield "error", {"message": "작업 상태 대기 시간이 초과되었습니다. 상태 조회 URL로 다시 확인하세요."}
+                return
+            await asyncio.sleep(JOB_STREAM_POLL_INTERVAL)
+
+    @staticmethod
+    def _event(job: BackgroundJob, last) -> Optional[Event]:
+        if (job.status, job.attempts) == last:
+            return None
+        return "status", {"job_id": str(job.job_id), "status": job.status, "attempts": job.attempts}
+
+    @staticmethod
+    def _final_event(job: BackgroundJob) -> Event:
+        if job.status == BackgroundJob.STATUS_SUCCEEDED:
+            return "result", job_data(job)
+        return "error", {"message": job.error, "job": job_data(job)}
+
+
+# --- 작업 종류 (cases) ---
+
+@job_handler("case_analysis")
+def run_case_analysis(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """CaseAnswerView ?async=1: 사건-판례 심층 분석 (결과는 CaseAnalysisStore에도 저장되어 재사용)"""
+    try:
+        case_obj = Case.objects.get(id=payload["case_id"])
+    except Case.DoesNotExist:
+        raise PermanentJobError("사건 ID를 찾을 수 없습니다.")
+    precedent = PrecedentStore.get(payload["precedent_no"])
+    if precedent is None:
+        raise PermanentJobError("판례 정보 없음")
+    return CaseAnalysisStore.get_analysis(
+        case_obj, payload["precedent_no"], precedent.get("content", ""), refresh=payload.get("refresh", False)
+    )
@@ -0,0 +1,101 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+Section = Tuple[str, Any]
+
+
+class JsonSectionParser:
+    """
+    LLM이 스트리밍하는 JSON 객체 텍스트를 조각 단위로 받아, 최상위 키의 값이 완성될 때마다 (키, 값)을 반환하는 증분 파서.
+    JsonOutputParser의 스트리밍처럼 조각마다 전체 버퍼를 다시 해석하지 않고, 새로 들어온 문자만 한 번씩 검사합니다.
+    (```json 코드 블록 등 최상위 객체 앞뒤의 텍스트는 무시)
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        # 최상위 객체의 시작/끝 위치 (끝이 없으면 출력이 중간에 끊긴 것)
+        self._root_start: Optional[int] = None
+        self._root_end: Optional[int] = None
+        self.sections: Dict[str, Any] = {}
+
+    def feed(self, chunk: str) -> List[Section]:
+        """새 텍스트 조각을 처리하고 이번 조각으로 완성된 최상위 섹션 목록을 반환"""
+        self._text += chunk
+        completed: List[Section] = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    # 최상위 객체에서 값이 시작되기 전의 문자열은 키
+                    if self._depth == 1 and self._value_start is None:
+                        self._key = json.loads(text[self._string_start:i + 1])
+                continue
+            if c == '"':
+                if self._depth > 0:
+                    self._in_string = True
+                    self._string_start = i
+            elif c in "{[":
+                if self._depth == 0:
+                    if c != "{" or self._root_end is not None:
+                        continue
+                    self._root_start = i
+                self._depth += 1
+            elif c in "}]":
+                if self._depth == 0:
+                    continue
+                self._depth -= 1
+                if self._depth == 1:
+                    # 객체/배열 값이 닫히는 즉시 섹션 완성 (뒤따르는 쉼표를 기다리지 않음)
+                    self._complete(text[self._value_start:i + 1] if self._value_start is not None else "", completed)
+                elif self._depth == 0:
+                    self._complete(text[self._value_start:i] if self._value_start is not None else "", completed)
+                    self._root_end = i
+            elif self._depth == 1:
+                if c == ":" and self._key is not None:
+                    self._value_start = i + 1
+                elif c == ",":
+                    self._complete(text[self._value_start:i] if self._value_start is not None else "", completed)
+        self._pos = len(text)
+        return completed
+
+    def _complete(self, raw: str, completed: List[Section]) -> None:
+        key, self._key, self._value_start = self._key, None, None
+        raw = raw.strip()
+        if key is None or not raw:
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            # 잘못된 값은 건너뛰고 마지막 result()에서 전체를 다시 검증
+            return
+        self.sections[key] = value
+        completed.append((key, value))
+
+    def result(self, required: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        """
+        완성된 최상위 객체 전체를 엄격하게 해석하고 required 키가 모두 있는지 검증.
+        (JsonOutputParser는 끊긴 JSON도 부분 객체로 받아들이므로 최종 결과 검증에는 사용하지 않음)
+        """
+        if self._root_start is None or self._root_end is None:
+            raise ValueError("분석 결과 JSON이 완성되지 않았습니다.")
+        try:
+            result = json.loads(self._text[self._root_start:self._root_end + 1])
+        except ValueError as e:
+            raise ValueError(f"분석 결과를 JSON으로 해석할 수 없습니다: {str(e)}")
+        missing = [key for key in required if key not in result]
+        if missing:
+            raise ValueError(f"분석 결과에 필요한 항목이 없습니다: {', '.join(missing)}")
+        return result
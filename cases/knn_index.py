@@ -0,0 +1,102 @@
+import time
+import logging
+from typing import Dict, Any, Optional
+
+import numpy as np
+from opensearchpy import OpenSearch, helpers
+
+from .quantization import ENCODINGS, SPACE_TYPES, VECTOR_PQ_M
+
+# precedents_chunked의 content_embedding 필드 매핑 (색인 생성 시 인코딩/유사도 공간 선택)
+#   fp32: faiss HNSW 원본 | fp16: faiss SQ fp16 | int8: lucene HNSW + SQ(int8, 엔진이 양자화)
+#   pq: faiss HNSW + PQ (코드북 학습 모델 필요, train_pq_model 참고)
+PQ_CODE_SIZE = 8
+PQ_TRAIN_TIMEOUT = 1800
+KNN_MODELS_PATH = "/_plugins/_knn/models"
+
+
+def knn_method(encoding: str, space_type: str) -> Dict[str, Any]:
+    if encoding not in ENCODINGS:
+        raise ValueError(f"알 수 없는 벡터 인코딩: {encoding} (지원: {', '.join(ENCODINGS)})")
+    if space_type not in SPACE_TYPES:
+        raise ValueError(f"알 수 없는 space_type: {space_type} (지원: {', '.join(SPACE_TYPES)})")
+    method: Dict[str, Any] = {"name": "hnsw", "space_type": space_type, "engine": "faiss"}
+    if encoding == "fp16":
+        method["parameters"] = {"encoder": {"name": "sq", "parameters": {"type": "fp16"}}}
+    elif encoding == "int8":
+        method["engine"] = "lucene"
+        method["parameters"] = {"encoder": {"name": "sq"}}
+    elif encoding == "pq":
+        method["parameters"] = {
+            "encoder": {"name": "pq", "parameters": {"m": VECTOR_PQ_M, "code_size": PQ_CODE_SIZE}}
+        }
+    return method
+
+
+def knn_field_mapping(dimension: int, encoding: str, space_type: str,
+                      model_id: Optional[str] = None) -> Dict[str, Any]:
+    """knn_vector 필드 매핑. pq는 학습된 모델(model_id)이 차원/메서드를 대신합니다."""
+    if encoding == "pq":
+        if not model_id:
+            raise ValueError("pq 인코딩은 학습된 모델 id가 필요합니다.")
+        return {"type": "knn_vector", "model_id": model_id}
+    return {"type": "knn_vector", "dimension": dimension, "method": knn_method(encoding, space_type)}
+
+
+def compact_field_mapping(dimension: int, encoding: str, space_type: str) -> Dict[str, Any]:
+    """2단계 검색 1차 후보용 compact 필드 매핑 (pq 모델은 768차원 전용이므로 compact 필드는 fp16 사용)"""
+    return knn_field_mapping(dimension, "fp16" if encoding == "pq" else encoding, space_type)
+
+
+def delete_model(client: OpenSearch, model_id: str) -> None:
+    try:
+        client.transport.perform_request("DELETE", f"{KNN_MODELS_PATH}/{model_id}")
+    except Exception:
+        # 모델이 없으면 무시
+        pass
+
+
+def train_pq_model(client: OpenSearch, model_id: str, vectors: np.ndarray, space_type: str,
+                   timeout: int = PQ_TRAIN_TIMEOUT) -> str:
+    """
+    샘플 벡터를 임시 학습 인덱스에 올려 PQ 코드북 모델을 학습시키고, 학습이 끝나면 학습 인덱스를 지웁니다.
+    같은 id의 이전 모델은 먼저 삭제합니다 (해당 모델을 쓰는 인덱스는 호출 전에 삭제되어 있어야 함).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.shape[0] < 2 ** PQ_CODE_SIZE:
+        raise ValueError(f"PQ 학습에는 최소 {2 ** PQ_CODE_SIZE}개 벡터가 필요합니다 (현재 {vectors.shape[0]}개).")
+    dimension = vectors.shape[1]
+    training_index = f"{model_id}-training"
+
+    delete_model(client, model_id)
+    if client.indices.exists(index=training_index):
+        client.indices.delete(index=training_index)
+    client.indices.create(index=training_index, body={
+        "settings": {"index": {"knn": True}},
+        "mappings": {"properties": {"train_vector": {"type": "knn_vector", "dimension": dimension}}},
+    })
+    try:
+        helpers.bulk(client, (
+            {"_index": training_index, "_source": {"train_vector": vector.tolist()}} for vector in vectors
+        ), request_timeout=300)
+        client.indices.refresh(index=training_index)
+
+        client.transport.perform_request("POST", f"{KNN_MODELS_PATH}/{model_id}/_train", body={
+            "training_index": training_index,
+            "training_field": "train_vector",
+            "dimension": dimension,
+            "description": f"precedent chunk PQ m={VECTOR_PQ_M} space={space_type}",
+            "method": knn_method("pq", space_type),
+        })
+        deadline = time.monotonic() + timeout
+        while True:
+            state = client.transport.perform_request("GET", f"{KNN_MODELS_PATH}/{model_id}").get("state")
+            if state == "created":
+                break
+            if state == "failed" or time.monotonic() > deadline:
+                raise RuntimeError(f"PQ 모델 학습 실패 (state={state}, model_id={model_id})")
+            time.sleep(2)
+        logging.info(f"PQ 모델 학습 완료: {model_id} ({vectors.shape[0]}개 벡터)")
+    finally:
+        client.indices.delete(index=training_index, ignore=[404])
+    return model_id
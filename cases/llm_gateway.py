@@ -0,0 +1,369 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+import httpx
+from google.genai import errors as genai_errors
+from langchain_core.exceptions import ModelError
+from langchain_core.runnables import Runnable
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from .metrics import EXTERNAL_CALL_RETRIES, LLM_GATEWAY_IN_FLIGHT, LLM_GATEWAY_REJECTIONS, LLM_CIRCUIT_STATE
+from .rate_limit import TokenBucket
+from .telemetry import current_call, llm_telemetry
+
+# 프로세스 전체 LLM 동시 호출 수, 초당 호출 수(0이면 제한 없음)와 순간 허용량
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 8))
+LLM_RATE_LIMIT = float(os.environ.get("LLM_RATE_LIMIT", 5))
+LLM_RATE_BURST = float(os.environ.get("LLM_RATE_BURST", LLM_MAX_CONCURRENCY))
+# 동시 호출 자리/속도 제한 토큰을 기다리는 최대 시간(초). 넘기면 LLMUnavailableError로 바로 실패
+LLM_ACQUIRE_TIMEOUT = float(os.environ.get("LLM_ACQUIRE_TIMEOUT", 30))
+# 일시적 오류(429/5xx/연결 오류) 재시도 횟수와 대기 시간(초, 재시도마다 2배 + 지터)
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 2))
+LLM_RETRY_BACKOFF = float(os.environ.get("LLM_RETRY_BACKOFF", 1.0))
+# 재시도까지 모두 일시적 오류로 실패한 호출이 연속 이 횟수에 이르면 차단기를 열고 LLM_BREAKER_COOLDOWN초 동안 호출 없이 바로 실패
+LLM_BREAKER_THRESHOLD = int(os.environ.get("LLM_BREAKER_THRESHOLD", 5))
+LLM_BREAKER_COOLDOWN = float(os.environ.get("LLM_BREAKER_COOLDOWN", 30))
+
+DEFAULT_LLM_MODEL = "gemini-1.5-flash"
+
+_TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+
+T = TypeVar("T")
+
+
+class LLMUnavailableError(Exception):
+    """차단기가 열려 있거나 동시 호출/속도 제한 대기 시간을 넘겨 LLM을 호출하지 않은 경우"""
+
+
+def is_transient(error: BaseException) -> bool:
+    """재시도하면 성공할 수 있는 오류인지 (요청 오류·인증 오류·컨텍스트 초과 등은 False)"""
+    for candidate in (error, error.__cause__):
+        if isinstance(candidate, ModelError):
+            return bool(candidate.is_retryable)
+        if isinstance(candidate, genai_errors.APIError):
+            return candidate.code in _TRANSIENT_STATUS
+        if isinstance(candidate, (httpx.TransportError, TimeoutError, ConnectionError)):
+            return True
+    return False
+
+
+class CircuitBreaker:
+    """
+    연속 실패 threshold회에 열리고(open), cooldown초 뒤 시험 호출 하나만 허용(half_open)해
+    성공하면 닫고(closed) 실패하면 다시 엽니다. 스레드 안전.
+    """
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = max(threshold, 1)
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+        LLM_CIRCUIT_STATE.set(0)
+
+    def _set(self, state: str) -> None:
+        if state != self.state:
+            logging.warning(f"LLM circuit breaker {self.state} -> {state}")
+        self.state = state
+        LLM_CIRCUIT_STATE.set(self._STATE_VALUES[state])
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    return False
+                self._set(self.HALF_OPEN)
+                self._trial = False
+            if self.state == self.HALF_OPEN:
+                if self._trial:
+                    return False
+                self._trial = True
+            return True
+
+    def is_open(self) -> bool:
+        """열려 있고 아직 대기 시간(cooldown)이 지나지 않았는지 (재시도 직전 확인용, 상태를 바꾸지 않음)"""
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self._opened_at < self.cooldown
+
+    def record(self, success: Optional[bool]) -> None:
+        """논리적 호출(재시도 포함) 한 번의 결과 기록 (None: 결과 없이 중단됨 — 클라이언트 연결 종료 등)"""
+        with self._lock:
+            self._trial = False
+            if success is None:
+                return
+            if success:
+                self._failures = 0
+                self._set(self.CLOSED)
+                return
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+                self._set(self.OPEN)
+
+
+def _backoff(attempt: int) -> float:
+    return LLM_RETRY_BACKOFF * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+
+def _count_retry() -> None:
+    service, operation, model = current_call()
+    EXTERNAL_CALL_RETRIES.labels(service="gemini", operation=operation, model=model).inc()
+
+
+class LLMGateway:
+    """
+    모든 LLM 호출이 거치는 단일 진입점 (cases.service.GeminiService, documents.service).
+    - (모델, temperature, 최대 출력 토큰, top_p)별로 ChatGoogleGenerativeAI 인스턴스를 하나씩 만들어 재사용
+    - 프로세스 전체 동시 호출 수(세마포어)와 초당 호출 수(토큰 버킷) 제한
+    - 일시적 오류는 지터를 넣은 지수 백오프로 재시도 (SDK 내부 재시도는 끄고 여기서만 재시도)
+    - 일시적 오류가 이어지면 차단기를 열어 LLM을 기다리지 않고 바로 실패 (워커가 장애 중인 API에 묶이지 않도록)
+    """
+    _clients: Dict[Tuple[str, float, int, Optional[float]], ChatGoogleGenerativeAI] = {}
+    _lock = threading.Lock()
+    _slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+    _bucket: Optional[TokenBucket] = TokenBucket(LLM_RATE_LIMIT, LLM_RATE_BURST) if LLM_RATE_LIMIT > 0 else None
+    breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN)
+
+    @staticmethod
+    def model_name() -> str:
+        # 환경변수에서 실시간으로 모델명을 읽어와 정제 ('models/gemini-...' -> 'gemini-...')
+        return (os.environ.get("GEMINI_MODEL") or DEFAULT_LLM_MODEL).strip().split("/")[-1]
+
+    @classmethod
+    def client(cls, temperature: float = 0.0, max_output_tokens: int = 4096,
+               top_p: Optional[float] = None, model: Optional[str] = None) -> ChatGoogleGenerativeAI:
+        model = model or cls.model_name()
+        key = (model, float(temperature), int(max_output_tokens), top_p)
+        llm = cls._clients.get(key)
+        if llm is None:
+            with cls._lock:
+                llm = cls._clients.get(key)
+                if llm is None:
+                    api_key = os.environ.get("GEMINI_API_KEY")
+                    if not api_key:
+                        raise ValueError("GEMINI_API_KEY가 설정되지 않았습니다.")
+                    options: Dict[str, Any] = {}
+                    if top_p is not None:
+                        options["top_p"] = top_p
+                    llm = cls._clients[key] = GatewayChatModel(
+                        model=model,
+                        google_api_key=api_key,
+                        temperature=temperature,
+                        max_output_tokens=max_output_tokens,
+                        # 재시도는 게이트웨이가 담당 (SDK 기본 6회 재시도가 겹치면 장애 시 호출이 오래 묶임)
+                        max_retries=1,
+                        **options,
+                    )
+        return llm
+
+    @classmethod
+    def llm(cls, operation: str, temperature: float = 0.0, max_output_tokens: int = 4096,
+            top_p: Optional[float] = None) -> Runnable:
+        """호출마다 소요 시간·토큰·실패를 operation 라벨로 기록하는 LLM (호출 시 넘긴 callbacks와 함께 실행됨)"""
+        model = cls.model_name()
+        return cls.client(temperature, max_output_tokens, top_p, model).with_config(
+            callbacks=[llm_telemetry(operation, model)]
+        )
+
+    # --- 호출 자리 확보 / 반납 ---
+
+    @classmethod
+    def _reject(cls, reason: str, message: str) -> None:
+        LLM_GATEWAY_REJECTIONS.labels(reason=reason).inc()
+        raise LLMUnavailableError(message)
+
+    @classmethod
+    def _admit(cls) -> None:
+        """논리적 호출(재시도 포함)마다 한 번 차단기 확인"""
+        if not cls.breaker.allow():
+            cls._reject("circuit_open", "LLM 서비스 장애로 잠시 호출을 중단했습니다. 잠시 후 다시 시도하세요.")
+
+    @classmethod
+    def _enter(cls) -> None:
+        deadline = time.monotonic() + LLM_ACQUIRE_TIMEOUT
+        if not cls._slots.acquire(timeout=LLM_ACQUIRE_TIMEOUT):
+            cls.breaker.record(None)
+            cls._reject("concurrency", "LLM 동시 호출이 많아 처리할 수 없습니다. 잠시 후 다시 시도하세요.")
+        if cls._bucket is not None and not cls._bucket.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            cls._slots.release()
+            cls.breaker.record(None)
+            cls._reject("rate_limit", "LLM 호출 속도 제한을 넘었습니다. 잠시 후 다시 시도하세요.")
+        LLM_GATEWAY_IN_FLIGHT.inc()
+
+    @classmethod
+    async def _aenter(cls) -> None:
+        # 스레드(WSGI)와 이벤트 루프(ASGI)가 같은 세마포어/버킷을 쓰므로 블로킹 없이 확인하며 대기
+        deadline = time.monotonic() + LLM_ACQUIRE_TIMEOUT
+        while not cls._slots.acquire(blocking=False):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                cls.breaker.record(None)
+                cls._reject("concurrency", "LLM 동시 호출이 많아 처리할 수 없습니다. 잠시 후 다시 시도하세요.")
+            await asyncio.sleep(min(0.05, remaining))
+        while cls._bucket is not None:
+            wait = cls._bucket.try_acquire()
+            if wait == 0.0:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                cls._slots.release()
+                cls.breaker.record(None)
+                cls._reject("rate_limit", "LLM 호출 속도 제한을 넘었습니다. 잠시 후 다시 시도하세요.")
+            await asyncio.sleep(min(wait, remaining))
+        LLM_GATEWAY_IN_FLIGHT.inc()
+
+    @classmethod
+    def _leave(cls) -> None:
+        LLM_GATEWAY_IN_FLIGHT.dec()
+        cls._slots.release()
+
+    @classmethod
+    def _should_retry(cls, error: Exception, attempt: int, started: bool = False) -> bool:
+        """
+        실패한 시도를 재시도할지 반환. 재시도하지 않으면 논리적 호출의 결과로 차단기에 한 번만 기록합니다
+        (일시적 오류가 아니면 API는 정상이므로 성공으로 기록).
+        """
+        transient = is_transient(error)
+        if not transient or started or attempt >= LLM_MAX_RETRIES:
+            cls.breaker.record(not transient)
+            return False
+        _count_retry()
+        logging.warning(f"LLM call failed (attempt {attempt + 1}), retrying: {str(error)}")
+        return True
+
+    # --- 호출 ---
+    # 재시도 대기 중 다른 호출들의 실패로 차단기가 열리면 LLMUnavailableError 대신 마지막 실제 오류를 그대로 올림
+
+    @classmethod
+    def call(cls, func: Callable[[], T]) -> T:
+        cls._admit()
+        attempt = 0
+        while True:
+            cls._enter()
+            try:
+                result = func()
+            except Exception as e:
+                cls._leave()
+                if not cls._should_retry(e, attempt):
+                    raise
+                attempt += 1
+                time.sleep(_backoff(attempt))
+                if cls.breaker.is_open():
+                    raise
+                continue
+            except BaseException:
+                cls._leave()
+                cls.breaker.record(None)
+                raise
+            cls._leave()
+            cls.breaker.record(True)
+            return result
+
+    @classmethod
+    async def acall(cls, func: Callable[[], Awaitable[T]]) -> T:
+        cls._admit()
+        attempt = 0
+        while True:
+            await cls._aenter()
+            try:
+                result = await func()
+            except Exception as e:
+                cls._leave()
+                if not cls._should_retry(e, attempt):
+                    raise
+                attempt += 1
+                await asyncio.sleep(_backoff(attempt))
+                if cls.breaker.is_open():
+                    raise
+                continue
+            except BaseException:
+                # 취소(CancelledError) 등: 결과 없이 자리만 반납
+                cls._leave()
+                cls.breaker.record(None)
+                raise
+            cls._leave()
+            cls.breaker.record(True)
+            return result
+
+    @classmethod
+    def stream(cls, func: Callable[[], Iterator[T]]) -> Iterator[T]:
+        """스트리밍 호출. 스트림이 끝날 때까지 자리를 점유하며, 첫 조각을 받기 전에 실패한 경우에만 재시도"""
+        cls._admit()
+        attempt = 0
+        while True:
+            cls._enter()
+            started = False
+            try:
+                for chunk in func():
+                    started = True
+                    yield chunk
+            except Exception as e:
+                cls._leave()
+                if not cls._should_retry(e, attempt, started):
+                    raise
+                attempt += 1
+                time.sleep(_backoff(attempt))
+                if cls.breaker.is_open():
+                    raise
+                continue
+            except BaseException:
+                # 클라이언트 연결 종료(GeneratorExit) 등
+                cls._leave()
+                cls.breaker.record(None)
+                raise
+            cls._leave()
+            cls.breaker.record(True)
+            return
+
+    @classmethod
+    async def astream(cls, func: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        cls._admit()
+        attempt = 0
+        while True:
+            await cls._aenter()
+            started = False
+            try:
+                async for chunk in func():
+                    started = True
+                    yield chunk
+            except Exception as e:
+                cls._leave()
+                if not cls._should_retry(e, attempt, started):
+                    raise
+                attempt += 1
+                await asyncio.sleep(_backoff(attempt))
+                if cls.breaker.is_open():
+                    raise
+                continue
+            except BaseException:
+                cls._leave()
+                cls.breaker.record(None)
+                raise
+            cls._leave()
+            cls.breaker.record(True)
+            return
+
+
+class GatewayChatModel(ChatGoogleGenerativeAI):
+    """실제 API 요청(_generate/_stream 및 비동기 버전)을 LLMGateway의 제한·재시도·차단기 아래에서 실행하는 모델"""
+
+    def _generate(self, *args: Any, **kwargs: Any):
+        return LLMGateway.call(lambda: super(GatewayChatModel, self)._generate(*args, **kwargs))
+
+    async def _agenerate(self, *args: Any, **kwargs: Any):
+        return await LLMGateway.acall(lambda: super(GatewayChatModel, self)._agenerate(*args, **kwargs))
+
+    def _stream(self, *args: Any, **kwargs: Any):
+        return LLMGateway.stream(lambda: super(GatewayChatModel, self)._stream(*args, **kwargs))
+
+    def _astream(self, *args: Any, **kwargs: Any):
+        return LLMGateway.astream(lambda: super(GatewayChatModel, self)._astream(*args, **kwargs))
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+import tempfile
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from opensearchpy import helpers
+
+from cases.knn_index import knn_field_mapping, compact_field_mapping, train_pq_model, delete_model
+from cases.quantization import ENCODINGS, SPACE_TYPES, VECTOR_PQ_TRAIN_SIZE
+from cases.service import OpenSearchService, COMPACT_EMBEDDING_DIMENSION, compact_embedding
+from cases.vector_store import NumpyVectorStore, VECTOR_INDEX_PATH, VECTOR_SPACE_TYPE
+
+BENCH_INDEX_PREFIX = "precedents_bench"
+WARMUP_QUERIES = 5
+
+
+class Command(BaseCommand):
+    help = (
+        "청크 벡터 인코딩(fp32/fp16/int8/pq)별 recall@k, 검색 지연(p50/p95), 인덱스 크기를 측정합니다. "
+        "로컬 벡터 인덱스(data/vector_index)의 벡터를 원본으로 사용하며, 정답은 fp32 전수 검색 결과입니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=["local", "opensearch"], default="local",
+                            help="local: 프로세스 내 numpy 엔진 | opensearch: 임시 벤치마크 인덱스")
+        parser.add_argument("--encodings", default=",".join(ENCODINGS))
+        parser.add_argument("--space-type", choices=SPACE_TYPES, default=VECTOR_SPACE_TYPE)
+        parser.add_argument("--k", type=int, default=10)
+        parser.add_argument("--queries", type=int, default=200,
+                            help="원본 청크에서 뽑아 색인에서 제외하는 쿼리 수 (--queries-file이 없을 때)")
+        parser.add_argument("--queries-file", help="쿼리 문장 JSON 배열 파일 (임베딩 캐시를 거쳐 임베딩)")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--source", default=str(VECTOR_INDEX_PATH), help="원본 로컬 벡터 인덱스 경로")
+        parser.add_argument("--output", help="결과를 JSON으로 저장할 경로")
+        parser.add_argument("--keep", action="store_true", help="opensearch 벤치마크 인덱스를 삭제하지 않음")
+        parser.add_argument("--two-stage", action="store_true",
+                            help=f"인코딩마다 2단계 검색({COMPACT_EMBEDDING_DIMENSION}차원 1차 후보 + 전체 차원 재채점)도 측정")
+
+    def handle(self, *args, **options):
+        encodings = [e.strip() for e in options["encodings"].split(",") if e.strip()]
+        unknown = set(encodings) - set(ENCODINGS)
+        if unknown:
+            raise CommandError(f"알 수 없는 인코딩: {', '.join(sorted(unknown))}")
+        k, space_type = options["k"], options["space_type"]
+        if options["two_stage"] and not COMPACT_EMBEDDING_DIMENSION:
+            raise CommandError("--two-stage에는 COMPACT_EMBEDDING_DIMENSION 설정이 필요합니다.")
+        variants = [False, True] if options["two_stage"] else [False]
+
+        try:
+            source = NumpyVectorStore(Path(options["source"]))
+        except FileNotFoundError:
+            raise CommandError(f"로컬 벡터 인덱스가 없습니다: {options['source']} (index_merged_precedents.py 실행 필요)")
+        if source.encoding not in ("fp32", "fp16"):
+            self.stdout.write(self.style.WARNING(
+                f"원본 인덱스가 {source.encoding} 인코딩이라 복원 벡터를 원본으로 사용합니다."
+            ))
+        chunks, queries = self.query_set(list(source.iter_chunks()), options)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"벤치마크: target={options['target']}, space={space_type}, k={k}, "
+            f"청크 {len(chunks)}개, 쿼리 {len(queries)}개"
+        ))
+
+        with tempfile.TemporaryDirectory() as workdir:
+            truth_store = self.build_local(chunks, Path(workdir) / "truth", "fp32", space_type)
+            truth = [[r["case_No"] for r in truth_store.search(q, k=k, two_stage=False)] for q in queries]
+
+            reports = []
+            for encoding in encodings:
+                self.stdout.write(f"  [{encoding}] 색인 및 측정 중...")
+                if options["target"] == "local":
+                    store = self.build_local(chunks, Path(workdir) / encoding, encoding, space_type)
+                    size = store.size_bytes()
+                    for two_stage in variants:
+                        report = self.measure(
+                            lambda q: store.search(q, k=k, two_stage=two_stage), queries, truth, k
+                        )
+                        reports.append(self.row(encoding, two_stage, size, report))
+                else:
+                    results, size = self.measure_opensearch(
+                        chunks, queries, truth, encoding, space_type, variants, options
+                    )
+                    for two_stage, report in results:
+                        reports.append(self.row(encoding, two_stage, size, report))
+
+        self.print_report(reports, k, len(chunks))
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump({
+                    "target": options["target"], "space_type": space_type, "k": k, "seed": options["seed"],
+                    "chunks": len(chunks), "queries": len(queries), "results": reports,
+                }, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"결과 저장: {options['output']}"))
+
+    def query_set(self, chunks: List[Dict[str, Any]], options):
+        """고정 시드로 쿼리를 고릅니다. 원본 청크를 쿼리로 쓰면 해당 청크는 색인에서 제외합니다."""
+        if options["queries_file"]:
+            from cases.embedding_cache import EmbeddingCacheService
+            with open(options["queries_file"], "r", encoding="utf-8") as f:
+                texts = json.load(f)
+            queries = [np.asarray(EmbeddingCacheService.get_embedding(t), dtype=np.float32) for t in texts]
+            return chunks, queries
+        rng = np.random.default_rng(options["seed"])
+        n_queries = min(options["queries"], len(chunks) // 2)
+        held_out = set(rng.choice(len(chunks), n_queries, replace=False).tolist())
+        queries = [np.asarray(chunks[i]["content_embedding"], dtype=np.float32) for i in sorted(held_out)]
+        return [c for i, c in enumerate(chunks) if i not in held_out], queries
+
+    @staticmethod
+    def row(encoding: str, two_stage: bool, size: int, report: Dict[str, Any]) -> Dict[str, Any]:
+        name = f"{encoding}+2stage" if two_stage else encoding
+        return {"encoding": name, "two_stage": two_stage, "size_bytes": size, **report}
+
+    @staticmethod
+    def build_local(chunks, path: Path, encoding: str, space_type: str) -> NumpyVectorStore:
+        NumpyVectorStore.build(chunks, path=path, encoding=encoding, space_type=space_type)
+        return NumpyVectorStore(path)
+
+    @staticmethod
+    def measure(search, queries, truth, k: int) -> Dict[str, Any]:
+        for q in queries[:WARMUP_QUERIES]:
+            search(q)
+        latencies, recalls = [], []
+        for q, expected in zip(queries, truth):
+            started = time.perf_counter()
+            found = search(q)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if expected:
+                got = {r["case_No"] for r in found}
+                recalls.append(len(got & set(expected)) / len(expected))
+        return {
+            f"recall@{k}": round(float(np.mean(recalls)), 4) if recalls else None,
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        }
+
+    def measure_opensearch(self, chunks, queries, truth, encoding: str, space_type: str, variants, options):
+        client = OpenSearchService.get_client()
+        index = f"{BENCH_INDEX_PREFIX}_{encoding}"
+        model_id = None
+        if client.indices.exists(index=index):
+            client.indices.delete(index=index)
+        if encoding == "pq":
+            rng = np.random.default_rng(options["seed"])
+            sample = rng.choice(len(chunks), min(len(chunks), VECTOR_PQ_TRAIN_SIZE), replace=False)
+            vectors = np.asarray([chunks[i]["content_embedding"] for i in sample], dtype=np.float32)
+            model_id = train_pq_model(client, f"{index}-model", vectors, space_type)
+
+        dimension = len(chunks[0]["content_embedding"])
+        with_compact = True in variants
+        properties = {
+            "content_embedding": knn_field_mapping(dimension, encoding, space_type, model_id=model_id),
+            "id": {"type": "keyword"},
+            "category": {"type": "keyword"},
+            "court": {"type": "keyword"},
+            "date": {"type": "date", "format": "yyyy-MM-dd"},
+        }
+        if with_compact:
+            properties["compact_embedding"] = compact_field_mapping(COMPACT_EMBEDDING_DIMENSION, encoding, space_type)
+        client.indices.create(index=index, body={
+            "settings": {"index": {"knn": True, "refresh_interval": "-1"}},
+            "mappings": {"properties": properties},
+        })
+        try:
+            helpers.bulk(client, (
+                {"_index": index, "_source": self.bench_source(chunk, with_compact)} for chunk in chunks
+            ), chunk_size=500, request_timeout=300)
+            client.indices.refresh(index=index)
+            # 세그먼트 수에 따른 지연 편차를 없애기 위해 단일 세그먼트로 병합
+            client.indices.forcemerge(index=index, max_num_segments=1, request_timeout=1800)
+
+            k = options["k"]
+            results = []
+            for two_stage in variants:
+                def search(q):
+                    body = OpenSearchService.build_knn_body(
+                        q.tolist(), k, two_stage=two_stage, space_type=space_type
+                    )
+                    return OpenSearchService.parse_collapsed_hits(client.search(index=index, body=body), k)
+                results.append((two_stage, self.measure(search, queries, truth, k)))
+            stats = client.indices.stats(index=index, metric="store")
+            size = stats["indices"][index]["primaries"]["store"]["size_in_bytes"]
+        finally:
+            if not options["keep"]:
+                client.indices.delete(index=index, ignore=[404])
+                if model_id:
+                    delete_model(client, model_id)
+        return results, size
+
+    @staticmethod
+    def bench_source(chunk: Dict[str, Any], with_compact: bool) -> Dict[str, Any]:
+        vector = np.asarray(chunk["content_embedding"], dtype=np.float32)
+        source = {key: chunk.get(key) for key in ("id", "caseNm", "title", "category", "court", "date")}
+        source["content_embedding"] = vector.tolist()
+        if with_compact:
+            source["compact_embedding"] = compact_embedding(vector)
+        return source
+
+    def print_report(self, reports, k: int, n_chunks: int):
+        self.stdout.write("")
+        self.stdout.write(f"{'encoding':<14}{f'recall@{k}':>12}{'p50(ms)':>10}{'p95(ms)':>10}{'size(MB)':>11}{'B/vector':>10}")
+        for r in reports:
+            recall = r[f"recall@{k}"]
+            self.stdout.write(
+                f"{r['encoding']:<14}{(f'{recall:.4f}' if recall is not None else '-'):>12}"
+                f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+                f"{r['size_bytes'] / 1024 / 1024:>11.2f}{r['size_bytes'] / max(n_chunks, 1):>10.1f}"
+            )
+        self.stdout.write(self.style.SUCCESS("벤치마크 완료!"))
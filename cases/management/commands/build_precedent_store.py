@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import time
+import random
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from opensearchpy import helpers
+
+from cases.precedent_store import (
+    LocalPrecedentFile, PrecedentStore, PRECEDENT_STORE_PATH, PRECEDENT_STORE_ZSTD_LEVEL,
+    MERGED_DATA_DIR, iter_merged_precedents,
+)
+from cases.service import OpenSearchService
+
+
+class Command(BaseCommand):
+    help = (
+        "판례 원문 로컬 저장소(zstd 압축 SQLite)를 만들고 크기와 조회 지연을 보고합니다. "
+        "index_merged_precedents.py 실행 시에도 자동으로 다시 만들어집니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", choices=["merged", "opensearch"], default="merged",
+                            help="merged: data/merged 파일 | opensearch: precedents 인덱스 전체 scan")
+        parser.add_argument("--output", default=str(PRECEDENT_STORE_PATH))
+        parser.add_argument("--level", type=int, default=PRECEDENT_STORE_ZSTD_LEVEL, help="zstd 압축 레벨")
+        parser.add_argument("--skip-build", action="store_true", help="기존 파일의 크기/지연만 측정")
+        parser.add_argument("--lookups", type=int, default=500, help="지연 측정용 무작위 조회 수 (0이면 생략)")
+        parser.add_argument("--compare-opensearch", action="store_true",
+                            help="같은 사건번호를 OpenSearch에서도 조회해 지연 비교")
+
+    def handle(self, *args, **options):
+        path = Path(options["output"])
+        if not options["skip_build"]:
+            started = time.perf_counter()
+            count = LocalPrecedentFile.build(self.iter_documents(options["source"]), path, options["level"])
+            self.stdout.write(self.style.SUCCESS(
+                f"로컬 판례 저장소 생성: {count}건, {time.perf_counter() - started:.1f}초 → {path}"
+            ))
+        if not path.exists():
+            raise CommandError(f"로컬 판례 저장소가 없습니다: {path}")
+
+        local_file = LocalPrecedentFile(path)
+        stats = local_file.stats()
+        ratio = stats["raw_bytes"] / stats["compressed_bytes"] if stats["compressed_bytes"] else 0.0
+        self.stdout.write(
+            f"문서 {stats['documents']:,}건 | 원문 JSON {stats['raw_bytes'] / 1e6:.1f}MB → "
+            f"zstd {stats['compressed_bytes'] / 1e6:.1f}MB (압축률 {ratio:.1f}x), "
+            f"파일 {stats['file_bytes'] / 1e6:.1f}MB, "
+            f"문서당 평균 {stats['raw_bytes'] / max(stats['documents'], 1) / 1e3:.1f}KB"
+        )
+        if options["lookups"] > 0 and stats["documents"]:
+            self.benchmark(local_file, path, options)
+
+    @staticmethod
+    def iter_documents(source: str) -> Iterator[Dict[str, Any]]:
+        if source == "opensearch":
+            for hit in helpers.scan(OpenSearchService.get_client(), index="precedents", size=200):
+                yield hit["_source"]
+            return
+        yield from iter_merged_precedents(MERGED_DATA_DIR)
+
+    def benchmark(self, local_file: LocalPrecedentFile, path: Path, options) -> None:
+        sample = random.Random(0).choices(local_file.case_numbers(), k=options["lookups"])
+        rows: List[List[Any]] = []
+
+        rows.append(["local (zstd 해제 포함)", self.measure(local_file.get, sample)])
+        if path.resolve() == PRECEDENT_STORE_PATH.resolve():
+            # 실제 조회 경로: 첫 조회는 로컬 파일, 같은 사건번호 재조회는 메모리 LRU
+            PrecedentStore.reset()
+            rows.append(["PrecedentStore (LRU 포함)", self.measure(PrecedentStore.get, sample)])
+            distinct = len(set(sample))
+            self.stdout.write(
+                f"LRU 적중률(이번 측정): {(len(sample) - distinct) / len(sample):.1%} "
+                f"(서로 다른 판례 {distinct}건 / 조회 {len(sample)}회)"
+            )
+        if options["compare_opensearch"]:
+            rows.append(["opensearch client.get", self.measure(OpenSearchService.get_precedent_by_case_number, sample)])
+
+        self.stdout.write("")
+        self.stdout.write(f"{'경로':<28}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+        for name, latencies in rows:
+            self.stdout.write(
+                f"{name:<28}{np.percentile(latencies, 50):>10.3f}"
+                f"{np.percentile(latencies, 95):>10.3f}{np.percentile(latencies, 99):>10.3f}"
+            )
+
+    @staticmethod
+    def measure(fetch, case_nos: List[str]) -> List[float]:
+        latencies = []
+        for case_no in case_nos:
+            started = time.perf_counter()
+            if fetch(case_no) is None:
+                raise CommandError(f"판례 {case_no} 조회 실패")
+            latencies.append((time.perf_counter() - started) * 1000)
+        return latencies
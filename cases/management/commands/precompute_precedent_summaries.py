@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Dict, Any, Iterator, Tuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from opensearchpy import helpers
+
+from cases.rate_limit import TokenBucket
+from cases.service import OpenSearchService, SUMMARY_PROMPT_VERSION
+from cases.summary_store import PrecedentSummaryStore
+from cases.threads import with_db_cleanup
+
+MERGED_DATA_DIR = Path(settings.BASE_DIR) / "data" / "merged"
+DEFAULT_CHECKPOINT = Path(settings.BASE_DIR) / "data" / "summary_precompute_checkpoint.json"
+PROGRESS_INTERVAL = 30
+
+
+class Progress:
+    """작업 스레드들이 공유하는 진행 상황 (체크포인트 파일로 저장)"""
+
+    def __init__(self, path: Path, resume: bool):
+        self.path = path
+        self.lock = threading.Lock()
+        self.completed = set()
+        self.failed: Dict[str, str] = {}
+        if resume and path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("prompt_version") == SUMMARY_PROMPT_VERSION:
+                self.completed = set(data.get("completed", []))
+                self.failed = data.get("failed", {})
+        self.generated = 0
+        self.skipped = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._unsaved = 0
+
+    def record(self, case_no: str, generated: bool, usage: Dict[str, int], checkpoint_every: int) -> None:
+        with self.lock:
+            self.completed.add(case_no)
+            self.failed.pop(case_no, None)
+            if generated:
+                self.generated += 1
+                self.input_tokens += usage.get("input_tokens", 0)
+                self.output_tokens += usage.get("output_tokens", 0)
+            else:
+                self.skipped += 1
+            self._unsaved += 1
+            if self._unsaved >= checkpoint_every:
+                self._save()
+
+    def fail(self, case_no: str, error: Exception) -> None:
+        with self.lock:
+            self.failed[case_no] = f"{type(error).__name__}: {error}"
+
+    def save(self) -> None:
+        with self.lock:
+            self._save()
+
+    def _save(self) -> None:
+        # 중간에 끊겨도 파일이 깨지지 않도록 임시 파일에 쓴 뒤 교체
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "prompt_version": SUMMARY_PROMPT_VERSION,
+                "completed": sorted(self.completed),
+                "failed": self.failed,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._unsaved = 0
+
+
+class Command(BaseCommand):
+    help = (
+        "precedents 인덱스 또는 data/merged의 모든 판례 요약을 미리 생성해 요약 저장소에 기록합니다. "
+        "체크포인트 파일로 중단된 지점부터 이어서 실행합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", choices=["merged", "opensearch"], default="merged")
+        parser.add_argument("--workers", type=int, default=4, help="동시 LLM 호출 수")
+        parser.add_argument("--rpm", type=float, default=60, help="분당 최대 LLM 호출 수")
+        parser.add_argument("--retries", type=int, default=2, help="판례별 재시도 횟수")
+        parser.add_argument("--limit", type=int, help="처리할 최대 판례 수")
+        parser.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT))
+        parser.add_argument("--checkpoint-every", type=int, default=20)
+        parser.add_argument("--restart", action="store_true", help="체크포인트를 무시하고 처음부터 실행")
+        parser.add_argument("--force", action="store_true", help="저장된 요약이 있어도 다시 생성")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["rpm"] <= 0:
+            raise CommandError("--workers는 1 이상, --rpm은 0보다 커야 합니다.")
+        progress = Progress(Path(options["checkpoint"]), resume=not options["restart"])
+        # 분당 rpm회, 순간 최대 workers회까지 허용
+        bucket = TokenBucket(rate=options["rpm"] / 60.0, capacity=options["workers"])
+        process = with_db_cleanup(self.process)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"판례 요약 사전 생성: source={options['source']}, workers={options['workers']}, "
+            f"rpm={options['rpm']}, prompt={SUMMARY_PROMPT_VERSION}, 완료 {len(progress.completed)}건부터 재개"
+        ))
+        started = time.monotonic()
+        last_report = started
+        submitted = 0
+        executor = ThreadPoolExecutor(max_workers=options["workers"], thread_name_prefix="summary-precompute")
+        pending = set()
+        try:
+            for case_no, content in self.iter_precedents(options["source"]):
+                if case_no in progress.completed:
+                    continue
+                if options["limit"] and submitted >= options["limit"]:
+                    break
+                # 대기열을 workers의 2배로 제한해 원문을 한꺼번에 메모리에 올리지 않음
+                while len(pending) >= options["workers"] * 2:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                pending.add(executor.submit(process, case_no, content, bucket, progress, options))
+                submitted += 1
+                if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                    self.report(progress, started, final=False)
+                    last_report = time.monotonic()
+            wait(pending)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("중단 요청: 진행 중인 작업을 기다린 뒤 체크포인트를 저장합니다."))
+            for future in pending:
+                future.cancel()
+        finally:
+            executor.shutdown(wait=True)
+            progress.save()
+        self.report(progress, started, final=True)
+
+    def process(self, case_no: str, content: str, bucket: TokenBucket, progress: Progress, options) -> None:
+        try:
+            if not content:
+                raise ValueError("판례 원문이 비어 있습니다.")
+            if options["force"]:
+                PrecedentSummaryStore.purge(case_no=case_no, all_versions=True)
+            elif PrecedentSummaryStore.is_stored(case_no, content):
+                progress.record(case_no, False, {}, options["checkpoint_every"])
+                return
+
+            for attempt in range(options["retries"] + 1):
+                bucket.acquire()
+                usage_handler = UsageMetadataCallbackHandler()
+                try:
+                    PrecedentSummaryStore.get_summary(case_no, content, config={"callbacks": [usage_handler]})
+                    break
+                except Exception as e:
+                    if attempt == options["retries"]:
+                        raise
+                    delay = (2 ** attempt) + random.uniform(0, 1)
+                    logging.warning(f"{case_no} 요약 실패 ({attempt + 1}회차), {delay:.1f}초 후 재시도: {e}")
+                    time.sleep(delay)
+
+            usage = {"input_tokens": 0, "output_tokens": 0}
+            for model_usage in usage_handler.usage_metadata.values():
+                usage["input_tokens"] += model_usage.get("input_tokens", 0)
+                usage["output_tokens"] += model_usage.get("output_tokens", 0)
+            # 다른 요청이 먼저 생성해 LLM을 호출하지 않은 경우 사용량이 비어 있음
+            progress.record(case_no, bool(usage_handler.usage_metadata), usage, options["checkpoint_every"])
+        except Exception as e:
+            logging.error(f"{case_no} 요약 생성 실패: {e}")
+            progress.fail(case_no, e)
+
+    @staticmethod
+    def iter_precedents(source: str) -> Iterator[Tuple[str, str]]:
+        """(사건번호, 판례 원문). 색인 스크립트와 같은 필드를 사용합니다."""
+        if source == "opensearch":
+            for hit in helpers.scan(
+                OpenSearchService.get_client(), index="precedents",
+                query={"_source": ["case_no", "content"]}, size=200,
+            ):
+                source_doc = hit["_source"]
+                yield str(source_doc.get("case_no") or hit["_id"]), source_doc.get("content") or ""
+            return
+        for file_path in sorted(MERGED_DATA_DIR.glob("*.json")):
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.error(f"파일 {file_path.name} 읽기 실패: {e}")
+                continue
+            if data.get("caseNo"):
+                yield str(data["caseNo"]), data.get("판례내용", "")
+
+    def report(self, progress: Progress, started: float, final: bool) -> None:
+        minutes = max((time.monotonic() - started) / 60.0, 1e-9)
+        with progress.lock:
+            generated, skipped, failed = progress.generated, progress.skipped, dict(progress.failed)
+            tokens = progress.input_tokens + progress.output_tokens
+            input_tokens, output_tokens = progress.input_tokens, progress.output_tokens
+        line = (
+            f"생성 {generated}건, 이미 저장됨 {skipped}건, 실패 {len(failed)}건 | "
+            f"{generated / minutes:.1f} docs/min, {tokens / minutes:,.0f} tokens/min "
+            f"(입력 {input_tokens:,} / 출력 {output_tokens:,} 토큰), 경과 {minutes:.1f}분"
+        )
+        if not final:
+            self.stdout.write(f"  진행: {line}")
+            return
+        self.stdout.write(self.style.SUCCESS(f"완료: {line}"))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"실패 {len(failed)}건 (다시 실행하면 재시도):"))
+            for case_no, error in sorted(failed.items()):
+                self.stdout.write(f"  - {case_no}: {error}")
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from cases.embedding_cache import EmbeddingCacheService, EMBEDDING_CACHE_DB_TTL_DAYS
+
+
+class Command(BaseCommand):
+    help = (
+        "EMBEDDING_CACHE_DB_TTL_DAYS가 지난 쿼리 임베딩 캐시(EmbeddingCache) 행을 삭제합니다. "
+        "검색 중에도 일부씩 정리되지만, 테이블이 커졌다면 cron 등으로 주기적으로 실행하세요."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="한 번의 DELETE로 삭제할 최대 행 수")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            deleted = EmbeddingCacheService.purge_expired(options["batch_size"])
+            total += deleted
+            if deleted < options["batch_size"]:
+                break
+        self.stdout.write(self.style.SUCCESS(
+            f"만료된 임베딩 캐시 {total}건 삭제 ({EMBEDDING_CACHE_DB_TTL_DAYS}일 이전)"
+        ))
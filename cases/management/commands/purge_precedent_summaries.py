@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from cases.service import SUMMARY_PROMPT_VERSION
+from cases.summary_store import PrecedentSummaryStore
+
+
+class Command(BaseCommand):
+    help = (
+        "저장된 판례 요약을 삭제합니다. 기본값은 현재 프롬프트 버전이 아닌 요약만 삭제하며, "
+        "SUMMARY_PROMPT_VERSION을 올려 배포한 뒤 실행합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--case-no", help="해당 사건번호의 요약만 삭제")
+        parser.add_argument("--all", action="store_true", help="현재 프롬프트 버전 요약까지 모두 삭제")
+
+    def handle(self, *args, **options):
+        deleted = PrecedentSummaryStore.purge(case_no=options["case_no"], all_versions=options["all"])
+        scope = "전체" if options["all"] else f"{SUMMARY_PROMPT_VERSION} 이외 버전"
+        self.stdout.write(self.style.SUCCESS(f"판례 요약 {deleted}건 삭제 ({scope})"))
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+from prometheus_client import start_http_server
+
+from cases.jobs import JobQueue
+
+# 워커 프로세스 하나가 동시에 실행할 작업 수 (LLM 호출 대기가 대부분이므로 스레드로 처리)
+JOB_WORKER_CONCURRENCY = int(os.environ.get("JOB_WORKER_CONCURRENCY", 4))
+JOB_WORKER_POLL_INTERVAL = float(os.environ.get("JOB_WORKER_POLL_INTERVAL", 1.0))
+
+
+class Command(BaseCommand):
+    help = (
+        "백그라운드 작업 큐(BackgroundJob)를 처리하는 워커를 실행합니다. "
+        "여러 프로세스/서버에서 동시에 실행해도 SKIP LOCKED 점유로 같은 작업을 중복 실행하지 않습니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY, help="동시에 실행할 작업 수")
+        parser.add_argument("--poll-interval", type=float, default=JOB_WORKER_POLL_INTERVAL,
+                            help="큐가 비었을 때 다시 확인하기까지의 대기 시간(초)")
+        parser.add_argument("--kinds", default="", help="처리할 작업 종류 (쉼표 구분, 기본: 전체)")
+        parser.add_argument("--drain", action="store_true", help="큐에 남은 작업을 모두 처리하면 종료")
+        parser.add_argument("--metrics-port", type=int, default=int(os.environ.get("JOB_WORKER_METRICS_PORT", 0)),
+                            help="Prometheus 메트릭 포트 (0이면 사용 안 함)")
+
+    def handle(self, *args, **options):
+        # 문서 생성 등 다른 앱의 작업 종류는 AppConfig.ready()에서 등록됨
+        kinds = [kind.strip() for kind in options["kinds"].split(",") if kind.strip()] or None
+        concurrency = max(options["concurrency"], 1)
+        if options["metrics_port"]:
+            start_http_server(options["metrics_port"])
+
+        stop = threading.Event()
+
+        def shutdown(signum, frame):
+            self.stdout.write("종료 신호 수신: 실행 중인 작업을 마친 뒤 종료합니다.")
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        hostname = f"{socket.gethostname()}:{os.getpid()}"
+        threads = [
+            threading.Thread(
+                target=JobQueue.work,
+                args=(f"{hostname}:{i}", stop, kinds, options["poll_interval"], options["drain"]),
+                name=f"job-worker-{i}",
+            )
+            for i in range(concurrency)
+        ]
+        self.stdout.write(self.style.SUCCESS(
+            f"작업 워커 시작: {hostname}, 동시 실행 {concurrency}, 작업 종류 {', '.join(kinds) if kinds else '전체'}"
+        ))
+        for thread in threads:
+            thread.start()
+        # 메인 스레드는 신호를 받을 수 있도록 짧게 나눠 대기
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=1.0)
+        self.stdout.write(self.style.SUCCESS("작업 워커 종료"))
@@ -0,0 +1,135 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# django_prometheus의 /metrics 엔드포인트는 prometheus_client 기본 레지스트리를 그대로 노출하므로
+# 여기서 정의한 지표는 별도 설정 없이 수집됩니다.
+
+EMBEDDING_CACHE_HITS = Counter(
+    "embedding_cache_hits_total",
+    "쿼리 임베딩 캐시 적중 수",
+    ["tier"],
+)
+EMBEDDING_CACHE_MISSES = Counter(
+    "embedding_cache_misses_total",
+    "쿼리 임베딩 캐시 미스 수 (임베딩 API 호출 발생)",
+)
+EMBEDDING_CACHE_EVICTIONS = Counter(
+    "embedding_cache_evictions_total",
+    "쿼리 임베딩 메모리 캐시 퇴출 수",
+    ["reason"],
+)
+
+SEARCH_LATENCY = Histogram(
+    "precedent_search_latency_seconds",
+    "유사 판례 검색 단계별 소요 시간",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+SEARCH_FALLBACKS = Counter(
+    "precedent_search_fallbacks_total",
+    "임베딩 실패/지연으로 BM25 단독 검색으로 전환된 횟수",
+    ["reason"],
+)
+SEARCH_RESULT_CACHE_HITS = Counter(
+    "search_result_cache_hits_total",
+    "유사 판례 검색 결과 캐시 적중 수",
+)
+SEARCH_RESULT_CACHE_MISSES = Counter(
+    "search_result_cache_misses_total",
+    "유사 판례 검색 결과 캐시 미스 수",
+)
+
+PRECEDENT_SUMMARY_REQUESTS = Counter(
+    "precedent_summary_requests_total",
+    "판례 요약 저장소 조회 결과 (hit: 저장된 요약, generated: LLM 호출, waited: 다른 요청의 생성 결과 대기, bypass: 저장소 장애 시 직접 생성)",
+    ["result"],
+)
+CASE_ANALYSIS_REQUESTS = Counter(
+    "case_analysis_requests_total",
+    "심층 분석 저장소 조회 결과 (hit: 저장된 결과, generated: LLM 호출, waited: 다른 요청의 생성 결과 대기, refresh: 요청에 의한 재생성, bypass: 저장소 장애 시 직접 생성)",
+    ["result"],
+)
+
+PRECEDENT_STORE_LOOKUPS = Counter(
+    "precedent_store_lookups_total",
+    "판례 원문 조회 위치 (memory: LRU, local: 로컬 압축 파일, opensearch: 원격 폴백, miss: 없음)",
+    ["source"],
+)
+PRECEDENT_STORE_LATENCY = Histogram(
+    "precedent_store_lookup_seconds",
+    "판례 원문 조회 소요 시간 (조회 위치별, batch: 여러 판례 일괄 조회)",
+    ["source"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+PRECEDENT_STORE_BYTES = Gauge(
+    "precedent_store_bytes",
+    "로컬 판례 저장소 크기 (raw: 압축 전 JSON, compressed: zstd 압축 후)",
+    ["kind"],
+)
+ANALYSIS_CONTEXT_TOKENS = Histogram(
+    "case_analysis_context_tokens",
+    "심층 분석 프롬프트에 넣은 판례 원문 추정 토큰 수 (original: 원문 전체, selected: 관련 구간 선택 후)",
+    ["kind"],
+    buckets=(250, 500, 1000, 2000, 3000, 4000, 6000, 8000, 12000, 16000, 32000),
+)
+
+BACKGROUND_JOBS = Counter(
+    "background_jobs_total",
+    "백그라운드 작업 처리 결과 (succeeded: 성공, retried: 실패 후 재시도 예약, failed: 최종 실패)",
+    ["kind", "result"],
+)
+BACKGROUND_JOB_DURATION = Histogram(
+    "background_job_duration_seconds",
+    "백그라운드 작업 1회 실행 소요 시간",
+    ["kind"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+)
+BACKGROUND_JOB_QUEUE_WAIT = Histogram(
+    "background_job_queue_wait_seconds",
+    "백그라운드 작업이 큐에 들어온 뒤 첫 실행까지 기다린 시간",
+    ["kind"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+
+# 외부 호출(Gemini LLM/임베딩, OpenSearch) 단위 지표. model 라벨은 LLM·임베딩은 모델명, OpenSearch는 인덱스명
+EXTERNAL_CALL_LATENCY = Histogram(
+    "external_call_duration_seconds",
+    "외부 호출 1회 소요 시간 (재시도 포함)",
+    ["service", "operation", "model"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+EXTERNAL_CALL_ERRORS = Counter(
+    "external_call_errors_total",
+    "외부 호출 실패 수 (error: 예외 클래스명)",
+    ["service", "operation", "model", "error"],
+)
+EXTERNAL_CALL_RETRIES = Counter(
+    "external_call_retries_total",
+    "클라이언트 내부 재시도 수 (google-genai HTTP 재시도, OpenSearch 연결 실패/타임아웃 재시도)",
+    ["service", "operation", "model"],
+)
+EXTERNAL_CALL_BYTES = Histogram(
+    "external_call_payload_bytes",
+    "외부 호출 요청/응답 본문 크기 (direction: sent | received)",
+    ["service", "operation", "direction"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+LLM_TOKENS = Histogram(
+    "llm_tokens",
+    "LLM 호출 1회의 토큰 수 (direction: input | output, 응답 usage_metadata 기준)",
+    ["operation", "model", "direction"],
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768),
+)
+
+LLM_GATEWAY_IN_FLIGHT = Gauge(
+    "llm_gateway_in_flight",
+    "LLM 게이트웨이를 통해 실행 중인 호출 수 (스트리밍은 스트림이 끝날 때까지)",
+)
+LLM_GATEWAY_REJECTIONS = Counter(
+    "llm_gateway_rejections_total",
+    "LLM 게이트웨이가 호출하지 않고 거부한 수 (circuit_open: 차단기 열림, concurrency: 동시 호출 한도, rate_limit: 호출 속도 제한)",
+    ["reason"],
+)
+LLM_CIRCUIT_STATE = Gauge(
+    "llm_circuit_state",
+    "LLM 호출 차단기 상태 (0: closed, 1: half_open, 2: open)",
+)
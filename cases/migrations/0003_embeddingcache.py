@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0002_delete_template'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmbeddingCache',
+            fields=[
+                ('cache_key', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='캐시 키(sha256)')),
+                ('model_name', models.CharField(max_length=100, verbose_name='임베딩 모델')),
+                ('task_type', models.CharField(max_length=30, verbose_name='임베딩 태스크 타입')),
+                ('dimension', models.IntegerField(verbose_name='벡터 차원')),
+                ('vector', models.BinaryField(verbose_name='float32 벡터')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
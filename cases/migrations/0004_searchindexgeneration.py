@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0003_embeddingcache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexGeneration',
+            fields=[
+                ('index_name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='인덱스 이름')),
+                ('generation', models.PositiveIntegerField(default=0, verbose_name='세대 번호')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
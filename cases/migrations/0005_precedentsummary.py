@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0004_searchindexgeneration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrecedentSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('case_no', models.CharField(db_index=True, max_length=100, verbose_name='사건번호')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='판례 원문 해시(sha256)')),
+                ('prompt_version', models.CharField(max_length=20, verbose_name='요약 프롬프트 버전')),
+                ('model_name', models.CharField(blank=True, default='', max_length=100, verbose_name='LLM 모델')),
+                ('summary', models.JSONField(blank=True, null=True, verbose_name='요약 결과')),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('ready', 'ready')], default='pending', max_length=10)),
+                ('lease_until', models.DateTimeField(blank=True, null=True, verbose_name='생성 점유 만료 시각')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('case_no', 'content_hash', 'prompt_version'), name='uniq_precedent_summary')],
+            },
+        ),
+    ]
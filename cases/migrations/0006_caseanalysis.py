@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0005_precedentsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('precedent_no', models.CharField(max_length=100, verbose_name='판례 사건번호')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='판례 원문 해시(sha256)')),
+                ('prompt_version', models.CharField(max_length=20, verbose_name='분석 프롬프트 버전')),
+                ('model_name', models.CharField(max_length=100, verbose_name='LLM 모델')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='분석 결과')),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('ready', 'ready')], default='pending', max_length=10)),
+                ('lease_until', models.DateTimeField(blank=True, null=True, verbose_name='생성 점유 만료 시각')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('case', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analyses', to='cases.case')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('case', 'precedent_no', 'content_hash', 'prompt_version', 'model_name'), name='uniq_case_analysis')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:36
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0006_caseanalysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=50, verbose_name='작업 종류')),
+                ('payload', models.JSONField(default=dict, verbose_name='작업 입력')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='작업 결과')),
+                ('error', models.TextField(blank=True, default='', verbose_name='마지막 오류')),
+                ('status', models.CharField(choices=[('queued', 'queued'), ('running', 'running'), ('succeeded', 'succeeded'), ('failed', 'failed')], default='queued', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='실행 횟수')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='최대 실행 횟수')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='실행 가능 시각')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='실행 점유 만료 시각')),
+                ('worker', models.CharField(blank=True, default='', max_length=100, verbose_name='실행 워커')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='job_claim_idx')],
+            },
+        ),
+    ]
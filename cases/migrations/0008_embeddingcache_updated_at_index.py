@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0007_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='embeddingcache',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
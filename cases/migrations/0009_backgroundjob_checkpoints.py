@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0008_embeddingcache_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='checkpoints',
+            field=models.JSONField(blank=True, default=dict, verbose_name='재실행 시 재사용할 중간 결과'),
+        ),
+    ]
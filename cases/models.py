@@ -1,4 +1,7 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 
 
 class Category(models.Model):
@@ -61,3 +64,147 @@ class Case(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_deleted = models.BooleanField(default=False)
 
+
+
+class EmbeddingCache(models.Model):
+    """쿼리 임베딩 캐시 테이블 (모든 gunicorn 워커가 공유하는 2차 캐시)"""
+    cache_key = models.CharField(max_length=64, primary_key=True, verbose_name="캐시 키(sha256)")
+    model_name = models.CharField(max_length=100, verbose_name="임베딩 모델")
+    task_type = models.CharField(max_length=30, verbose_name="임베딩 태스크 타입")
+    dimension = models.IntegerField(verbose_name="벡터 차원")
+    vector = models.BinaryField(verbose_name="float32 벡터")
+    created_at = models.DateTimeField(auto_now_add=True)
+    # 만료 행 정리(purge_embedding_cache) 조회용 인덱스
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.model_name}/{self.task_type}/{self.dimension} {self.cache_key[:12]}"
+
+
+class SearchIndexGeneration(models.Model):
+    """검색 인덱스 세대 번호 (재색인 시 증가하며, 검색 결과 캐시 무효화 기준으로 사용)"""
+    index_name = models.CharField(max_length=100, primary_key=True, verbose_name="인덱스 이름")
+    generation = models.PositiveIntegerField(default=0, verbose_name="세대 번호")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.index_name}#{self.generation}"
+
+
+class PrecedentSummary(models.Model):
+    """
+    판례 AI 요약 저장소. (사건번호, 원문 해시, 프롬프트 버전)이 같으면 같은 요약을 재사용합니다.
+    status=pending 행은 요약을 생성 중인 워커의 점유 표시이며 lease_until이 지나면 다른 워커가 인계합니다.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_READY = 'ready'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'pending'),
+        (STATUS_READY, 'ready'),
+    ]
+
+    case_no = models.CharField(max_length=100, db_index=True, verbose_name="사건번호")
+    content_hash = models.CharField(max_length=64, verbose_name="판례 원문 해시(sha256)")
+    prompt_version = models.CharField(max_length=20, verbose_name="요약 프롬프트 버전")
+    model_name = models.CharField(max_length=100, blank=True, default='', verbose_name="LLM 모델")
+    summary = models.JSONField(null=True, blank=True, verbose_name="요약 결과")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    lease_until = models.DateTimeField(null=True, blank=True, verbose_name="생성 점유 만료 시각")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['case_no', 'content_hash', 'prompt_version'], name='uniq_precedent_summary'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.case_no} ({self.prompt_version}, {self.status})"
+
+
+class CaseAnalysis(models.Model):
+    """
+    사건-판례 심층 분석 결과 저장소. (사건, 판례, 원문 해시, 프롬프트 버전, 모델)이 같으면 같은 결과를 재사용합니다.
+    status=pending 행은 분석을 생성 중인 워커의 점유 표시이며 lease_until이 지나면 다른 워커가 인계합니다.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_READY = 'ready'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'pending'),
+        (STATUS_READY, 'ready'),
+    ]
+
+    case = models.ForeignKey(
+        Case,
+        on_delete=models.CASCADE,
+        related_name='analyses'
+    )
+    precedent_no = models.CharField(max_length=100, verbose_name="판례 사건번호")
+    content_hash = models.CharField(max_length=64, verbose_name="판례 원문 해시(sha256)")
+    prompt_version = models.CharField(max_length=20, verbose_name="분석 프롬프트 버전")
+    model_name = models.CharField(max_length=100, verbose_name="LLM 모델")
+    result = models.JSONField(null=True, blank=True, verbose_name="분석 결과")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    lease_until = models.DateTimeField(null=True, blank=True, verbose_name="생성 점유 만료 시각")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['case', 'precedent_no', 'content_hash', 'prompt_version', 'model_name'],
+                name='uniq_case_analysis'
+            ),
+        ]
+
+    def __str__(self):
+        return f"case {self.case_id} × {self.precedent_no} ({self.prompt_version}, {self.status})"
+
+
+class BackgroundJob(models.Model):
+    """
+    LLM 분석/문서 생성처럼 오래 걸리는 작업의 DB 작업 큐 (manage.py run_jobs 워커가 처리).
+    워커는 SELECT ... FOR UPDATE SKIP LOCKED로 queued 행을 하나씩 점유하며,
+    running 상태에서 locked_until이 지난 행(워커 중단)은 다른 워커가 다시 가져갑니다.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'queued'),
+        (STATUS_RUNNING, 'running'),
+        (STATUS_SUCCEEDED, 'succeeded'),
+        (STATUS_FAILED, 'failed'),
+    ]
+
+    job_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50, verbose_name="작업 종류")
+    payload = models.JSONField(default=dict, verbose_name="작업 입력")
+    result = models.JSONField(null=True, blank=True, verbose_name="작업 결과")
+    error = models.TextField(blank=True, default='', verbose_name="마지막 오류")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveIntegerField(default=0, verbose_name="실행 횟수")
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name="최대 실행 횟수")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="실행 가능 시각")
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name="실행 점유 만료 시각")
+    worker = models.CharField(max_length=100, blank=True, default='', verbose_name="실행 워커")
+    checkpoints = models.JSONField(default=dict, blank=True, verbose_name="재실행 시 재사용할 중간 결과")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_claim_idx'),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+    def __str__(self):
+        return f"{self.kind} {self.job_id} ({self.status}, {self.attempts}/{self.max_attempts})"
@@ -0,0 +1,322 @@
+import os
+import re
+import json
+import time
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import zstandard
+
+from .cache import TTLLRUCache
+from .metrics import PRECEDENT_STORE_LOOKUPS, PRECEDENT_STORE_LATENCY, PRECEDENT_STORE_BYTES
+from .service import OpenSearchService
+
+# 판례 원문 로컬 저장소 (read-through)
+# data/merged로 만든 SQLite 파일에 precedents 인덱스와 같은 _source를 zstd로 압축해 저장하고,
+# 그 앞에 압축을 푼 문서의 LRU를 둡니다. 로컬에 없는 판례만 OpenSearch에서 조회합니다.
+PRECEDENT_STORE_PATH = Path(os.environ.get(
+    "PRECEDENT_STORE_PATH", Path(__file__).resolve().parent.parent / "data" / "precedent_store.sqlite3"
+))
+PRECEDENT_STORE_ENABLED = os.environ.get("PRECEDENT_STORE_ENABLED", "true").lower() == "true"
+PRECEDENT_STORE_CACHE_SIZE = int(os.environ.get("PRECEDENT_STORE_CACHE_SIZE", 512))
+# OpenSearch에서 가져온 문서는 재색인 여부를 알 수 없으므로 수명을 둠 (로컬 파일이 바뀌면 전부 비움)
+PRECEDENT_STORE_CACHE_TTL = int(os.environ.get("PRECEDENT_STORE_CACHE_TTL", 3600))
+PRECEDENT_STORE_ZSTD_LEVEL = int(os.environ.get("PRECEDENT_STORE_ZSTD_LEVEL", 9))
+
+MERGED_DATA_DIR = Path(__file__).resolve().parent.parent / "data" / "merged"
+
+
+def parse_date(date_str: str) -> str:
+    """날짜를 필터링용(yyyy-MM-dd)으로 정규화"""
+    if not date_str:
+        return None
+    nums = re.findall(r'\d+', str(date_str))
+    if len(nums) >= 3:
+        return f"{nums[0]}-{nums[1].zfill(2)}-{nums[2].zfill(2)}"
+    return date_str
+
+
+def precedent_source(data: Dict[str, Any]) -> Dict[str, Any]:
+    """data/merged 파일 → precedents 인덱스 _source (변호인 필드 제외)"""
+    return {
+        "case_no": data.get("caseNo"),
+        "case_title": data.get("caseTitle"),
+        "judgment_date": parse_date(data.get("judmnAdjuDe")),
+        "content": data.get("판례내용", ""),
+    }
+
+
+def iter_merged_precedents(directory: Path = MERGED_DATA_DIR) -> Iterator[Dict[str, Any]]:
+    for file_path in sorted(Path(directory).glob("*.json")):
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"파일 {file_path.name} 읽기 실패: {e}")
+            continue
+        if data.get("caseNo"):
+            yield precedent_source(data)
+
+
+class LocalPrecedentFile:
+    """
+    사건번호 → zstd 압축 JSON 문서를 담은 읽기 전용 SQLite 파일.
+    SQLite 연결과 zstd 해제기는 스레드 간 공유할 수 없으므로 스레드마다 따로 엽니다.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        stat = self.path.stat()
+        # 재생성(os.replace) 여부 판단용
+        self.signature = (stat.st_ino, stat.st_mtime_ns)
+        self._local = threading.local()
+
+    def _connection(self) -> Tuple[sqlite3.Connection, zstandard.ZstdDecompressor]:
+        local = self._local
+        if getattr(local, "connection", None) is None:
+            local.connection = sqlite3.connect(
+                f"file:{self.path}?mode=ro&immutable=1", uri=True, check_same_thread=False
+            )
+            local.decompressor = zstandard.ZstdDecompressor()
+        return local.connection, local.decompressor
+
+    def get(self, case_no: str) -> Optional[Dict[str, Any]]:
+        connection, decompressor = self._connection()
+        row = connection.execute("SELECT data FROM precedents WHERE case_no = ?", (case_no,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(decompressor.decompress(row[0]))
+
+    def get_many(self, case_nos: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not case_nos:
+            return {}
+        connection, decompressor = self._connection()
+        placeholders = ",".join("?" * len(case_nos))
+        rows = connection.execute(
+            f"SELECT case_no, data FROM precedents WHERE case_no IN ({placeholders})", list(case_nos)
+        )
+        return {case_no: json.loads(decompressor.decompress(data)) for case_no, data in rows}
+
+    def case_numbers(self) -> List[str]:
+        connection, _ = self._connection()
+        return [row[0] for row in connection.execute("SELECT case_no FROM precedents")]
+
+    def stats(self) -> Dict[str, int]:
+        """생성 시 기록한 문서 수와 압축 전/후 바이트 수"""
+        connection, _ = self._connection()
+        stats = {key: int(value) for key, value in connection.execute("SELECT key, value FROM meta")}
+        stats["file_bytes"] = self.path.stat().st_size
+        return stats
+
+    @staticmethod
+    def build(documents: Iterable[Dict[str, Any]], path: Path = PRECEDENT_STORE_PATH,
+              level: int = PRECEDENT_STORE_ZSTD_LEVEL) -> int:
+        """문서를 임시 파일에 쓴 뒤 교체하므로 실행 중인 워커는 다음 조회 때 새 파일을 엽니다."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        if tmp_path.exists():
+            tmp_path.unlink()
+        compressor = zstandard.ZstdCompressor(level=level)
+        connection = sqlite3.connect(tmp_path)
+        try:
+            connection.execute(
+                "CREATE TABLE precedents (case_no TEXT PRIMARY KEY, raw_size INTEGER NOT NULL, data BLOB NOT NULL)"
+            )
+            connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            batch = []
+            for document in documents:
+                raw = json.dumps(document, ensure_ascii=False).encode("utf-8")
+                batch.append((str(document["case_no"]), len(raw), compressor.compress(raw)))
+                if len(batch) >= 500:
+                    connection.executemany("INSERT OR REPLACE INTO precedents VALUES (?, ?, ?)", batch)
+                    batch = []
+            connection.executemany("INSERT OR REPLACE INTO precedents VALUES (?, ?, ?)", batch)
+            count, raw_bytes, compressed_bytes = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM precedents"
+            ).fetchone()
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("documents", count), ("raw_bytes", raw_bytes), ("compressed_bytes", compressed_bytes),
+            ])
+            connection.commit()
+            connection.execute("VACUUM")
+        finally:
+            connection.close()
+        os.replace(tmp_path, path)
+        return count
+
+
+class PrecedentStore:
+    """
+    판례 원문 조회: 메모리 LRU → 로컬 압축 파일 → OpenSearch 순서.
+    로컬 파일이 다시 만들어지면(재색인) 다음 조회 때 새 파일을 열고 LRU를 비웁니다.
+    """
+    _memory = TTLLRUCache(maxsize=PRECEDENT_STORE_CACHE_SIZE, ttl=PRECEDENT_STORE_CACHE_TTL)
+    _file: Optional[LocalPrecedentFile] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def local_file(cls) -> Optional[LocalPrecedentFile]:
+        if not PRECEDENT_STORE_ENABLED:
+            return None
+        try:
+            stat = PRECEDENT_STORE_PATH.stat()
+        except FileNotFoundError:
+            if cls._file is not None:
+                cls.reset()
+            return None
+        current = cls._file
+        if current is None or current.signature != (stat.st_ino, stat.st_mtime_ns):
+            with cls._lock:
+                if cls._file is current:
+                    if current is not None:
+                        logging.info("Precedent store file changed, reopening")
+                    cls._memory.clear()
+                    try:
+                        local_file = LocalPrecedentFile(PRECEDENT_STORE_PATH)
+                        stats = local_file.stats()
+                    except (OSError, sqlite3.Error) as e:
+                        logging.warning(f"Precedent store unavailable: {str(e)}")
+                        return None
+                    PRECEDENT_STORE_BYTES.labels(kind="raw").set(stats["raw_bytes"])
+                    PRECEDENT_STORE_BYTES.labels(kind="compressed").set(stats["compressed_bytes"])
+                    cls._file = local_file
+        return cls._file
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._file = None
+            cls._memory.clear()
+
+    @classmethod
+    def _get_local(cls, case_no: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """(문서, 조회 위치). 메모리와 로컬 파일 모두에 없으면 (None, None)"""
+        local_file = cls.local_file()
+        document = cls._memory.get(case_no)
+        if document is not None:
+            return document, "memory"
+        if local_file is not None:
+            try:
+                document = local_file.get(case_no)
+            except sqlite3.Error as e:
+                logging.warning(f"Precedent store read error: {str(e)}")
+                document = None
+            if document is not None:
+                cls._memory.set(case_no, document)
+                return document, "local"
+        return None, None
+
+    @staticmethod
+    def _observe(source: str, started: float) -> None:
+        PRECEDENT_STORE_LOOKUPS.labels(source=source).inc()
+        PRECEDENT_STORE_LATENCY.labels(source=source).observe(time.perf_counter() - started)
+
+    @staticmethod
+    def _project(document: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+        if fields is None:
+            return dict(document)
+        return {field: document.get(field) for field in fields}
+
+    @classmethod
+    def _remember(cls, case_no: str, document: Optional[Dict[str, Any]], fields: Optional[List[str]]) -> str:
+        # 일부 필드만 받은 문서는 다른 조회에서 쓸 수 없으므로 전체 문서만 캐시
+        if document is None:
+            return "miss"
+        if fields is None:
+            cls._memory.set(case_no, document)
+        return "opensearch"
+
+    @classmethod
+    def get(cls, case_no: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        판례 한 건 조회 (없으면 None). fields를 주면 그 필드만 반환하며,
+        OpenSearch 폴백에서도 _source includes로 해당 필드만 전송받습니다.
+        """
+        started = time.perf_counter()
+        case_no = str(case_no)
+        document, source = cls._get_local(case_no)
+        if document is None:
+            document = OpenSearchService.get_precedent_by_case_number(case_no, fields)
+            source = cls._remember(case_no, document, fields)
+        cls._observe(source, started)
+        # 호출자가 응답을 만들며 수정해도 캐시된 문서가 바뀌지 않도록 복사본 반환
+        return cls._project(document, fields) if document is not None else None
+
+    @classmethod
+    async def aget(cls, case_no: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        # 로컬 조회는 1ms 미만이므로 이벤트 루프에서 바로 실행하고, OpenSearch만 비동기로 대기
+        started = time.perf_counter()
+        case_no = str(case_no)
+        document, source = cls._get_local(case_no)
+        if document is None:
+            document = await OpenSearchService.aget_precedent_by_case_number(case_no, fields)
+            source = cls._remember(case_no, document, fields)
+        cls._observe(source, started)
+        return cls._project(document, fields) if document is not None else None
+
+    # --- 여러 판례 일괄 조회 ---
+
+    @classmethod
+    def _get_many_local(cls, case_nos: List[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """(메모리/로컬 파일에서 찾은 문서, 없는 사건번호)"""
+        local_file = cls.local_file()
+        found = {}
+        for case_no in case_nos:
+            document = cls._memory.get(case_no)
+            if document is not None:
+                found[case_no] = document
+        PRECEDENT_STORE_LOOKUPS.labels(source="memory").inc(len(found))
+        missing = [case_no for case_no in case_nos if case_no not in found]
+        if missing and local_file is not None:
+            try:
+                local = local_file.get_many(missing)
+            except sqlite3.Error as e:
+                logging.warning(f"Precedent store read error: {str(e)}")
+                local = {}
+            for case_no, document in local.items():
+                cls._memory.set(case_no, document)
+            PRECEDENT_STORE_LOOKUPS.labels(source="local").inc(len(local))
+            found.update(local)
+            missing = [case_no for case_no in missing if case_no not in local]
+        return found, missing
+
+    @classmethod
+    def _finish_many(cls, case_nos: List[str], found: Dict[str, Dict[str, Any]],
+                     remote: Dict[str, Dict[str, Any]], fields: Optional[List[str]],
+                     started: float) -> Dict[str, Dict[str, Any]]:
+        if fields is None:
+            # 일부 필드만 받은 문서는 단건 조회에서 쓸 수 없으므로 전체 문서만 캐시
+            for case_no, document in remote.items():
+                cls._memory.set(case_no, document)
+        found.update(remote)
+        PRECEDENT_STORE_LOOKUPS.labels(source="opensearch").inc(len(remote))
+        PRECEDENT_STORE_LOOKUPS.labels(source="miss").inc(len(case_nos) - len(found))
+        PRECEDENT_STORE_LATENCY.labels(source="batch").observe(time.perf_counter() - started)
+        return {
+            case_no: cls._project(found[case_no], fields)
+            for case_no in case_nos if case_no in found
+        }
+
+    @classmethod
+    def get_many(cls, case_nos: List[str], fields: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        여러 판례를 한 번에 조회 (사건번호 → 문서, 없는 판례는 제외).
+        로컬에 없는 판례만 OpenSearch mget 한 번으로 가져오며, fields를 주면 그 필드만 반환/전송받습니다.
+        """
+        started = time.perf_counter()
+        case_nos = list(dict.fromkeys(str(case_no) for case_no in case_nos))
+        found, missing = cls._get_many_local(case_nos)
+        remote = OpenSearchService.get_precedents_by_case_numbers(missing, fields) if missing else {}
+        return cls._finish_many(case_nos, found, remote, fields, started)
+
+    @classmethod
+    async def aget_many(cls, case_nos: List[str], fields: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        started = time.perf_counter()
+        case_nos = list(dict.fromkeys(str(case_no) for case_no in case_nos))
+        found, missing = cls._get_many_local(case_nos)
+        remote = await OpenSearchService.aget_precedents_by_case_numbers(missing, fields) if missing else {}
+        return cls._finish_many(case_nos, found, remote, fields, started)
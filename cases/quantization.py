@@ -0,0 +1,230 @@
+import os
+import abc
+from pathlib import Path
+from typing import Dict, Type
+
+import numpy as np
+
+# 로컬 벡터 인덱스(NumpyVectorStore)의 청크 벡터 인코딩과 유사도 공간.
+# OpenSearch 매핑(cases/knn_index.py)과 같은 이름을 사용합니다.
+#   fp32: 원본 float32 | fp16: 반정밀도 | int8: 차원별 min/max 스칼라 양자화 | pq: 곱 양자화
+#   l2: 1/(1+d^2) | cosinesimil: (1+cos)/2 | innerproduct: faiss 내적 점수
+ENCODINGS = ("fp32", "fp16", "int8", "pq")
+SPACE_TYPES = ("l2", "cosinesimil", "innerproduct")
+
+# PQ 부분공간 수(차원을 나누어 떨어지게), 부분공간별 코드북 학습 샘플 수와 k-means 반복 횟수
+VECTOR_PQ_M = int(os.environ.get("VECTOR_PQ_M", 96))
+VECTOR_PQ_TRAIN_SIZE = int(os.environ.get("VECTOR_PQ_TRAIN_SIZE", 20000))
+VECTOR_PQ_ITERATIONS = int(os.environ.get("VECTOR_PQ_ITERATIONS", 15))
+PQ_CENTROIDS = 256
+
+# int8 디코딩 시 한 번에 float32로 올리는 행 수 (쿼리당 임시 메모리 상한)
+DECODE_BLOCK_ROWS = 65536
+
+SQ_PARAMS_FILE = "sq_params.npy"
+PQ_CODEBOOKS_FILE = "pq_codebooks.npy"
+
+
+class VectorCodec(abc.ABC):
+    """
+    청크 벡터 행렬을 저장 형식(codes)으로 변환하고, 저장된 codes에 대해 쿼리와의 내적을 계산합니다.
+    l2/코사인 점수는 내적과 복원 벡터의 제곱 노름으로 계산하므로 모든 인코딩이 dots()만 구현하면 됩니다.
+    """
+    encoding = ""
+
+    def train(self, matrix: np.ndarray) -> None:
+        pass
+
+    @abc.abstractmethod
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        ...
+
+    @abc.abstractmethod
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        ...
+
+    @abc.abstractmethod
+    def dots(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        ...
+
+    def save(self, path: Path) -> None:
+        pass
+
+    def load(self, path: Path) -> None:
+        pass
+
+    def parameter_files(self):
+        return []
+
+
+class Fp32Codec(VectorCodec):
+    encoding = "fp32"
+    dtype = np.float32
+
+    def encode(self, matrix):
+        return np.asarray(matrix, dtype=self.dtype)
+
+    def decode(self, codes):
+        return np.asarray(codes, dtype=np.float32)
+
+    def dots(self, codes, query):
+        return (codes @ query.astype(codes.dtype)).astype(np.float32)
+
+
+class Fp16Codec(Fp32Codec):
+    encoding = "fp16"
+    dtype = np.float16
+
+    def dots(self, codes, query):
+        # numpy의 float16 행렬곱은 BLAS를 쓰지 않으므로 블록 단위로 float32로 올려 계산
+        query = query.astype(np.float32)
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], DECODE_BLOCK_ROWS):
+            out[start:start + DECODE_BLOCK_ROWS] = np.asarray(codes[start:start + DECODE_BLOCK_ROWS], dtype=np.float32) @ query
+        return out
+
+
+class Int8Codec(VectorCodec):
+    """차원별 [min, max] 구간을 256단계로 나누는 스칼라 양자화 (x ≈ min + scale * code)"""
+    encoding = "int8"
+
+    def __init__(self):
+        self.low = None
+        self.scale = None
+
+    def train(self, matrix):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        self.low = matrix.min(axis=0)
+        self.scale = np.maximum(matrix.max(axis=0) - self.low, 1e-12) / 255.0
+
+    def encode(self, matrix):
+        codes = np.rint((np.asarray(matrix, dtype=np.float32) - self.low) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes):
+        return self.low + self.scale * np.asarray(codes, dtype=np.float32)
+
+    def dots(self, codes, query):
+        # q·x ≈ q·min + codes @ (q * scale), 블록 단위로 float32 변환
+        weights = (query * self.scale).astype(np.float32)
+        bias = float(query @ self.low)
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], DECODE_BLOCK_ROWS):
+            block = np.asarray(codes[start:start + DECODE_BLOCK_ROWS], dtype=np.float32)
+            out[start:start + DECODE_BLOCK_ROWS] = block @ weights + bias
+        return out
+
+    def save(self, path):
+        np.save(Path(path) / SQ_PARAMS_FILE, np.stack([self.low, self.scale]))
+
+    def load(self, path):
+        self.low, self.scale = np.load(Path(path) / SQ_PARAMS_FILE)
+
+    def parameter_files(self):
+        return [SQ_PARAMS_FILE]
+
+
+class PQCodec(VectorCodec):
+    """
+    곱 양자화: 벡터를 m개 부분공간으로 나누고 부분공간마다 256개 중심점 중 하나의 번호(1바이트)로 저장.
+    내적은 쿼리와 중심점의 부분 내적 표(m x 256)를 한 번 계산한 뒤 codes로 조회해 합산합니다 (ADC).
+    """
+    encoding = "pq"
+
+    def __init__(self, m: int = VECTOR_PQ_M, train_size: int = VECTOR_PQ_TRAIN_SIZE,
+                 iterations: int = VECTOR_PQ_ITERATIONS, seed: int = 0):
+        self.m = m
+        self.train_size = train_size
+        self.iterations = iterations
+        self.seed = seed
+        self.codebooks = None  # (m, 256, dsub)
+
+    def _split(self, matrix):
+        n, dim = matrix.shape
+        if dim % self.m:
+            raise ValueError(f"PQ 부분공간 수 {self.m}가 차원 {dim}을 나누어 떨어지게 하지 않습니다.")
+        return matrix.reshape(n, self.m, dim // self.m)
+
+    @staticmethod
+    def _assign(sub: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        sq_dist = (centroids ** 2).sum(axis=1) - 2.0 * sub @ centroids.T
+        return np.argmin(sq_dist, axis=1)
+
+    def train(self, matrix):
+        rng = np.random.default_rng(self.seed)
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if matrix.shape[0] > self.train_size:
+            matrix = matrix[rng.choice(matrix.shape[0], self.train_size, replace=False)]
+        subspaces = self._split(matrix)
+        n_centroids = min(PQ_CENTROIDS, matrix.shape[0])
+        codebooks = np.zeros((self.m, PQ_CENTROIDS, subspaces.shape[2]), dtype=np.float32)
+        for j in range(self.m):
+            sub = subspaces[:, j, :]
+            centroids = sub[rng.choice(sub.shape[0], n_centroids, replace=False)].copy()
+            for _ in range(self.iterations):
+                labels = self._assign(sub, centroids)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sub)
+                counts = np.bincount(labels, minlength=n_centroids)[:, None]
+                # 빈 클러스터는 이전 중심점 유지
+                centroids = np.where(counts > 0, sums / np.maximum(counts, 1), centroids)
+            codebooks[j, :n_centroids] = centroids
+        self.codebooks = codebooks
+
+    def encode(self, matrix):
+        subspaces = self._split(np.asarray(matrix, dtype=np.float32))
+        codes = np.empty(subspaces.shape[:2], dtype=np.uint8)
+        for start in range(0, subspaces.shape[0], DECODE_BLOCK_ROWS):
+            block = subspaces[start:start + DECODE_BLOCK_ROWS]
+            for j in range(self.m):
+                codes[start:start + DECODE_BLOCK_ROWS, j] = self._assign(block[:, j, :], self.codebooks[j])
+        return codes
+
+    def decode(self, codes):
+        codes = np.asarray(codes)
+        parts = self.codebooks[np.arange(self.m), codes]  # (n, m, dsub)
+        return parts.reshape(codes.shape[0], -1)
+
+    def dots(self, codes, query):
+        table = np.einsum("mcd,md->mc", self.codebooks, query.reshape(self.m, -1).astype(np.float32))
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        rows = np.arange(self.m)
+        for start in range(0, codes.shape[0], DECODE_BLOCK_ROWS):
+            block = np.asarray(codes[start:start + DECODE_BLOCK_ROWS])
+            out[start:start + DECODE_BLOCK_ROWS] = table[rows, block].sum(axis=1)
+        return out
+
+    def save(self, path):
+        np.save(Path(path) / PQ_CODEBOOKS_FILE, self.codebooks)
+
+    def load(self, path):
+        self.codebooks = np.load(Path(path) / PQ_CODEBOOKS_FILE)
+        self.m = self.codebooks.shape[0]
+
+    def parameter_files(self):
+        return [PQ_CODEBOOKS_FILE]
+
+
+_CODECS: Dict[str, Type[VectorCodec]] = {
+    codec.encoding: codec for codec in (Fp32Codec, Fp16Codec, Int8Codec, PQCodec)
+}
+
+
+def get_codec(encoding: str) -> VectorCodec:
+    codec = _CODECS.get(encoding)
+    if codec is None:
+        raise ValueError(f"알 수 없는 벡터 인코딩: {encoding} (지원: {', '.join(ENCODINGS)})")
+    return codec()
+
+
+def space_scores(dots: np.ndarray, sq_norms: np.ndarray, query: np.ndarray, space_type: str) -> np.ndarray:
+    """쿼리-청크 내적을 OpenSearch(faiss) 점수 스케일로 변환"""
+    if space_type == "l2":
+        sq_dist = np.maximum(sq_norms + float(query @ query) - 2.0 * dots, 0.0)
+        return 1.0 / (1.0 + sq_dist)
+    if space_type == "cosinesimil":
+        denom = np.maximum(np.sqrt(sq_norms) * float(np.linalg.norm(query)), 1e-12)
+        return (1.0 + dots / denom) / 2.0
+    if space_type == "innerproduct":
+        return np.where(dots >= 0, 1.0 + dots, 1.0 / (1.0 - np.minimum(dots, 0.0)))
+    raise ValueError(f"알 수 없는 space_type: {space_type} (지원: {', '.join(SPACE_TYPES)})")
@@ -0,0 +1,74 @@
+import os
+import time
+import logging
+from typing import List, Dict, Any, Optional
+
+from .vector_store import get_local_vector_index
+
+# 리랭킹 방식: "none" | "keyword"(keyword_tagg 일치) | "cosine"(로컬 청크 벡터 코사인 재계산) | "both"
+SEARCH_RERANK = os.environ.get("SEARCH_RERANK", "none").lower()
+# 리랭킹 대상 상위 후보 수, 최종 점수에서 리랭킹 점수의 비중(0~1), 허용 시간(ms)
+SEARCH_RERANK_TOP_N = int(os.environ.get("SEARCH_RERANK_TOP_N", 20))
+SEARCH_RERANK_WEIGHT = float(os.environ.get("SEARCH_RERANK_WEIGHT", 0.3))
+SEARCH_RERANK_BUDGET_MS = float(os.environ.get("SEARCH_RERANK_BUDGET_MS", 5.0))
+
+
+def keyword_overlap(query_text: str, keywords: List[str]) -> float:
+    """판례 keyword_tagg 중 사용자 상황에 등장하는 비율 (교착어 특성상 부분 문자열로 비교)"""
+    if not keywords:
+        return 0.0
+    text = query_text or ""
+    return sum(1 for kw in keywords if kw and kw in text) / len(keywords)
+
+
+def _normalized(values: List[float]) -> List[float]:
+    low, high = min(values), max(values)
+    if high <= low:
+        return [1.0] * len(values)
+    return [(v - low) / (high - low) for v in values]
+
+
+class PrecedentReranker:
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return SEARCH_RERANK != "none"
+
+    @classmethod
+    def rerank(cls, results: List[Dict[str, Any]], query_text: str,
+               query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        """
+        상위 SEARCH_RERANK_TOP_N개 후보에 대해 검색 점수와 로컬 점수를 섞어 재정렬합니다.
+        시간 예산을 넘기면 그때까지 점수를 매긴 앞부분만 재정렬하고 나머지는 원래 순서를 유지합니다.
+        """
+        if not cls.is_enabled() or len(results) < 2:
+            return results
+
+        started = time.perf_counter()
+        head, tail = results[:SEARCH_RERANK_TOP_N], results[SEARCH_RERANK_TOP_N:]
+        use_keyword = SEARCH_RERANK in ("keyword", "both")
+        use_cosine = SEARCH_RERANK in ("cosine", "both") and query_embedding is not None
+
+        cosine_scores: Dict[str, float] = {}
+        if use_cosine:
+            local_index = get_local_vector_index()
+            if local_index is not None:
+                cosine_scores = local_index.max_cosine(query_embedding, [r["case_No"] for r in head])
+
+        retrieval = _normalized([r.get("fusion_score", r.get("similarity") or 0.0) for r in head])
+        scored = []
+        for i, item in enumerate(head):
+            if (time.perf_counter() - started) * 1000 > SEARCH_RERANK_BUDGET_MS:
+                logging.warning(f"Rerank budget {SEARCH_RERANK_BUDGET_MS}ms exceeded after {i} candidates")
+                break
+            local_parts = []
+            if use_keyword:
+                local_parts.append(keyword_overlap(query_text, item.get("keywords") or []))
+            if item["case_No"] in cosine_scores:
+                local_parts.append(cosine_scores[item["case_No"]])
+            local = sum(local_parts) / len(local_parts) if local_parts else 0.0
+            item["rerank_score"] = (1 - SEARCH_RERANK_WEIGHT) * retrieval[i] + SEARCH_RERANK_WEIGHT * local
+            scored.append(item)
+
+        scored.sort(key=lambda r: r["rerank_score"], reverse=True)
+        return scored + head[len(scored):] + tail
@@ -0,0 +1,303 @@
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from asgiref.sync import sync_to_async
+from typing import List, Dict, Any, Optional, Tuple
+
+from .embedding_cache import EmbeddingCacheService
+from .metrics import SEARCH_LATENCY, SEARCH_FALLBACKS
+from .rerank import PrecedentReranker, SEARCH_RERANK_TOP_N
+from .search_cache import SearchResultCache
+from .service import OpenSearchService
+from .threads import with_db_cleanup
+from .vector_store import get_vector_store, OpenSearchVectorStore, VectorStore
+
+# 검색 모드: "vector"(kNN) | "hybrid"(kNN + BM25 융합) | "lexical"(BM25 단독, 임베딩 호출 없음)
+SEARCH_MODE = os.environ.get("SEARCH_MODE", "vector").lower()
+# 융합 방식: "rrf"(reciprocal rank fusion) | "weighted"(min-max 정규화 점수 가중합)
+SEARCH_FUSION = os.environ.get("SEARCH_FUSION", "rrf").lower()
+SEARCH_VECTOR_WEIGHT = float(os.environ.get("SEARCH_VECTOR_WEIGHT", 1.0))
+SEARCH_LEXICAL_WEIGHT = float(os.environ.get("SEARCH_LEXICAL_WEIGHT", 1.0))
+SEARCH_RRF_K = int(os.environ.get("SEARCH_RRF_K", 60))
+# 융합 전에 각 경로에서 가져올 판례 수 (k의 배수)
+SEARCH_HYBRID_DEPTH = int(os.environ.get("SEARCH_HYBRID_DEPTH", 4))
+# 임베딩이 이 시간(초) 안에 오지 않거나 실패하면 BM25 단독 검색으로 전환 (0이면 대기 제한 없음)
+SEARCH_EMBEDDING_TIMEOUT = float(os.environ.get("SEARCH_EMBEDDING_TIMEOUT", 3.0))
+SEARCH_LEXICAL_FALLBACK = os.environ.get("SEARCH_LEXICAL_FALLBACK", "true").lower() == "true"
+
+_embedding_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="query-embedding")
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def reciprocal_rank_fusion(ranked: Dict[str, List[Dict[str, Any]]], weights: Dict[str, float],
+                           rrf_k: int = SEARCH_RRF_K) -> List[Dict[str, Any]]:
+    """경로별 순위 리스트를 score = Σ w / (rrf_k + rank) 로 융합"""
+    fused: Dict[str, Dict[str, Any]] = {}
+    for path, results in ranked.items():
+        for rank, item in enumerate(results, start=1):
+            entry = fused.setdefault(item["case_No"], {**item, "fusion_score": 0.0})
+            entry["fusion_score"] += weights.get(path, 1.0) / (rrf_k + rank)
+    return sorted(fused.values(), key=lambda r: r["fusion_score"], reverse=True)
+
+
+def weighted_score_fusion(ranked: Dict[str, List[Dict[str, Any]]],
+                          weights: Dict[str, float]) -> List[Dict[str, Any]]:
+    """경로별 점수를 min-max 정규화한 뒤 가중합으로 융합"""
+    fused: Dict[str, Dict[str, Any]] = {}
+    for path, results in ranked.items():
+        if not results:
+            continue
+        scores = [r["similarity"] for r in results]
+        low, high = min(scores), max(scores)
+        for item in results:
+            norm = (item["similarity"] - low) / (high - low) if high > low else 1.0
+            entry = fused.setdefault(item["case_No"], {**item, "fusion_score": 0.0})
+            entry["fusion_score"] += weights.get(path, 1.0) * norm
+    return sorted(fused.values(), key=lambda r: r["fusion_score"], reverse=True)
+
+
+class PrecedentSearchService:
+    """
+    유사 판례 검색 파이프라인: 임베딩 → (결과 캐시) → 검색(vector / hybrid / lexical) → 리랭킹.
+    search()는 WSGI 뷰용, asearch()는 ASGI 비동기 뷰용이며 두 경로는 같은 헬퍼를 공유합니다.
+    """
+
+    @staticmethod
+    def _record(timings: Dict[str, float], stage: str, started: float) -> None:
+        timings[stage] = _elapsed_ms(started)
+        SEARCH_LATENCY.labels(stage=stage).observe(timings[stage] / 1000)
+
+    @staticmethod
+    def _embedding_failed(reason: str, error: Optional[Exception] = None) -> None:
+        SEARCH_FALLBACKS.labels(reason=reason).inc()
+        if reason == "timeout":
+            logging.warning(f"Query embedding timed out after {SEARCH_EMBEDDING_TIMEOUT}s, falling back to BM25")
+        else:
+            logging.warning(f"Query embedding failed, falling back to BM25: {str(error)}")
+
+    @classmethod
+    def _embed_query(cls, query_text: str, timings: Dict[str, float]) -> Optional[List[float]]:
+        """쿼리 임베딩. 실패/시간 초과 시 폴백이 허용되면 None을 반환합니다."""
+        started = time.perf_counter()
+        future = _embedding_executor.submit(with_db_cleanup(EmbeddingCacheService.get_embedding), query_text)
+        try:
+            return future.result(timeout=SEARCH_EMBEDDING_TIMEOUT or None)
+        except FutureTimeoutError:
+            if not SEARCH_LEXICAL_FALLBACK:
+                raise
+            cls._embedding_failed("timeout")
+        except Exception as e:
+            if not SEARCH_LEXICAL_FALLBACK:
+                raise
+            cls._embedding_failed("error", e)
+        finally:
+            cls._record(timings, "embed", started)
+        return None
+
+    @classmethod
+    async def _aembed_query(cls, query_text: str, timings: Dict[str, float]) -> Optional[List[float]]:
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(
+                EmbeddingCacheService.aget_embedding(query_text), timeout=SEARCH_EMBEDDING_TIMEOUT or None
+            )
+        except asyncio.TimeoutError:
+            if not SEARCH_LEXICAL_FALLBACK:
+                raise
+            cls._embedding_failed("timeout")
+        except Exception as e:
+            if not SEARCH_LEXICAL_FALLBACK:
+                raise
+            cls._embedding_failed("error", e)
+        finally:
+            cls._record(timings, "embed", started)
+        return None
+
+    @staticmethod
+    def _fetch_k(k: int) -> int:
+        # 리랭킹이 켜져 있으면 상위 N개 후보를 가져와 재정렬한 뒤 k개로 자름
+        return max(k, SEARCH_RERANK_TOP_N) if PrecedentReranker.is_enabled() else k
+
+    @staticmethod
+    def _cache_key(mode: str, k: int, filters, query_embedding, query_text: str) -> Optional[str]:
+        """현재 인덱스 세대를 포함한 결과 캐시 키 (DB 조회 실패 시 캐시를 건너뜀)"""
+        try:
+            generation = SearchResultCache.current_generation()
+        except Exception as e:
+            logging.warning(f"Search result cache unavailable: {str(e)}")
+            return None
+        key_text = query_text if mode != "vector" or PrecedentReranker.is_enabled() else None
+        return SearchResultCache.make_key(generation, mode, k, filters, query_embedding, key_text)
+
+    @staticmethod
+    def _record_hybrid_response(response: Dict[str, Any], timings: Dict[str, float],
+                                started: float) -> Dict[str, List[Dict[str, Any]]]:
+        # 두 쿼리를 msearch 한 번에 보내고, 경로별 시간은 서버 측 took으로 보고
+        timings["round_trip"] = _elapsed_ms(started)
+        for path, took in response["took_ms"].items():
+            timings[path] = took
+            if took is not None:
+                SEARCH_LATENCY.labels(stage=path).observe(took / 1000)
+        return {"vector": response["vector"], "lexical": response["lexical"]}
+
+    @classmethod
+    def _fuse(cls, ranked: Dict[str, List[Dict[str, Any]]], k: int, timings: Dict[str, float]) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        weights = {"vector": SEARCH_VECTOR_WEIGHT, "lexical": SEARCH_LEXICAL_WEIGHT}
+        if SEARCH_FUSION == "weighted":
+            fused = weighted_score_fusion(ranked, weights)
+        else:
+            fused = reciprocal_rank_fusion(ranked, weights)
+        timings["fusion"] = _elapsed_ms(started)
+        return fused[:k]
+
+    @classmethod
+    def _finish(cls, results: List[Dict[str, Any]], query_text: str, query_embedding, k: int,
+                cache_key: Optional[str], mode: str, timings: Dict[str, float],
+                started: float) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        if PrecedentReranker.is_enabled():
+            rerank_started = time.perf_counter()
+            results = PrecedentReranker.rerank(results, query_text, query_embedding)
+            cls._record(timings, "rerank", rerank_started)
+        results = results[:k]
+        if cache_key is not None:
+            SearchResultCache.set(cache_key, results)
+        cls._record(timings, "total", started)
+        return results, {"mode": mode, "cached": False, "timings_ms": timings}
+
+    # --- 동기 경로 (WSGI) ---
+
+    @classmethod
+    def _lexical(cls, query_text: str, k: int, filters, timings: Dict[str, float]) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        results = OpenSearchService.search_lexical_precedents(query_text, k=k, filters=filters)
+        cls._record(timings, "lexical", started)
+        return results
+
+    @classmethod
+    def _vector(cls, query_embedding: List[float], k: int, filters, timings: Dict[str, float]) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        results = get_vector_store().search(query_embedding, k=k, filters=filters)
+        cls._record(timings, "vector", started)
+        return results
+
+    @classmethod
+    def _hybrid(cls, query_text: str, query_embedding: List[float], k: int, filters,
+                timings: Dict[str, float]) -> List[Dict[str, Any]]:
+        depth = k * SEARCH_HYBRID_DEPTH
+        if isinstance(get_vector_store(), OpenSearchVectorStore):
+            started = time.perf_counter()
+            response = OpenSearchService.search_hybrid_precedents(query_text, query_embedding, k=depth, filters=filters)
+            ranked = cls._record_hybrid_response(response, timings, started)
+        else:
+            ranked = {
+                "vector": cls._vector(query_embedding, depth, filters, timings),
+                "lexical": cls._lexical(query_text, depth, filters, timings),
+            }
+        return cls._fuse(ranked, k, timings)
+
+    @classmethod
+    def search(cls, query_text: str, k: int = 5,
+               filters: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        SEARCH_MODE에 따라 유사 판례를 검색합니다.
+        반환: (결과 리스트, {"mode": 실제 사용된 모드, "cached": 결과 캐시 적중 여부, "timings_ms": 단계별 소요 시간})
+        """
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        mode = SEARCH_MODE
+        fetch_k = cls._fetch_k(k)
+
+        query_embedding = None
+        if mode != "lexical":
+            query_embedding = cls._embed_query(query_text, timings)
+            if query_embedding is None:
+                mode = "lexical"
+
+        cache_key = cls._cache_key(mode, k, filters, query_embedding, query_text)
+        cached = SearchResultCache.get(cache_key) if cache_key else None
+        if cached is not None:
+            timings["total"] = _elapsed_ms(started)
+            return cached, {"mode": mode, "cached": True, "timings_ms": timings}
+
+        if mode == "lexical":
+            results = cls._lexical(query_text, fetch_k, filters, timings)
+        elif mode == "hybrid":
+            results = cls._hybrid(query_text, query_embedding, fetch_k, filters, timings)
+        else:
+            results = cls._vector(query_embedding, fetch_k, filters, timings)
+        return cls._finish(results, query_text, query_embedding, k, cache_key, mode, timings, started)
+
+    # --- 비동기 경로 (ASGI) ---
+
+    @classmethod
+    async def _alexical(cls, query_text: str, k: int, filters, timings: Dict[str, float]) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        results = await OpenSearchService.asearch_lexical_precedents(query_text, k=k, filters=filters)
+        cls._record(timings, "lexical", started)
+        return results
+
+    @classmethod
+    async def _avector(cls, query_embedding: List[float], k: int, filters, timings: Dict[str, float]) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        store: VectorStore = get_vector_store()
+        if isinstance(store, OpenSearchVectorStore):
+            results = await OpenSearchService.asearch_similar_precedents(query_embedding, k=k, filters=filters)
+        else:
+            # 로컬 인덱스는 1ms 미만의 CPU 작업이므로 이벤트 루프에서 바로 실행
+            results = store.search(query_embedding, k=k, filters=filters)
+        cls._record(timings, "vector", started)
+        return results
+
+    @classmethod
+    async def _ahybrid(cls, query_text: str, query_embedding: List[float], k: int, filters,
+                       timings: Dict[str, float]) -> List[Dict[str, Any]]:
+        depth = k * SEARCH_HYBRID_DEPTH
+        if isinstance(get_vector_store(), OpenSearchVectorStore):
+            started = time.perf_counter()
+            response = await OpenSearchService.asearch_hybrid_precedents(
+                query_text, query_embedding, k=depth, filters=filters
+            )
+            ranked = cls._record_hybrid_response(response, timings, started)
+        else:
+            vector, lexical = await asyncio.gather(
+                cls._avector(query_embedding, depth, filters, timings),
+                cls._alexical(query_text, depth, filters, timings),
+            )
+            ranked = {"vector": vector, "lexical": lexical}
+        return cls._fuse(ranked, k, timings)
+
+    @classmethod
+    async def asearch(cls, query_text: str, k: int = 5,
+                      filters: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """search()의 비동기 버전. 반환 형식은 같습니다."""
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        mode = SEARCH_MODE
+        fetch_k = cls._fetch_k(k)
+
+        query_embedding = None
+        if mode != "lexical":
+            query_embedding = await cls._aembed_query(query_text, timings)
+            if query_embedding is None:
+                mode = "lexical"
+
+        cache_key = await sync_to_async(cls._cache_key)(mode, k, filters, query_embedding, query_text)
+        cached = SearchResultCache.get(cache_key) if cache_key else None
+        if cached is not None:
+            timings["total"] = _elapsed_ms(started)
+            return cached, {"mode": mode, "cached": True, "timings_ms": timings}
+
+        if mode == "lexical":
+            results = await cls._alexical(query_text, fetch_k, filters, timings)
+        elif mode == "hybrid":
+            results = await cls._ahybrid(query_text, query_embedding, fetch_k, filters, timings)
+        else:
+            results = await cls._avector(query_embedding, fetch_k, filters, timings)
+        return cls._finish(results, query_text, query_embedding, k, cache_key, mode, timings, started)
@@ -0,0 +1,92 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from django.db.models import F
+
+from .cache import TTLLRUCache
+from .metrics import SEARCH_RESULT_CACHE_HITS, SEARCH_RESULT_CACHE_MISSES
+from .models import SearchIndexGeneration
+from .vector_store import reset_vector_store
+
+SEARCH_RESULT_CACHE_SIZE = int(os.environ.get("SEARCH_RESULT_CACHE_SIZE", 512))
+SEARCH_RESULT_CACHE_TTL = int(os.environ.get("SEARCH_RESULT_CACHE_TTL", 600))
+# 인덱스 세대 번호를 DB에서 다시 읽기 전까지 프로세스 내에 보관하는 시간(초). 재색인 후 최대 이 시간만큼 이전 결과가 조회될 수 있음 (0이면 매번 조회)
+SEARCH_GENERATION_CACHE_TTL = float(os.environ.get("SEARCH_GENERATION_CACHE_TTL", 2))
+CHUNKED_INDEX_NAME = "precedents_chunked"
+
+
+class SearchResultCache:
+    """
+    유사 판례 검색 결과 캐시 (프로세스 내 TTL LRU).
+    키에 인덱스 세대 번호를 포함하므로 재색인(세대 증가) 이후에는 이전 결과가 절대 조회되지 않습니다.
+    """
+    _memory = TTLLRUCache(maxsize=SEARCH_RESULT_CACHE_SIZE, ttl=SEARCH_RESULT_CACHE_TTL)
+    _generation = TTLLRUCache(maxsize=1, ttl=SEARCH_GENERATION_CACHE_TTL)
+    _seen_generation: Optional[int] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def current_generation(cls) -> int:
+        generation = cls._generation.get(CHUNKED_INDEX_NAME)
+        if generation is None:
+            generation = (
+                SearchIndexGeneration.objects.filter(index_name=CHUNKED_INDEX_NAME)
+                .values_list("generation", flat=True).first()
+            ) or 0
+            if SEARCH_GENERATION_CACHE_TTL > 0:
+                cls._generation.set(CHUNKED_INDEX_NAME, generation)
+        if generation != cls._seen_generation:
+            with cls._lock:
+                if generation != cls._seen_generation:
+                    if cls._seen_generation is not None:
+                        # 새 세대 감지: 이전 결과를 버리고 로컬 벡터 인덱스도 다시 mmap
+                        logging.info(f"Search index generation {cls._seen_generation} -> {generation}, invalidating cache")
+                        cls._memory.clear()
+                        reset_vector_store()
+                    cls._seen_generation = generation
+        return generation
+
+    @classmethod
+    def bump_generation(cls) -> int:
+        """색인 파이프라인이 precedents_chunked를 새로 쓸 때 호출합니다."""
+        SearchIndexGeneration.objects.get_or_create(index_name=CHUNKED_INDEX_NAME)
+        SearchIndexGeneration.objects.filter(index_name=CHUNKED_INDEX_NAME).update(generation=F("generation") + 1)
+        cls._memory.clear()
+        cls._generation.clear()
+        return SearchIndexGeneration.objects.get(index_name=CHUNKED_INDEX_NAME).generation
+
+    @staticmethod
+    def make_key(generation: int, mode: str, k: int, filters: Optional[Dict[str, Any]],
+                 query_embedding: Optional[List[float]], query_text: Optional[str]) -> str:
+        digest = hashlib.sha256()
+        # 임베딩은 float16으로 양자화해 해시 (미세한 부동소수점 차이는 같은 키로 취급)
+        if query_embedding is not None:
+            digest.update(np.asarray(query_embedding, dtype=np.float16).tobytes())
+        meta = {
+            "generation": generation,
+            "mode": mode,
+            "k": k,
+            "filters": {key: str(value) for key, value in sorted((filters or {}).items()) if value},
+            # BM25/키워드 리랭킹처럼 결과가 원문에 의존하는 경우에만 전달됨
+            "text": query_text,
+        }
+        digest.update(json.dumps(meta, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        return digest.hexdigest()
+
+    @classmethod
+    def get(cls, key: str) -> Optional[List[Dict[str, Any]]]:
+        cached = cls._memory.get(key)
+        if cached is None:
+            SEARCH_RESULT_CACHE_MISSES.inc()
+            return None
+        SEARCH_RESULT_CACHE_HITS.inc()
+        return [dict(item) for item in cached]
+
+    @classmethod
+    def set(cls, key: str, results: List[Dict[str, Any]]) -> None:
+        cls._memory.set(key, [dict(item) for item in results])
@@ -1,6 +1,16 @@
+import os
+
 from rest_framework import serializers
 from .models import Category, Question
 
+# 판례 일괄 조회 한 번에 받을 수 있는 최대 사건번호 수
+PRECEDENT_BATCH_MAX_SIZE = int(os.environ.get("PRECEDENT_BATCH_MAX_SIZE", 50))
+PRECEDENT_DETAIL_FIELDS = ["case_no", "court", "case_name", "judgment_date", "content", "summary"]
+PRECEDENT_BATCH_FIELDS = ["case_no", "case_title", "judgment_date", "content", "summary"]
+PRECEDENT_BATCH_DEFAULT_FIELDS = ["case_no", "case_title", "judgment_date"]
+# 여러 판례 심층 분석 한 번에 받을 수 있는 최대 판례 수
+CASE_MULTI_ANSWER_MAX_SIZE = int(os.environ.get("CASE_MULTI_ANSWER_MAX_SIZE", 5))
+
 
 class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,6 +26,13 @@ class InitDataSerializer(serializers.ModelSerializer):
         model = Category
         fields = ['category_id', 'name', 'questions']
 
+class SearchFilterSerializer(serializers.Serializer):
+    category = serializers.CharField(required=False, help_text="판례 분류 (예: 형사A(생활형))")
+    court = serializers.CharField(required=False, help_text="법원명 (예: 대법원)")
+    date_from = serializers.DateField(required=False, help_text="선고일 시작 (yyyy-MM-dd)")
+    date_to = serializers.DateField(required=False, help_text="선고일 끝 (yyyy-MM-dd)")
+
+
 class CaseSerializer(serializers.Serializer):
     category = serializers.CharField(required=False, allow_blank=True, default='일반')
     who = serializers.CharField()
@@ -23,6 +40,7 @@ class CaseSerializer(serializers.Serializer):
     what = serializers.CharField()
     want = serializers.CharField()
     detail = serializers.CharField()
+    filters = SearchFilterSerializer(required=False)
 
 
 class PrecedentResultSerializer(serializers.Serializer):
@@ -49,6 +67,54 @@ class PrecedentDetailResponseSerializer(serializers.Serializer):
     data = serializers.DictField()
 
 
+class PrecedentDetailQuerySerializer(serializers.Serializer):
+    fields = serializers.CharField(
+        required=False, help_text=f"쉼표로 구분한 반환 필드 (기본: 전체). 선택: {', '.join(PRECEDENT_DETAIL_FIELDS)}"
+    )
+    offset = serializers.IntegerField(required=False, min_value=0, default=0, help_text="content 시작 위치(문자)")
+    length = serializers.IntegerField(required=False, min_value=1, help_text="content 최대 길이(문자)")
+
+    def validate_fields(self, value):
+        fields = list(dict.fromkeys(field.strip() for field in value.split(",") if field.strip()))
+        unknown = [field for field in fields if field not in PRECEDENT_DETAIL_FIELDS]
+        if not fields or unknown:
+            raise serializers.ValidationError(f"알 수 없는 필드: {', '.join(unknown) or value}")
+        return fields
+
+
+class PrecedentBatchRequestSerializer(serializers.Serializer):
+    case_nos = serializers.ListField(
+        child=serializers.CharField(), allow_empty=False, max_length=PRECEDENT_BATCH_MAX_SIZE,
+        help_text="조회할 판례 사건번호 목록"
+    )
+    fields = serializers.ListField(
+        child=serializers.ChoiceField(choices=PRECEDENT_BATCH_FIELDS), required=False,
+        default=PRECEDENT_BATCH_DEFAULT_FIELDS,
+        help_text="반환할 필드 (기본: 메타데이터만). content: 판례 원문, summary: 저장된 AI 요약(없으면 null, 새로 생성하지 않음)"
+    )
+
+
+class PrecedentBatchResponseSerializer(serializers.Serializer):
+    status = serializers.CharField()
+    data = serializers.DictField(help_text="results: 요청 순서대로의 판례 목록, missing: 찾지 못한 사건번호")
+
+
 class CaseAnswerApiResponseSerializer(serializers.Serializer):
     status = serializers.CharField(default="success")
-    data = serializers.JSONField()
\ No newline at end of file
+    data = serializers.JSONField()
+
+
+class CaseMultiAnswerRequestSerializer(serializers.Serializer):
+    case_id = serializers.IntegerField(help_text="저장된 사건 ID")
+    precedent_ids = serializers.ListField(
+        child=serializers.CharField(), allow_empty=False, max_length=CASE_MULTI_ANSWER_MAX_SIZE,
+        help_text="비교할 판례 사건번호 목록 (앞쪽일수록 유사한 판례)"
+    )
+
+
+class CaseMultiAnswerResponseSerializer(serializers.Serializer):
+    status = serializers.CharField()
+    data = serializers.DictField(
+        help_text="report: 합친 분석 보고서, analyses: 판례별 분석, failed: 판례별 실패 사유(not_found/timeout/오류), "
+                  "elapsed_ms: 전체 소요 시간"
+    )
@@ -1,17 +1,27 @@
 import os
+import math
+import asyncio
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Any
 
 # LangChain 관련 임포트
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 import json
 
 # OpenSearch 관련 임포트
-from opensearchpy import OpenSearch, NotFoundError
+from opensearchpy import OpenSearch, AsyncOpenSearch, NotFoundError
 import google.genai as genai
 
+from .llm_gateway import LLMGateway
+from .telemetry import (
+    track_call, observe_payload,
+    InstrumentedConnection, InstrumentedAsyncConnection, InstrumentedTransport, InstrumentedAsyncTransport,
+)
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # 환경 변수 로드
@@ -23,11 +33,145 @@ OPENSEARCH_PASSWORD = os.environ.get("OPENSEARCH_PASSWORD")
 # OpenSearch precedents_chunked 인덱스와 통일 (gemini-embedding-001 기본 3072 → output_dimensionality로 768 사용)
 EMBEDDING_MODEL_NAME = "gemini-embedding-001"
 EMBEDDING_DIMENSION = 768
+# embed_content 한 번에 묶어 보낼 입력 수 / 동시에 보낼 배치 요청 수
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", 100))
+EMBEDDING_CONCURRENCY = int(os.environ.get("EMBEDDING_CONCURRENCY", 4))
 
+# 유사 판례 검색: kNN 후보 수 = k x 배수, 판례별 집계에 사용할 상위 청크 수(n)와 집계 방식
+# (max: 최고 청크 점수 | mean: 상위 n개 청크 평균 | sum: 상위 n개 청크 합)
+SEARCH_CANDIDATE_MULTIPLIER = int(os.environ.get("SEARCH_CANDIDATE_MULTIPLIER", 10))
+SEARCH_CHUNKS_PER_PRECEDENT = int(os.environ.get("SEARCH_CHUNKS_PER_PRECEDENT", 3))
+SEARCH_SCORE_AGGREGATION = os.environ.get("SEARCH_SCORE_AGGREGATION", "max").lower()
+# 색인 시 선택한 유사도 공간 (l2 | cosinesimil | innerproduct). 2단계 검색의 정확 재채점에도 사용
+VECTOR_SPACE_TYPE = os.environ.get("VECTOR_SPACE_TYPE", "l2").lower()
 
-class GeminiService:
-    _llm: Optional[ChatGoogleGenerativeAI] = None
+# 2단계(Matryoshka) 검색: 임베딩 앞부분 COMPACT_EMBEDDING_DIMENSION차원(128/256, 재정규화)으로
+# 1차 kNN 후보를 넓게(일반 후보 수 x SEARCH_TWO_STAGE_EXPANSION) 뽑은 뒤 768차원 벡터로 정확히 재채점.
+# 색인 스크립트는 COMPACT_EMBEDDING_DIMENSION이 0이 아니면 두 필드를 모두 기록합니다.
+COMPACT_EMBEDDING_DIMENSION = int(os.environ.get("COMPACT_EMBEDDING_DIMENSION", 256))
+SEARCH_TWO_STAGE = os.environ.get("SEARCH_TWO_STAGE", "false").lower() == "true"
+SEARCH_TWO_STAGE_EXPANSION = int(os.environ.get("SEARCH_TWO_STAGE_EXPANSION", 4))
+
+
+def compact_embedding(vector, dimension: int = COMPACT_EMBEDDING_DIMENSION) -> List[float]:
+    """Matryoshka 임베딩의 앞 dimension차원을 잘라 L2 정규화 (output_dimensionality=dimension과 같은 효과)"""
+    head = [float(x) for x in vector[:dimension]]
+    norm = math.sqrt(sum(x * x for x in head)) or 1.0
+    return [x / norm for x in head]
+
+
+class EmbeddingProvider:
+    """프로세스 전체에서 하나의 genai.Client(연결 풀 유지)를 재사용하는 임베딩 제공자"""
+    _client: Optional[genai.Client] = None
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls) -> genai.Client:
+        if cls._client is None:
+            with cls._lock:
+                if cls._client is None:
+                    api_key = os.environ.get("GEMINI_API_KEY")
+                    if not api_key:
+                        raise ValueError("GEMINI_API_KEY가 설정되지 않았습니다.")
+                    cls._client = genai.Client(api_key=api_key)
+        return cls._client
+
+    @classmethod
+    def get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=EMBEDDING_CONCURRENCY, thread_name_prefix="embedding"
+                    )
+        return cls._executor
+
+    @classmethod
+    def _embed_batch(cls, texts: List[str], task_type: str) -> List[List[float]]:
+        model = GeminiService._clean_model_name(EMBEDDING_MODEL_NAME)
+        # gemini-embedding-001 기본 출력은 3072차원. OpenSearch 인덱스에 맞추기 위해 output_dimensionality 명시
+        config = {"task_type": task_type, "output_dimensionality": EMBEDDING_DIMENSION}
+        observe_payload("gemini", "embed", sent=sum(len(text.encode("utf-8")) for text in texts))
+        try:
+            with track_call("gemini", "embed", model):
+                embedding_result = cls.get_client().models.embed_content(
+                    model=model,
+                    contents=texts,
+                    config=config
+                )
+        except Exception as e:
+            logging.error(f"Embedding API Error (Model: {model}, batch={len(texts)}): {str(e)}")
+            raise e
 
+        embeddings = embedding_result.embeddings or []
+        if len(embeddings) != len(texts):
+            raise ValueError(f"임베딩 결과 개수 불일치: 요청 {len(texts)}건, 응답 {len(embeddings)}건")
+        return [e.values for e in embeddings]
+
+    @classmethod
+    def create_embeddings(cls, texts: List[str], is_query: bool = True,
+                          batch_size: Optional[int] = None) -> List[List[float]]:
+        """texts를 batch_size 단위로 묶어 embed_content를 호출하고, 배치들은 동시에 요청합니다.
+        반환 순서는 입력 순서와 같습니다."""
+        if not texts:
+            return []
+        task_type = "RETRIEVAL_QUERY" if is_query else "RETRIEVAL_DOCUMENT"
+        size = batch_size or EMBEDDING_BATCH_SIZE
+        batches = [texts[i:i + size] for i in range(0, len(texts), size)]
+
+        if len(batches) == 1:
+            return cls._embed_batch(batches[0], task_type)
+
+        results = cls.get_executor().map(lambda b: cls._embed_batch(b, task_type), batches)
+        return [vector for batch in results for vector in batch]
+
+    @classmethod
+    async def _aembed_batch(cls, texts: List[str], task_type: str, semaphore: asyncio.Semaphore) -> List[List[float]]:
+        model = GeminiService._clean_model_name(EMBEDDING_MODEL_NAME)
+        config = {"task_type": task_type, "output_dimensionality": EMBEDDING_DIMENSION}
+        observe_payload("gemini", "embed", sent=sum(len(text.encode("utf-8")) for text in texts))
+        async with semaphore:
+            try:
+                with track_call("gemini", "embed", model):
+                    embedding_result = await cls.get_client().aio.models.embed_content(
+                        model=model,
+                        contents=texts,
+                        config=config
+                    )
+            except Exception as e:
+                logging.error(f"Embedding API Error (Model: {model}, batch={len(texts)}): {str(e)}")
+                raise e
+
+        embeddings = embedding_result.embeddings or []
+        if len(embeddings) != len(texts):
+            raise ValueError(f"임베딩 결과 개수 불일치: 요청 {len(texts)}건, 응답 {len(embeddings)}건")
+        return [e.values for e in embeddings]
+
+    @classmethod
+    async def acreate_embeddings(cls, texts: List[str], is_query: bool = True,
+                                 batch_size: Optional[int] = None) -> List[List[float]]:
+        """create_embeddings의 비동기 버전 (ASGI 뷰용, 이벤트 루프를 막지 않음)"""
+        if not texts:
+            return []
+        task_type = "RETRIEVAL_QUERY" if is_query else "RETRIEVAL_DOCUMENT"
+        size = batch_size or EMBEDDING_BATCH_SIZE
+        semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+        results = await asyncio.gather(*[
+            cls._aembed_batch(texts[i:i + size], task_type, semaphore) for i in range(0, len(texts), size)
+        ])
+        return [vector for batch in results for vector in batch]
+
+
+# summary_chain 프롬프트를 바꾸면 반드시 올릴 것: 저장된 판례 요약(PrecedentSummary)이 이 버전으로 무효화됩니다.
+SUMMARY_PROMPT_VERSION = "v1"
+# analysis_chain 프롬프트나 analysis_inputs를 바꾸면 올릴 것: 저장된 심층 분석(CaseAnalysis)이 무효화됩니다.
+ANALYSIS_PROMPT_VERSION = "v2"
+# 심층 분석 JSON의 최상위 섹션 (프롬프트에 적은 순서대로 생성됨)
+ANALYSIS_SECTIONS = ("outcome_prediction", "action_roadmap", "legal_foundation")
+
+
+class GeminiService:
     @staticmethod
     def _clean_model_name(model_name: str) -> str:
         """SDK 오류 방지를 위해 'models/' 접두사 제거 및 공백 정제"""
@@ -38,55 +182,30 @@ class GeminiService:
         return cleaned
 
     @classmethod
-    def get_llm(cls, temperature: float = 0.0) -> ChatGoogleGenerativeAI:
-        if cls._llm is None:
-            api_key = os.environ.get("GEMINI_API_KEY")
-            if not api_key:
-                raise ValueError("GEMINI_API_KEY가 설정되지 않았습니다.")
-
-            # 환경변수에서 실시간으로 모델명을 읽어와 정제
-            raw_gemini_model = os.environ.get("GEMINI_MODEL", "gemini-1.5-flash")
-            model = cls._clean_model_name(raw_gemini_model)
-            
-            cls._llm = ChatGoogleGenerativeAI(
-                model=model,
-                google_api_key=api_key,
-                temperature=temperature,
-                max_output_tokens=4096,
-                top_p=0.95,
-            )
-        return cls._llm
+    def llm_model_name(cls) -> str:
+        return LLMGateway.model_name()
 
     @classmethod
-    def create_embedding(cls, content: str, is_query: bool = True) -> List[float]:
-        api_key = os.environ.get("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY가 설정되지 않았습니다.")
-            
-        client = genai.Client(api_key=api_key)
-        model = cls._clean_model_name(EMBEDDING_MODEL_NAME)
-        task_type = "RETRIEVAL_QUERY" if is_query else "RETRIEVAL_DOCUMENT"
-        # gemini-embedding-001 기본 출력은 3072차원. OpenSearch 인덱스에 맞추기 위해 output_dimensionality 명시
-        config = {"task_type": task_type, "output_dimensionality": EMBEDDING_DIMENSION}
+    def get_llm(cls, temperature: float = 0.0) -> ChatGoogleGenerativeAI:
+        # 클라이언트는 (모델, temperature, 최대 출력 토큰, top_p)별로 LLMGateway가 캐시
+        return LLMGateway.client(temperature=temperature, max_output_tokens=4096, top_p=0.95)
 
-        try:
-            embedding_result = client.models.embed_content(
-                model=model,
-                contents=content,
-                config=config
-            )
-        except Exception as e:
-            logging.error(f"Embedding API Error (Model: {model}): {str(e)}")
-            raise e
+    @classmethod
+    def instrumented_llm(cls, operation: str, temperature: float = 0.0):
+        """호출마다 소요 시간·토큰·실패를 operation 라벨로 기록하는 LLM (LLMGateway의 동시 호출 제한·재시도·차단기 적용)"""
+        return LLMGateway.llm(operation, temperature=temperature, max_output_tokens=4096, top_p=0.95)
 
-        if not embedding_result.embeddings:
-            raise ValueError("임베딩 결과를 찾을 수 없습니다.")
+    @classmethod
+    def create_embedding(cls, content: str, is_query: bool = True) -> List[float]:
+        return EmbeddingProvider.create_embeddings([content], is_query=is_query)[0]
 
-        return embedding_result.embeddings[0].values
+    @classmethod
+    async def acreate_embedding(cls, content: str, is_query: bool = True) -> List[float]:
+        return (await EmbeddingProvider.acreate_embeddings([content], is_query=is_query))[0]
 
     @classmethod
-    def summarize_precedent_langchain(cls, precedent_content: str) -> dict:
-        llm = cls.get_llm()
+    def summary_chain(cls):
+        llm = cls.instrumented_llm("summarize")
         
         template = """
         당신은 판결문의 핵심 법리와 결과를 통찰력 있게 분석하는 법률 전문가입니다.
@@ -113,21 +232,43 @@ class GeminiService:
         """
         
         prompt = PromptTemplate.from_template(template)
-        chain = prompt | llm | JsonOutputParser()
-        return chain.invoke({"precedent_content": precedent_content})
+        return prompt | llm | JsonOutputParser()
 
     @classmethod
-    def analyze_case_deeply(cls, user_situation: Dict[str, Any], content_text: str) -> Dict[str, Any]:
-        llm = cls.get_llm()
-        
+    def summarize_precedent_langchain(cls, precedent_content: str, config: Optional[Dict[str, Any]] = None) -> dict:
+        # config: LangChain RunnableConfig (예: 토큰 사용량 집계용 callbacks)
+        return cls.summary_chain().invoke({"precedent_content": precedent_content}, config=config)
+
+    @classmethod
+    async def asummarize_precedent_langchain(cls, precedent_content: str,
+                                             config: Optional[Dict[str, Any]] = None) -> dict:
+        return await cls.summary_chain().ainvoke({"precedent_content": precedent_content}, config=config)
+
+    @classmethod
+    def stream_summary(cls, precedent_content: str, config: Optional[Dict[str, Any]] = None):
+        """요약 JSON을 생성되는 대로 점점 채워지는 부분 객체(dict)로 반환 (JsonOutputParser 스트리밍)"""
+        return cls.summary_chain().stream({"precedent_content": precedent_content}, config=config)
+
+    @classmethod
+    def astream_summary(cls, precedent_content: str, config: Optional[Dict[str, Any]] = None):
+        return cls.summary_chain().astream({"precedent_content": precedent_content}, config=config)
+
+    @staticmethod
+    def analysis_inputs(user_situation: Dict[str, Any], content_text: str) -> Dict[str, str]:
         situation_str = (
             f"대상: {user_situation.get('who', '')} / "
             f"사건: {user_situation.get('what', '')}\n"
             f"상세 내용: {user_situation.get('detail', '')}\n"
             f"요구사항: {user_situation.get('want', '법적 조언')}"
         )
-        precedent_str = content_text[:10000]
+        # 판례 원문 길이는 PrecedentContextSelector가 이미 정했으므로 그대로 넣음
+        return {
+            "situation_text": situation_str,
+            "formatted_precedent": content_text
+        }
 
+    @classmethod
+    def analysis_prompt(cls) -> ChatPromptTemplate:
         template = """당신은 대한민국 법률 전문가입니다. 사용자의 상황과 참고 판례를 정밀하게 비교 분석하여 보고서를 작성하세요.
     
         [사용자 상황]
@@ -175,16 +316,37 @@ class GeminiService:
           }}
         }}"""
 
-        prompt = ChatPromptTemplate.from_template(template)
-        chain = prompt | llm | JsonOutputParser()
+        return ChatPromptTemplate.from_template(template)
 
-        return chain.invoke({
-            "situation_text": situation_str,
-            "formatted_precedent": precedent_str
-        })
+    @classmethod
+    def analysis_chain(cls):
+        return cls.analysis_prompt() | cls.instrumented_llm("analyze") | JsonOutputParser()
+
+    @classmethod
+    def analysis_text_chain(cls):
+        """스트리밍용: JSON 해석 없이 LLM 출력 텍스트 조각을 그대로 반환 (cases.json_stream.JsonSectionParser로 해석)"""
+        return cls.analysis_prompt() | cls.instrumented_llm("analyze") | StrOutputParser()
+
+    @classmethod
+    def analyze_case_deeply(cls, user_situation: Dict[str, Any], content_text: str) -> Dict[str, Any]:
+        return cls.analysis_chain().invoke(cls.analysis_inputs(user_situation, content_text))
+
+    @classmethod
+    async def aanalyze_case_deeply(cls, user_situation: Dict[str, Any], content_text: str) -> Dict[str, Any]:
+        return await cls.analysis_chain().ainvoke(cls.analysis_inputs(user_situation, content_text))
+
+    @classmethod
+    def stream_analysis(cls, user_situation: Dict[str, Any], content_text: str):
+        """심층 분석 JSON 텍스트를 생성되는 대로 조각(str) 단위로 반환"""
+        return cls.analysis_text_chain().stream(cls.analysis_inputs(user_situation, content_text))
+
+    @classmethod
+    def astream_analysis(cls, user_situation: Dict[str, Any], content_text: str):
+        return cls.analysis_text_chain().astream(cls.analysis_inputs(user_situation, content_text))
 
 class OpenSearchService:
     _client: Optional[OpenSearch] = None
+    _async_client: Optional[AsyncOpenSearch] = None
 
     @classmethod
     def get_client(cls) -> OpenSearch:
@@ -196,53 +358,306 @@ class OpenSearchService:
                 verify_certs=True,
                 retry_on_timeout=True,
                 max_retries=3,
+                connection_class=InstrumentedConnection,
+                transport_class=InstrumentedTransport,
             )
         return cls._client
 
+    @classmethod
+    def get_async_client(cls) -> AsyncOpenSearch:
+        """ASGI 뷰용 비동기 클라이언트 (aiohttp 연결 풀, 워커 프로세스의 이벤트 루프에서 재사용)"""
+        if cls._async_client is None:
+            cls._async_client = AsyncOpenSearch(
+                hosts=[{"host": OPENSEARCH_HOST, "port": OPENSEARCH_PORT}],
+                http_auth=(OPENSEARCH_USERNAME, OPENSEARCH_PASSWORD),
+                use_ssl=True,
+                verify_certs=True,
+                retry_on_timeout=True,
+                max_retries=3,
+                connection_class=InstrumentedAsyncConnection,
+                transport_class=InstrumentedAsyncTransport,
+            )
+        return cls._async_client
+
     @classmethod
     def check_connection(cls) -> bool:
         try:
-            return cls.get_client().ping()
+            with track_call("opensearch", "ping", "-"):
+                return cls.get_client().ping()
         except Exception:
             return False
 
+    @staticmethod
+    def build_filter_clauses(filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """검색 필터(category, court, date_from, date_to)를 OpenSearch bool filter 절로 변환"""
+        if not filters:
+            return []
+        clauses = []
+        for field in ("category", "court"):
+            if filters.get(field):
+                clauses.append({"term": {field: filters[field]}})
+        date_range = {}
+        if filters.get("date_from"):
+            date_range["gte"] = str(filters["date_from"])
+        if filters.get("date_to"):
+            date_range["lte"] = str(filters["date_to"])
+        if date_range:
+            clauses.append({"range": {"date": date_range}})
+        return clauses
+
+    @staticmethod
+    def aggregate_chunk_scores(scores: List[float]) -> float:
+        """한 판례에 속한 청크 점수들을 하나의 유사도로 집계 (SEARCH_SCORE_AGGREGATION)"""
+        if not scores:
+            return 0.0
+        if SEARCH_SCORE_AGGREGATION == "mean":
+            return sum(scores) / len(scores)
+        if SEARCH_SCORE_AGGREGATION == "sum":
+            return sum(scores)
+        return max(scores)
+
+    @staticmethod
+    def _collapse_clause() -> Dict[str, Any]:
+        # 판례 id 기준 서버 측 collapse: 긴 판례가 청크 여러 개로 상위 결과를 독점하지 않도록 함
+        return {
+            "field": "id",
+            "inner_hits": {"name": "chunks", "size": SEARCH_CHUNKS_PER_PRECEDENT, "_source": False},
+        }
+
+    @staticmethod
+    def _result_size(k: int, n_candidates: int) -> int:
+        # max 집계는 collapse 대표 청크 순서와 같으므로 k개만, 그 외 집계는 후보 전체를 받아 재정렬
+        return k if SEARCH_SCORE_AGGREGATION == "max" else n_candidates
+
     @classmethod
-    def search_similar_precedents(cls, query_embedding: List[float], k: int = 5) -> List[Dict[str, Any]]:
-        client = cls.get_client()
-        knn_query = {
-            "size": 50,
-            "_source": {"excludes": ["content_embedding"]},
-            "query": {"knn": {"content_embedding": {"vector": query_embedding, "k": 50}}}
+    def build_knn_body(cls, query_embedding: List[float], k: int,
+                       filters: Optional[Dict[str, Any]] = None,
+                       two_stage: Optional[bool] = None,
+                       space_type: str = VECTOR_SPACE_TYPE) -> Dict[str, Any]:
+        """
+        kNN 검색 본문. two_stage가 None이면 SEARCH_TWO_STAGE 설정을 따릅니다.
+        space_type은 2단계 재채점 점수 공간으로, 검색 대상 인덱스의 매핑과 같아야 합니다.
+        """
+        two_stage = SEARCH_TWO_STAGE if two_stage is None else two_stage
+        n_candidates = max(k * SEARCH_CANDIDATE_MULTIPLIER, k)
+        if two_stage:
+            knn_clause: Dict[str, Any] = {
+                "vector": compact_embedding(query_embedding), "k": n_candidates * SEARCH_TWO_STAGE_EXPANSION
+            }
+        else:
+            knn_clause = {"vector": query_embedding, "k": n_candidates}
+        filter_clauses = cls.build_filter_clauses(filters)
+        if filter_clauses:
+            # efficient filtering: 필터를 kNN 그래프 탐색 단계에 적용 (사후 필터링으로 결과가 줄어드는 문제 방지)
+            knn_clause["filter"] = {"bool": {"filter": filter_clauses}}
+
+        if two_stage:
+            # 1차: compact 필드 kNN 후보 → 2차: 후보만 768차원 벡터로 정확 점수 계산 (knn_score 스크립트)
+            query = {"script_score": {
+                "query": {"knn": {"compact_embedding": knn_clause}},
+                "script": {"source": "knn_score", "lang": "knn", "params": {
+                    "field": "content_embedding",
+                    "query_value": query_embedding,
+                    "space_type": space_type,
+                }},
+            }}
+        else:
+            query = {"knn": {"content_embedding": knn_clause}}
+        return {
+            "size": cls._result_size(k, n_candidates),
+            "_source": {"excludes": ["content_embedding", "compact_embedding"]},
+            "query": query,
+            "collapse": cls._collapse_clause(),
         }
-        
-        response = client.search(index="precedents_chunked", body=knn_query)
-        unique_precedents = {}
-        
+
+    @classmethod
+    def build_lexical_body(cls, query_text: str, k: int,
+                           filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """chunk_content(text) 대상 BM25 검색. 임베딩 호출이 필요 없습니다."""
+        n_candidates = max(k * SEARCH_CANDIDATE_MULTIPLIER, k)
+        return {
+            "size": cls._result_size(k, n_candidates),
+            "_source": {"excludes": ["content_embedding", "compact_embedding"]},
+            "query": {"bool": {
+                "must": [{"match": {"chunk_content": {"query": query_text}}}],
+                "filter": cls.build_filter_clauses(filters),
+            }},
+            "collapse": cls._collapse_clause(),
+        }
+
+    @classmethod
+    def parse_collapsed_hits(cls, response: Dict[str, Any], k: int) -> List[Dict[str, Any]]:
+        results = []
         for hit in response['hits']['hits']:
             source = hit['_source']
-            p_id = source.get('id')
-            if p_id and p_id not in unique_precedents:
-                unique_precedents[p_id] = {
-                    "case_No": source.get("id"),
-                    "case_name": source.get("caseNm"),
-                    "case_title": source.get("title"),
-                    "law_category": source.get("category"),
-                    "law_subcategory": source.get("subcategory"),
-                    "court": source.get("court"),
-                    "judgment_date": source.get("date"),
-                    "similarity": hit['_score'],
-                    "preview": source.get("preview")
-                }
-            if len(unique_precedents) >= k: break
-        return list(unique_precedents.values())
-
-    @classmethod
-    def get_precedent_by_case_number(cls, case_no: str) -> Optional[Dict[str, Any]]:
+            inner = hit.get('inner_hits', {}).get('chunks', {}).get('hits', {}).get('hits', [])
+            chunk_scores = [h['_score'] for h in inner if h.get('_score') is not None] or [hit['_score']]
+            results.append({
+                "case_No": source.get("id"),
+                "case_name": source.get("caseNm"),
+                "case_title": source.get("title"),
+                "law_category": source.get("category"),
+                "law_subcategory": source.get("subcategory"),
+                "court": source.get("court"),
+                "judgment_date": source.get("date"),
+                "similarity": cls.aggregate_chunk_scores(chunk_scores),
+                "preview": source.get("preview") or source.get("chunk_content"),
+                "keywords": source.get("keywords") or [],
+            })
+        results.sort(key=lambda r: r["similarity"], reverse=True)
+        return results[:k]
+
+    @classmethod
+    def search_similar_precedents(cls, query_embedding: List[float], k: int = 5,
+                                  filters: Optional[Dict[str, Any]] = None,
+                                  two_stage: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """kNN 유사 판례 검색. two_stage=True면 compact 필드 1차 검색 + 768차원 재채점 (None이면 SEARCH_TWO_STAGE)"""
         client = cls.get_client()
+        body = cls.build_knn_body(query_embedding, k, filters, two_stage=two_stage)
+        with track_call("opensearch", "knn", "precedents_chunked"):
+            response = client.search(index="precedents_chunked", body=body)
+        return cls.parse_collapsed_hits(response, k)
+
+    @classmethod
+    def search_lexical_precedents(cls, query_text: str, k: int = 5,
+                                  filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        client = cls.get_client()
+        with track_call("opensearch", "lexical", "precedents_chunked"):
+            response = client.search(index="precedents_chunked", body=cls.build_lexical_body(query_text, k, filters))
+        return cls.parse_collapsed_hits(response, k)
+
+    @classmethod
+    def search_hybrid_precedents(cls, query_text: str, query_embedding: List[float], k: int = 5,
+                                 filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """kNN 쿼리와 BM25 쿼리를 msearch 한 번의 왕복으로 실행하고, 각 경로의 서버 측 소요 시간(took)을 함께 반환"""
+        client = cls.get_client()
+        body = [
+            {"index": "precedents_chunked"}, cls.build_knn_body(query_embedding, k, filters),
+            {"index": "precedents_chunked"}, cls.build_lexical_body(query_text, k, filters),
+        ]
+        with track_call("opensearch", "hybrid", "precedents_chunked"):
+            vector_resp, lexical_resp = client.msearch(body=body)['responses']
+        for resp in (vector_resp, lexical_resp):
+            if resp.get('error'):
+                raise ValueError(f"하이브리드 검색 오류: {resp['error']}")
+        return {
+            "vector": cls.parse_collapsed_hits(vector_resp, k),
+            "lexical": cls.parse_collapsed_hits(lexical_resp, k),
+            "took_ms": {"vector": vector_resp.get('took'), "lexical": lexical_resp.get('took')},
+        }
+
+    @classmethod
+    async def asearch_similar_precedents(cls, query_embedding: List[float], k: int = 5,
+                                         filters: Optional[Dict[str, Any]] = None,
+                                         two_stage: Optional[bool] = None) -> List[Dict[str, Any]]:
+        client = cls.get_async_client()
+        body = cls.build_knn_body(query_embedding, k, filters, two_stage=two_stage)
+        with track_call("opensearch", "knn", "precedents_chunked"):
+            response = await client.search(index="precedents_chunked", body=body)
+        return cls.parse_collapsed_hits(response, k)
+
+    @classmethod
+    async def asearch_lexical_precedents(cls, query_text: str, k: int = 5,
+                                         filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        client = cls.get_async_client()
+        with track_call("opensearch", "lexical", "precedents_chunked"):
+            response = await client.search(
+                index="precedents_chunked", body=cls.build_lexical_body(query_text, k, filters)
+            )
+        return cls.parse_collapsed_hits(response, k)
+
+    @classmethod
+    async def asearch_hybrid_precedents(cls, query_text: str, query_embedding: List[float], k: int = 5,
+                                        filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        client = cls.get_async_client()
+        body = [
+            {"index": "precedents_chunked"}, cls.build_knn_body(query_embedding, k, filters),
+            {"index": "precedents_chunked"}, cls.build_lexical_body(query_text, k, filters),
+        ]
+        with track_call("opensearch", "hybrid", "precedents_chunked"):
+            vector_resp, lexical_resp = (await client.msearch(body=body))['responses']
+        for resp in (vector_resp, lexical_resp):
+            if resp.get('error'):
+                raise ValueError(f"하이브리드 검색 오류: {resp['error']}")
+        return {
+            "vector": cls.parse_collapsed_hits(vector_resp, k),
+            "lexical": cls.parse_collapsed_hits(lexical_resp, k),
+            "took_ms": {"vector": vector_resp.get('took'), "lexical": lexical_resp.get('took')},
+        }
+
+    @classmethod
+    def get_precedent_by_case_number(cls, case_no: str,
+                                     fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """fields를 주면 _source 중 해당 필드만 전송받습니다."""
+        client = cls.get_client()
+        params = {"_source_includes": ",".join(fields)} if fields is not None else {}
         try:
-            response = client.get(index="precedents", id=case_no)
-            return response['_source']
+            with track_call("opensearch", "get", "precedents", ignore=(NotFoundError,)):
+                response = client.get(index="precedents", id=case_no, params=params)
+            return response.get('_source', {})
         except NotFoundError:
             return None
         except Exception as e:
             raise ValueError(f"판례 조회 중 오류 발생: {str(e)}")
+
+    @classmethod
+    async def aget_precedent_by_case_number(cls, case_no: str,
+                                            fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        client = cls.get_async_client()
+        params = {"_source_includes": ",".join(fields)} if fields is not None else {}
+        try:
+            with track_call("opensearch", "get", "precedents", ignore=(NotFoundError,)):
+                response = await client.get(index="precedents", id=case_no, params=params)
+            return response.get('_source', {})
+        except NotFoundError:
+            return None
+        except Exception as e:
+            raise ValueError(f"판례 조회 중 오류 발생: {str(e)}")
+
+    @classmethod
+    def get_chunk_vectors(cls, case_no: str) -> List[Dict[str, Any]]:
+        """precedents_chunked에 색인된 판례의 청크 원문과 임베딩 (로컬 벡터 인덱스가 없을 때 사용)"""
+        client = cls.get_client()
+        body = {
+            "size": 500,
+            "query": {"term": {"id": case_no}},
+            "_source": {"includes": ["chunk_content", "content_embedding"]},
+        }
+        with track_call("opensearch", "chunks", "precedents_chunked"):
+            response = client.search(index="precedents_chunked", body=body)
+        return [hit["_source"] for hit in response["hits"]["hits"] if hit["_source"].get("content_embedding")]
+
+    @staticmethod
+    def _mget_body(case_nos: List[str], fields: Optional[List[str]]) -> Dict[str, Any]:
+        body: Dict[str, Any] = {"ids": [str(case_no) for case_no in case_nos]}
+        if fields is not None:
+            # 필요한 필드만 전송받아 목록 화면에서 판례 원문을 내려받지 않도록 함
+            body["_source"] = {"includes": fields}
+        return body
+
+    @classmethod
+    def get_precedents_by_case_numbers(cls, case_nos: List[str],
+                                       fields: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """여러 판례를 mget 한 번으로 조회 (사건번호 → _source, 없는 판례는 제외)"""
+        if not case_nos:
+            return {}
+        client = cls.get_client()
+        try:
+            with track_call("opensearch", "mget", "precedents"):
+                response = client.mget(index="precedents", body=cls._mget_body(case_nos, fields))
+        except Exception as e:
+            raise ValueError(f"판례 조회 중 오류 발생: {str(e)}")
+        return {doc["_id"]: doc.get("_source", {}) for doc in response["docs"] if doc.get("found")}
+
+    @classmethod
+    async def aget_precedents_by_case_numbers(cls, case_nos: List[str],
+                                              fields: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        if not case_nos:
+            return {}
+        client = cls.get_async_client()
+        try:
+            with track_call("opensearch", "mget", "precedents"):
+                response = await client.mget(index="precedents", body=cls._mget_body(case_nos, fields))
+        except Exception as e:
+            raise ValueError(f"판례 조회 중 오류 발생: {str(e)}")
+        return {doc["_id"]: doc.get("_source", {}) for doc in response["docs"] if doc.get("found")}
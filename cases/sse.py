@@ -0,0 +1,57 @@
+import json
+from typing import Any, AsyncIterator, Iterator, Tuple, Union
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+# Server-Sent Events 응답 헬퍼.
+# 이벤트는 "event: <이름>\ndata: <JSON>\n\n" 형식이며, 클라이언트는 EventSource 또는 fetch 스트림으로 읽습니다.
+
+EVENT_STREAM = "text/event-stream"
+Event = Tuple[str, Any]
+
+
+def wants_event_stream(request) -> bool:
+    """Accept: text/event-stream 헤더 또는 ?stream=1 쿼리로 SSE 모드를 요청했는지 확인"""
+    if request.GET.get("stream", "").lower() in ("1", "true"):
+        return True
+    return EVENT_STREAM in request.headers.get("Accept", "")
+
+
+def format_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _encode(events: Iterator[Event]) -> Iterator[str]:
+    for event, data in events:
+        yield format_event(event, data)
+
+
+async def _aencode(events: AsyncIterator[Event]) -> AsyncIterator[str]:
+    async for event, data in events:
+        yield format_event(event, data)
+
+
+def event_stream_response(events: Union[Iterator[Event], AsyncIterator[Event]]) -> StreamingHttpResponse:
+    """(이벤트 이름, 데이터) 이터레이터를 SSE 스트리밍 응답으로 감쌉니다 (ASGI에서는 비동기 이터레이터)."""
+    body = _aencode(events) if hasattr(events, "__aiter__") else _encode(events)
+    response = StreamingHttpResponse(body, content_type=f"{EVENT_STREAM}; charset=utf-8")
+    response["Cache-Control"] = "no-cache"
+    # 리버스 프록시(nginx 등)가 이벤트를 모아서 보내지 않도록 버퍼링 해제
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Accept: text/event-stream 요청이 DRF 콘텐츠 협상(406)에서 거부되지 않도록 등록하는 렌더러.
+    실제 스트림은 event_stream_response가 만들고, 오류 응답 등 일반 데이터는 JSON 문자열로 렌더링합니다.
+    """
+    media_type = EVENT_STREAM
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (str, bytes)):
+            return data
+        return json.dumps(data, ensure_ascii=False)
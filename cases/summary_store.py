@@ -0,0 +1,309 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from datetime import timedelta
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+
+from .metrics import PRECEDENT_SUMMARY_REQUESTS
+from .models import PrecedentSummary
+from .service import GeminiService, SUMMARY_PROMPT_VERSION
+from .single_flight import SingleFlight, AsyncSingleFlight
+
+# 요약 생성 점유(lease) 시간, 다른 요청의 생성 결과를 기다리는 최대 시간과 확인 간격(초)
+SUMMARY_LEASE_SECONDS = int(os.environ.get("SUMMARY_LEASE_SECONDS", 120))
+SUMMARY_WAIT_TIMEOUT = float(os.environ.get("SUMMARY_WAIT_TIMEOUT", 90))
+SUMMARY_POLL_INTERVAL = float(os.environ.get("SUMMARY_POLL_INTERVAL", 0.5))
+
+SummaryKey = Tuple[str, str, str]
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+class PrecedentSummaryStore:
+    """
+    판례 요약 read-through 저장소 (Postgres).
+    키는 (사건번호, 원문 해시, SUMMARY_PROMPT_VERSION)이므로 원문이 바뀌거나 프롬프트 버전을 올리면 새로 생성합니다.
+
+    같은 키의 동시 미스는 한 번의 LLM 호출로 합칩니다.
+    - 같은 프로세스: SingleFlight로 먼저 온 요청만 진행하고 나머지는 결과를 공유
+    - 워커 간: 유니크 제약으로 pending 행을 먼저 넣은 워커만 생성하고, 나머지는 ready가 될 때까지 폴링
+      (생성 워커가 죽으면 lease_until 이후 다른 워커가 인계)
+    저장소(DB) 장애 시에는 요약을 직접 생성해 응답합니다.
+    """
+    _flight = SingleFlight()
+    _aflight = AsyncSingleFlight()
+
+    @staticmethod
+    def make_key(case_no: str, content: str) -> SummaryKey:
+        return str(case_no), content_hash(content), SUMMARY_PROMPT_VERSION
+
+    @staticmethod
+    def _filter(key: SummaryKey):
+        case_no, digest, version = key
+        return PrecedentSummary.objects.filter(case_no=case_no, content_hash=digest, prompt_version=version)
+
+    @classmethod
+    def _lookup(cls, key: SummaryKey) -> Optional[PrecedentSummary]:
+        return cls._filter(key).only("id", "status", "summary", "lease_until").first()
+
+    @classmethod
+    def _claim(cls, key: SummaryKey, row: Optional[PrecedentSummary]) -> bool:
+        """생성 권한 획득 시 True (pending 행 삽입 또는 만료된 점유 인계)"""
+        now = timezone.now()
+        lease_until = now + timedelta(seconds=SUMMARY_LEASE_SECONDS)
+        if row is None:
+            case_no, digest, version = key
+            try:
+                with transaction.atomic():
+                    PrecedentSummary.objects.create(
+                        case_no=case_no, content_hash=digest, prompt_version=version,
+                        status=PrecedentSummary.STATUS_PENDING, lease_until=lease_until,
+                    )
+                return True
+            except IntegrityError:
+                return False
+        if row.status == PrecedentSummary.STATUS_PENDING and (row.lease_until is None or row.lease_until < now):
+            # 조건부 UPDATE로 여러 워커 중 하나만 인계
+            return PrecedentSummary.objects.filter(
+                pk=row.pk, status=PrecedentSummary.STATUS_PENDING, lease_until=row.lease_until
+            ).update(lease_until=lease_until) == 1
+        return False
+
+    @classmethod
+    def _store(cls, key: SummaryKey, summary: Dict[str, Any]) -> None:
+        try:
+            cls._filter(key).update(
+                summary=summary,
+                status=PrecedentSummary.STATUS_READY,
+                lease_until=None,
+                model_name=GeminiService.llm_model_name(),
+                updated_at=timezone.now(),
+            )
+            # 같은 판례의 이전 원문/프롬프트 버전 요약은 더 이상 조회되지 않으므로 정리
+            # (다른 버전을 생성 중인 워커의 pending 행은 점유 표시이므로 남김)
+            case_no, digest, version = key
+            PrecedentSummary.objects.filter(case_no=case_no, status=PrecedentSummary.STATUS_READY).exclude(
+                content_hash=digest, prompt_version=version
+            ).delete()
+        except DatabaseError as e:
+            logging.warning(f"Precedent summary store write error: {str(e)}")
+
+    @classmethod
+    def _release(cls, key: SummaryKey) -> None:
+        """생성 실패 시 pending 행을 지워 다른 요청이 바로 재시도할 수 있게 함"""
+        try:
+            cls._filter(key).filter(status=PrecedentSummary.STATUS_PENDING).delete()
+        except DatabaseError as e:
+            logging.warning(f"Precedent summary store release error: {str(e)}")
+
+    @classmethod
+    def _poll(cls, key: SummaryKey, waited: bool) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """(저장된 요약, 생성 권한 획득 여부)"""
+        row = cls._lookup(key)
+        if row is not None and row.status == PrecedentSummary.STATUS_READY:
+            PRECEDENT_SUMMARY_REQUESTS.labels(result="waited" if waited else "hit").inc()
+            return row.summary, False
+        return None, cls._claim(key, row)
+
+    # --- 동기 경로 (WSGI) ---
+
+    @classmethod
+    def _generate(cls, key: SummaryKey, content: str, config=None) -> Dict[str, Any]:
+        try:
+            summary = GeminiService.summarize_precedent_langchain(content, config=config)
+        except Exception:
+            cls._release(key)
+            raise
+        cls._store(key, summary)
+        PRECEDENT_SUMMARY_REQUESTS.labels(result="generated").inc()
+        return summary
+
+    @classmethod
+    def _fill(cls, key: SummaryKey, content: str, config=None) -> Dict[str, Any]:
+        deadline = time.monotonic() + SUMMARY_WAIT_TIMEOUT
+        waited = False
+        while True:
+            summary, claimed = cls._poll(key, waited)
+            if summary is not None:
+                return summary
+            if claimed:
+                return cls._generate(key, content, config)
+            if time.monotonic() > deadline:
+                logging.warning(f"Precedent summary wait timed out for {key[0]}, generating without store")
+                PRECEDENT_SUMMARY_REQUESTS.labels(result="bypass").inc()
+                return GeminiService.summarize_precedent_langchain(content, config=config)
+            waited = True
+            time.sleep(SUMMARY_POLL_INTERVAL)
+
+    @classmethod
+    def get_summary(cls, case_no: str, content: str, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """저장된 요약을 반환하고, 없으면 생성해 저장합니다. config는 LLM 호출 시에만 전달됩니다."""
+        key = cls.make_key(case_no, content)
+        try:
+            return cls._flight.do(key, lambda: cls._fill(key, content, config))
+        except DatabaseError as e:
+            logging.warning(f"Precedent summary store unavailable: {str(e)}")
+            PRECEDENT_SUMMARY_REQUESTS.labels(result="bypass").inc()
+            return GeminiService.summarize_precedent_langchain(content, config=config)
+
+    @classmethod
+    def is_stored(cls, case_no: str, content: str) -> bool:
+        return cls._filter(cls.make_key(case_no, content)).filter(status=PrecedentSummary.STATUS_READY).exists()
+
+    # --- 비동기 경로 (ASGI) ---
+
+    @classmethod
+    async def _agenerate(cls, key: SummaryKey, content: str) -> Dict[str, Any]:
+        try:
+            summary = await GeminiService.asummarize_precedent_langchain(content)
+        except Exception:
+            await sync_to_async(cls._release)(key)
+            raise
+        await sync_to_async(cls._store)(key, summary)
+        PRECEDENT_SUMMARY_REQUESTS.labels(result="generated").inc()
+        return summary
+
+    @classmethod
+    async def _afill(cls, key: SummaryKey, content: str) -> Dict[str, Any]:
+        deadline = time.monotonic() + SUMMARY_WAIT_TIMEOUT
+        waited = False
+        while True:
+            summary, claimed = await sync_to_async(cls._poll)(key, waited)
+            if summary is not None:
+                return summary
+            if claimed:
+                return await cls._agenerate(key, content)
+            if time.monotonic() > deadline:
+                logging.warning(f"Precedent summary wait timed out for {key[0]}, generating without store")
+                PRECEDENT_SUMMARY_REQUESTS.labels(result="bypass").inc()
+                return await GeminiService.asummarize_precedent_langchain(content)
+            waited = True
+            await asyncio.sleep(SUMMARY_POLL_INTERVAL)
+
+    @classmethod
+    async def aget_summary(cls, case_no: str, content: str) -> Dict[str, Any]:
+        key = cls.make_key(case_no, content)
+        try:
+            return await cls._aflight.do(key, lambda: cls._afill(key, content))
+        except DatabaseError as e:
+            logging.warning(f"Precedent summary store unavailable: {str(e)}")
+            PRECEDENT_SUMMARY_REQUESTS.labels(result="bypass").inc()
+            return await GeminiService.asummarize_precedent_langchain(content)
+
+    # --- 스트리밍 경로 (SSE) ---
+
+    @classmethod
+    def stream_summary(cls, case_no: str, content: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        생성 중인 요약을 ("summary_partial", 부분 객체)로 흘려보내고 마지막에 ("summary", 완성 객체)를 반환합니다.
+        저장된 요약이 있거나 다른 요청이 이미 생성 중이면 부분 객체 없이 완성 객체만 반환합니다.
+        """
+        key = cls.make_key(case_no, content)
+        try:
+            summary, claimed = cls._poll(key, False)
+        except DatabaseError as e:
+            logging.warning(f"Precedent summary store unavailable: {str(e)}")
+            PRECEDENT_SUMMARY_REQUESTS.labels(result="bypass").inc()
+            summary, claimed = None, None
+        if summary is not None:
+            yield "summary", summary
+            return
+        if claimed is False:
+            yield "summary", cls.get_summary(case_no, content)
+            return
+
+        stored = False
+        try:
+            summary = None
+            for partial in GeminiService.stream_summary(content):
+                if partial and partial != summary:
+                    summary = partial
+                    yield "summary_partial", partial
+            summary = cls._validated(summary)
+            if claimed:
+                cls._store(key, summary)
+                stored = True
+                PRECEDENT_SUMMARY_REQUESTS.labels(result="generated").inc()
+            yield "summary", summary
+        finally:
+            # 생성 실패나 클라이언트 연결 종료 시 점유를 풀어 다른 요청이 생성하도록 함
+            if claimed and not stored:
+                cls._release(key)
+
+    @classmethod
+    async def astream_summary(cls, case_no: str, content: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """stream_summary의 비동기 버전"""
+        key = cls.make_key(case_no, content)
+        try:
+            summary, claimed = await sync_to_async(cls._poll)(key, False)
+        except DatabaseError as e:
+            logging.warning(f"Precedent summary store unavailable: {str(e)}")
+            PRECEDENT_SUMMARY_REQUESTS.labels(result="bypass").inc()
+            summary, claimed = None, None
+        if summary is not None:
+            yield "summary", summary
+            return
+        if claimed is False:
+            yield "summary", await cls.aget_summary(case_no, content)
+            return
+
+        stored = False
+        try:
+            summary = None
+            async for partial in GeminiService.astream_summary(content):
+                if partial and partial != summary:
+                    summary = partial
+                    yield "summary_partial", partial
+            summary = cls._validated(summary)
+            if claimed:
+                await sync_to_async(cls._store)(key, summary)
+                stored = True
+                PRECEDENT_SUMMARY_REQUESTS.labels(result="generated").inc()
+            yield "summary", summary
+        finally:
+            if claimed and not stored:
+                await sync_to_async(cls._release)(key)
+
+    @staticmethod
+    def _validated(summary: Any) -> Dict[str, Any]:
+        if not isinstance(summary, dict) or not summary:
+            raise ValueError("요약 결과를 JSON 객체로 해석할 수 없습니다.")
+        return summary
+
+    @staticmethod
+    def stored_summaries(case_nos: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        저장된 요약만 일괄 조회 (생성하지 않음). 사건번호 → 현재 프롬프트 버전의 최신 요약.
+        원문이 바뀌어 새 요약이 저장되면 이전 요약은 지워지므로 원문 해시 없이 사건번호로 찾습니다.
+        """
+        try:
+            rows = PrecedentSummary.objects.filter(
+                case_no__in=[str(case_no) for case_no in case_nos],
+                prompt_version=SUMMARY_PROMPT_VERSION,
+                status=PrecedentSummary.STATUS_READY,
+            ).order_by("updated_at").values_list("case_no", "summary")
+            return dict(rows)
+        except DatabaseError as e:
+            logging.warning(f"Precedent summary store unavailable: {str(e)}")
+            return {}
+
+    @staticmethod
+    def purge(case_no: Optional[str] = None, all_versions: bool = False) -> int:
+        """
+        저장된 요약을 명시적으로 삭제하고 삭제 건수를 반환합니다.
+        기본값은 현재 SUMMARY_PROMPT_VERSION이 아닌 요약만 삭제 (프롬프트 버전을 올린 뒤 정리용).
+        """
+        queryset = PrecedentSummary.objects.all()
+        if case_no:
+            queryset = queryset.filter(case_no=case_no)
+        if not all_versions:
+            queryset = queryset.exclude(prompt_version=SUMMARY_PROMPT_VERSION)
+        return queryset.delete()[0]
@@ -0,0 +1,186 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Tuple, Type
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from opensearchpy import Transport, AsyncTransport, Urllib3HttpConnection, AIOHttpConnection
+
+from .metrics import (
+    EXTERNAL_CALL_LATENCY,
+    EXTERNAL_CALL_ERRORS,
+    EXTERNAL_CALL_RETRIES,
+    EXTERNAL_CALL_BYTES,
+    LLM_TOKENS,
+)
+
+# 현재 실행 중인 외부 호출 (service, operation, model).
+# 클라이언트 내부에서 일어나는 재시도·전송 바이트를 어떤 호출의 것인지 라벨링하는 데 사용
+_current_call: ContextVar[Tuple[str, str, str]] = ContextVar(
+    "external_call", default=("unknown", "unknown", "unknown")
+)
+
+
+def current_call() -> Tuple[str, str, str]:
+    return _current_call.get()
+
+
+def observe_payload(service: str, operation: str, sent: Optional[int] = None,
+                    received: Optional[int] = None) -> None:
+    if sent is not None:
+        EXTERNAL_CALL_BYTES.labels(service=service, operation=operation, direction="sent").observe(sent)
+    if received is not None:
+        EXTERNAL_CALL_BYTES.labels(service=service, operation=operation, direction="received").observe(received)
+
+
+@contextmanager
+def track_call(service: str, operation: str, model: str,
+               ignore: Tuple[Type[BaseException], ...] = ()) -> Iterator[None]:
+    """
+    외부 호출 한 번의 소요 시간(재시도 포함)과 실패를 기록합니다.
+    ignore에 지정한 예외(판례 조회의 NotFoundError 등 정상적인 결과)는 실패로 세지 않습니다.
+    """
+    token = _current_call.set((service, operation, model))
+    started = time.perf_counter()
+    try:
+        yield
+    except ignore:
+        raise
+    except Exception as e:
+        EXTERNAL_CALL_ERRORS.labels(service=service, operation=operation, model=model, error=type(e).__name__).inc()
+        raise
+    finally:
+        EXTERNAL_CALL_LATENCY.labels(service=service, operation=operation, model=model).observe(
+            time.perf_counter() - started
+        )
+        _current_call.reset(token)
+
+
+# --- LangChain (Gemini LLM) ---
+
+def _text_bytes(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    # 멀티모달 content(list[dict]) 등은 직렬화 길이로 추정
+    return len(str(value).encode("utf-8"))
+
+
+class LLMTelemetryHandler(BaseCallbackHandler):
+    """
+    LLM 호출(on_*_start → on_llm_end/on_llm_error)마다 소요 시간, 입출력 토큰(usage_metadata),
+    프롬프트/응답 크기와 실패를 기록하는 콜백. 작업(operation)·모델별로 하나씩 만들어 재사용합니다 (llm_telemetry).
+    """
+    # 비동기 체인에서도 스레드 전환 없이 이벤트 루프에서 바로 실행 (지표 기록만 하므로 가벼움)
+    run_inline = True
+
+    def __init__(self, operation: str, model: str):
+        self.operation = operation
+        self.model = model
+        self._started: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, sent: int) -> None:
+        # google-genai 클라이언트의 재시도 로그를 이 호출의 것으로 집계하기 위해 현재 호출을 설정
+        # (LangChain은 단계마다 복사한 context에서 실행하므로 호출이 끝나면 자연히 사라짐)
+        _current_call.set(("gemini", self.operation, self.model))
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+        observe_payload("gemini", self.operation, sent=sent)
+
+    def _finish(self, run_id: UUID) -> None:
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started is not None:
+            EXTERNAL_CALL_LATENCY.labels(service="gemini", operation=self.operation, model=self.model).observe(
+                time.perf_counter() - started
+            )
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, sum(_text_bytes(message.content) for batch in messages for message in batch))
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, sum(_text_bytes(prompt) for prompt in prompts))
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+        received = 0
+        input_tokens = output_tokens = None
+        for generations in response.generations:
+            for generation in generations:
+                received += _text_bytes(generation.text)
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    input_tokens = (input_tokens or 0) + usage.get("input_tokens", 0)
+                    output_tokens = (output_tokens or 0) + usage.get("output_tokens", 0)
+        observe_payload("gemini", self.operation, received=received)
+        if input_tokens is not None:
+            LLM_TOKENS.labels(operation=self.operation, model=self.model, direction="input").observe(input_tokens)
+            LLM_TOKENS.labels(operation=self.operation, model=self.model, direction="output").observe(output_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        # 스트리밍 도중 클라이언트 연결이 끊긴 경우(GeneratorExit 등)도 여기로 전달됨
+        self._finish(run_id)
+        EXTERNAL_CALL_ERRORS.labels(
+            service="gemini", operation=self.operation, model=self.model, error=type(error).__name__
+        ).inc()
+
+
+@lru_cache(maxsize=None)
+def llm_telemetry(operation: str, model: str) -> LLMTelemetryHandler:
+    return LLMTelemetryHandler(operation, model)
+
+
+class _GenaiRetryLogHandler(logging.Handler):
+    """google-genai는 재시도 직전에 INFO 로그("Retrying ...")만 남기므로 이를 재시도 수로 집계"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if str(record.msg).startswith("Retrying"):
+            service, operation, model = _current_call.get()
+            EXTERNAL_CALL_RETRIES.labels(service="gemini", operation=operation, model=model).inc()
+
+
+logging.getLogger("google_genai._api_client").addHandler(_GenaiRetryLogHandler(level=logging.INFO))
+
+
+# --- OpenSearch ---
+
+class _PayloadLoggingMixin:
+    """요청/응답이 끝날 때마다 호출되는 Connection 로깅 훅에서 실제 전송된 본문 크기를 기록"""
+
+    def log_request_success(self, method, full_url, path, body, status_code, response, duration):
+        super().log_request_success(method, full_url, path, body, status_code, response, duration)
+        service, operation, model = _current_call.get()
+        observe_payload(
+            "opensearch", operation,
+            sent=len(body) if body else 0,
+            received=_text_bytes(response) if response else 0,
+        )
+
+
+class InstrumentedConnection(_PayloadLoggingMixin, Urllib3HttpConnection):
+    pass
+
+
+class InstrumentedAsyncConnection(_PayloadLoggingMixin, AIOHttpConnection):
+    pass
+
+
+class _RetryCountingMixin:
+    """Transport는 재시도할 오류(연결 실패/타임아웃/재시도 대상 상태 코드)에서만 mark_dead를 호출"""
+
+    def mark_dead(self, connection):
+        service, operation, model = _current_call.get()
+        EXTERNAL_CALL_RETRIES.labels(service="opensearch", operation=operation, model=model).inc()
+        return super().mark_dead(connection)
+
+
+class InstrumentedTransport(_RetryCountingMixin, Transport):
+    pass
+
+
+class InstrumentedAsyncTransport(_RetryCountingMixin, AsyncTransport):
+    pass
@@ -0,0 +1,50 @@
+from django.test import SimpleTestCase
+
+from cases.analysis_report import merge_analyses
+
+
+class MergeAnalysesTests(SimpleTestCase):
+    def analysis(self, probability, sentences, targets, roadmap, logic):
+        return {
+            "outcome_prediction": {
+                "probability": probability,
+                "expected_result": f"result {probability}",
+                "sentence_distribution": [{"name": name, "value": value} for name, value in sentences],
+                "compensation_distribution": [
+                    {"range": "0-100", "count": 2, "is_target": "0-100" in targets},
+                    {"range": "100-500", "count": 4, "is_target": "100-500" in targets},
+                ],
+                "radar_data": [{"subject": "증거", "A": 80, "B": 60, "fullMark": 100}],
+            },
+            "action_roadmap": roadmap,
+            "legal_foundation": {"logic": logic, "relevant_precedents": [{"case_number": logic}]},
+        }
+
+    def test_merges_in_request_order(self):
+        report = merge_analyses({
+            "p1": self.analysis("70%", [("벌금", 60), ("집행유예", 40)], {"0-100"}, ["first"], "l1"),
+            "p2": self.analysis(50, [("벌금", 20), ("실형", 80)], {"100-500"}, ["second"], "l2"),
+        })
+        outcome = report["outcome_prediction"]
+        self.assertEqual(outcome["probability"], 60.0)
+        self.assertEqual(outcome["probability_by_precedent"], {"p1": 70.0, "p2": 50.0})
+        self.assertEqual([r["case_number"] for r in outcome["expected_results"]], ["p1", "p2"])
+        # 판례별 평균(벌금 40, 집행유예 40, 실형 80)을 합 100으로 정규화
+        self.assertEqual(
+            {item["name"]: item["value"] for item in outcome["sentence_distribution"]},
+            {"벌금": 25.0, "집행유예": 25.0, "실형": 50.0},
+        )
+        self.assertEqual(
+            {item["range"]: item["is_target"] for item in outcome["compensation_distribution"]},
+            {"0-100": True, "100-500": True},
+        )
+        self.assertEqual(outcome["radar_data"], [{"subject": "증거", "A": 80.0, "B": 60.0, "fullMark": 100.0}])
+        self.assertEqual(report["action_roadmap"], ["first"])
+        self.assertEqual([item["logic"] for item in report["legal_foundation"]["logic"]], ["l1", "l2"])
+        self.assertEqual(len(report["legal_foundation"]["relevant_precedents"]), 2)
+
+    def test_missing_values_are_ignored(self):
+        report = merge_analyses({"p1": {"outcome_prediction": {"probability": "알 수 없음"}}, "p2": {}})
+        self.assertIsNone(report["outcome_prediction"]["probability"])
+        self.assertEqual(report["outcome_prediction"]["sentence_distribution"], [])
+        self.assertEqual(report["action_roadmap"], [])
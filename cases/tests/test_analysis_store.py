@@ -0,0 +1,90 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from cases.analysis_store import CaseAnalysisStore
+from cases.models import Case, CaseAnalysis, Category
+
+CONTENT = "【판시사항】 임대차보증금 반환"
+
+
+@mock.patch("cases.analysis_store.GeminiService.llm_model_name", lambda: "test-model")
+@mock.patch("cases.analysis_store.PrecedentContextSelector.select", lambda situation, precedent_no, content: content)
+@mock.patch("cases.analysis_store.GeminiService.analyze_case_deeply")
+class CaseAnalysisStoreTests(TestCase):
+    def setUp(self):
+        self.case = Case.objects.create(category=Category.objects.create(name="임대차"), who="임차인", detail="보증금")
+
+    def pending(self, lease_until):
+        _, precedent_no, digest, version, model_name = CaseAnalysisStore.make_key(self.case, "2020다1", CONTENT)
+        return CaseAnalysis.objects.create(
+            case=self.case, precedent_no=precedent_no, content_hash=digest, prompt_version=version,
+            model_name=model_name, status=CaseAnalysis.STATUS_PENDING, lease_until=lease_until,
+        )
+
+    def test_miss_generates_once_and_hit_reuses(self, analyze):
+        analyze.return_value = {"outcome_prediction": "a"}
+        for _ in range(2):
+            self.assertEqual(CaseAnalysisStore.get_analysis(self.case, "2020다1", CONTENT), {"outcome_prediction": "a"})
+        analyze.assert_called_once_with({"who": "임차인", "detail": "보증금"}, CONTENT)
+        self.assertEqual(CaseAnalysis.objects.get().status, CaseAnalysis.STATUS_READY)
+
+    def test_refresh_regenerates(self, analyze):
+        analyze.side_effect = [{"outcome_prediction": "a"}, {"outcome_prediction": "b"}]
+        CaseAnalysisStore.get_analysis(self.case, "2020다1", CONTENT)
+        result = CaseAnalysisStore.get_analysis(self.case, "2020다1", CONTENT, refresh=True)
+        self.assertEqual(result, {"outcome_prediction": "b"})
+        self.assertEqual(CaseAnalysis.objects.get().result, {"outcome_prediction": "b"})
+
+    def test_waits_for_other_workers_pending_row(self, analyze):
+        row = self.pending(timezone.now() + timedelta(minutes=1))
+
+        def other_worker_finishes(_seconds):
+            CaseAnalysis.objects.filter(pk=row.pk).update(
+                status=CaseAnalysis.STATUS_READY, result={"outcome_prediction": "c"}, lease_until=None,
+            )
+
+        with mock.patch("cases.analysis_store.time.sleep", side_effect=other_worker_finishes) as sleep:
+            result = CaseAnalysisStore.get_analysis(self.case, "2020다1", CONTENT)
+        self.assertEqual(result, {"outcome_prediction": "c"})
+        sleep.assert_called_once()
+        analyze.assert_not_called()
+
+    def test_expired_lease_is_taken_over(self, analyze):
+        analyze.return_value = {"outcome_prediction": "d"}
+        self.pending(timezone.now() - timedelta(seconds=1))
+        self.assertEqual(CaseAnalysisStore.get_analysis(self.case, "2020다1", CONTENT), {"outcome_prediction": "d"})
+        analyze.assert_called_once()
+
+    def test_failed_generation_releases_pending_row(self, analyze):
+        analyze.side_effect = RuntimeError("llm down")
+        with self.assertRaises(RuntimeError):
+            CaseAnalysisStore.get_analysis(self.case, "2020다1", CONTENT)
+        self.assertFalse(CaseAnalysis.objects.exists())
+
+    def test_concurrent_misses_share_one_fill(self, analyze):
+        calls = []
+
+        def slow_fill(key, situation, content, refresh):
+            calls.append(key)
+            time.sleep(0.1)
+            return {"outcome_prediction": "e"}
+
+        results = []
+        with mock.patch.object(CaseAnalysisStore, "_fill", side_effect=slow_fill):
+            threads = [
+                threading.Thread(
+                    target=lambda: results.append(CaseAnalysisStore.get_analysis(self.case, "2020다1", CONTENT))
+                )
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"outcome_prediction": "e"}] * 4)
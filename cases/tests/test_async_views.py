@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from cases.models import Case, Category
+
+CASE_DATA = {"who": "임차인", "when": "2024년", "what": "보증금", "want": "반환", "detail": "보증금을 돌려받지 못했습니다."}
+PRECEDENT = {"case_no": "2020다1", "court": "대법원", "case_name": "보증금반환", "judgment_date": "20200101",
+             "content": "【주문】 원고 승"}
+
+
+# AsyncClient는 경로를 latin-1로 넘기므로 URL의 판례 번호는 ASCII로 씀
+class AsyncViewTests(TestCase):
+    @mock.patch("cases.async_views.PrecedentSearchService.asearch", new_callable=mock.AsyncMock)
+    async def test_search_persists_case_and_returns_results(self, asearch):
+        asearch.return_value = (
+            [{"case_No": "2020다1", "similarity": 0.9}],
+            {"mode": "vector", "cached": False, "timings_ms": {"embedding": 1.5}},
+        )
+        response = await self.async_client.post("/cases/async/", CASE_DATA, content_type="application/json")
+
+        self.assertEqual(response.status_code, 201)
+        body = response.json()["data"]
+        self.assertEqual(body["results"], [{"case_No": "2020다1", "similarity": 0.9}])
+        self.assertTrue(await Case.objects.filter(id=body["case_id"], who="임차인").aexists())
+        self.assertIn("embedding;dur=1.5", response["Server-Timing"])
+        asearch.assert_awaited_once_with(CASE_DATA["detail"], k=5, filters=None)
+
+    async def test_search_rejects_invalid_json(self):
+        response = await self.async_client.post("/cases/async/", "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    @mock.patch("cases.async_views.PrecedentStore.aget", new_callable=mock.AsyncMock, return_value=None)
+    async def test_detail_not_found(self, aget):
+        response = await self.async_client.get("/cases/async/2020da1/")
+        self.assertEqual(response.status_code, 404)
+
+    @mock.patch("cases.async_views.PrecedentSummaryStore.aget_summary", new_callable=mock.AsyncMock)
+    @mock.patch("cases.async_views.PrecedentStore.aget", new_callable=mock.AsyncMock)
+    async def test_detail_with_summary(self, aget, aget_summary):
+        aget.return_value = dict(PRECEDENT)
+        aget_summary.return_value = {"요약": "원고 승소"}
+        response = await self.async_client.get("/cases/async/2020da1/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["summary"], {"요약": "원고 승소"})
+        aget_summary.assert_awaited_once_with("2020da1", PRECEDENT["content"])
+
+    @mock.patch("cases.async_views.CaseAnalysisStore.aget_analysis", new_callable=mock.AsyncMock)
+    @mock.patch("cases.async_views.PrecedentStore.aget", new_callable=mock.AsyncMock)
+    async def test_answer(self, aget, aget_analysis):
+        category = await Category.objects.acreate(name="임대차")
+        case = await Case.objects.acreate(category=category, who="임차인", detail="보증금")
+        aget.return_value = dict(PRECEDENT)
+        aget_analysis.return_value = {"outcome_prediction": "승소"}
+
+        response = await self.async_client.post(
+            "/cases/async/answer/2020da1/", {"case_id": case.id}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"], {"outcome_prediction": "승소"})
+
+        missing = await self.async_client.post(
+            "/cases/async/answer/2020da1/", {"case_id": case.id + 1}, content_type="application/json"
+        )
+        self.assertEqual(missing.status_code, 404)
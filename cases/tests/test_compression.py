@@ -0,0 +1,74 @@
+import gzip
+import zlib
+from types import SimpleNamespace
+from unittest import mock
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from cases.views import precedent_detail_data
+from config.middleware import CompressionMiddleware
+
+BODY = ("판례 원문 " * 200).encode("utf-8")
+# 테스트 환경에 brotli가 없어도 br 분기를 검증할 수 있도록 zlib로 대신함
+FAKE_BROTLI = SimpleNamespace(compress=lambda data, quality: zlib.compress(data))
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, accept_encoding):
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda r: response)(request)
+
+    def test_event_stream_is_not_compressed(self):
+        response = StreamingHttpResponse(iter([b"data: {}\n\n"]), content_type="text/event-stream")
+        response = self.process(response, "gzip, br")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(response.streaming_content), b"data: {}\n\n")
+
+    @mock.patch("config.middleware.brotli", None)
+    def test_gzip_without_brotli(self):
+        response = self.process(HttpResponse(BODY, content_type="application/json"), "gzip, br")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    @mock.patch("config.middleware.brotli", FAKE_BROTLI)
+    def test_brotli_when_accepted(self):
+        response = HttpResponse(BODY, content_type="application/json")
+        response["ETag"] = '"abc"'
+        response = self.process(response, "gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(response["ETag"], 'W/"abc"')
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(zlib.decompress(response.content), BODY)
+
+    @mock.patch("config.middleware.brotli", FAKE_BROTLI)
+    def test_gzip_when_brotli_not_accepted(self):
+        response = self.process(HttpResponse(BODY, content_type="application/json"), "gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    @mock.patch("config.middleware.brotli", FAKE_BROTLI)
+    def test_small_responses_are_not_compressed(self):
+        response = self.process(HttpResponse(b"{}", content_type="application/json"), "gzip, br")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+
+class PrecedentDetailDataTests(SimpleTestCase):
+    precedent = {"case_no": "2020다1", "court": "대법원", "case_name": "보증금반환",
+                 "judgment_date": "2020-01-01", "content": "0123456789"}
+
+    def test_default_returns_all_fields(self):
+        self.assertEqual(precedent_detail_data(self.precedent)["content"], "0123456789")
+
+    def test_content_window(self):
+        data = precedent_detail_data(self.precedent, {"offset": 2, "length": 3})
+        self.assertEqual(data["content"], "234")
+        self.assertEqual(data["content_range"], {"offset": 2, "length": 3, "total": 10})
+
+    def test_field_selection(self):
+        data = precedent_detail_data(self.precedent, {"fields": ["case_no", "content"], "offset": 8})
+        self.assertEqual(data, {"case_no": "2020다1", "content": "89",
+                                "content_range": {"offset": 8, "length": 2, "total": 10}})
+        self.assertEqual(precedent_detail_data(self.precedent, {"fields": ["court"], "length": 1}), {"court": "대법원"})
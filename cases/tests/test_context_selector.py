@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from cases.context_selector import OMISSION, PrecedentContextSelector, estimate_tokens, split_passages
+
+
+def precedent(filler_sections: int = 6) -> str:
+    sections = ["【판시사항】\n임대차보증금 반환 의무의 범위", "【주문】\n원고의 청구를 기각한다."]
+    for i in range(filler_sections):
+        sections.append(f"【이유{i}】\n" + "건축물 설계 도면과 공사 대금 정산에 관한 내용이다. " * 8)
+    sections.append("【판단】\n" + "임차인이 임대인에게 보증금 반환을 청구한 경우 임대차 종료 시점이 중요하다. " * 3)
+    return "\n".join(sections)
+
+
+@mock.patch.object(PrecedentContextSelector, "embedding_scores", side_effect=RuntimeError("no embeddings"))
+class PrecedentContextSelectorTests(SimpleTestCase):
+    situation = {"who": "임차인", "detail": "임대인이 임대차 종료 후 보증금 반환을 거부합니다."}
+
+    @mock.patch("cases.context_selector.ANALYSIS_CONTEXT_TOKEN_BUDGET", 300)
+    def test_pinned_sections_come_first_and_budget_is_kept(self, _embedding):
+        content = precedent()
+        self.assertGreater(estimate_tokens(content), 300)
+
+        context = PrecedentContextSelector.select(self.situation, "2020다1", content)
+
+        self.assertLessEqual(estimate_tokens(context), 300)
+        self.assertTrue(context.startswith("【판시사항】"))
+        self.assertIn("【주문】\n원고의 청구를 기각한다.", context)
+        # 남은 예산은 관련도(어휘 겹침) 순으로 채우고 무관한 구간은 (중략)으로 생략
+        self.assertIn("【판단】", context)
+        self.assertIn(OMISSION, context)
+
+    @mock.patch("cases.context_selector.ANALYSIS_CONTEXT_TOKEN_BUDGET", 300)
+    def test_pinned_sections_win_over_relevance(self, _embedding):
+        content = precedent()
+        with mock.patch("cases.context_selector.ANALYSIS_CONTEXT_PINNED_SECTIONS", ("이유0",)):
+            context = PrecedentContextSelector.select(self.situation, "2020다1", content)
+        self.assertIn("【이유0】", context)
+        self.assertLessEqual(estimate_tokens(context), 300)
+
+    def test_short_precedent_is_passed_through_whole(self, _embedding):
+        content = precedent(filler_sections=0)
+        self.assertEqual(PrecedentContextSelector.select(self.situation, "2020다1", content), content)
+
+    @mock.patch("cases.context_selector.ANALYSIS_CONTEXT_TOKEN_BUDGET", 100000)
+    def test_long_precedent_within_budget_is_not_cut(self, _embedding):
+        content = precedent(filler_sections=40)
+        self.assertGreater(len(content), 10000)
+        self.assertEqual(PrecedentContextSelector.select(self.situation, "2020다1", content), content)
+
+    @mock.patch("cases.context_selector.ANALYSIS_CONTEXT_TRUNCATE_CHARS", 50)
+    @mock.patch("cases.context_selector.ANALYSIS_CONTEXT_MODE", "truncate")
+    def test_truncate_mode_keeps_leading_characters(self, _embedding):
+        content = precedent()
+        self.assertEqual(PrecedentContextSelector.select(self.situation, "2020다1", content), content[:50])
+        self.assertEqual(PrecedentContextSelector.version(), "trunc50")
+
+    def test_split_passages_respects_sections(self, _embedding):
+        passages = split_passages(precedent(filler_sections=1))
+        self.assertEqual([p["section"] for p in passages][:2], ["판시사항", "주문"])
+        self.assertTrue(all(len(p["text"]) <= 600 for p in passages))
@@ -0,0 +1,52 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from cases.embedding_cache import EmbeddingCacheService
+from cases.models import EmbeddingCache
+
+
+@mock.patch("cases.embedding_cache.EMBEDDING_CACHE_PURGE_PROBABILITY", 0)
+@mock.patch("cases.embedding_cache.GeminiService.create_embedding", return_value=[0.5, 0.25])
+class EmbeddingCacheServiceTests(TestCase):
+    def setUp(self):
+        EmbeddingCacheService._memory.clear()
+
+    def test_miss_fills_both_tiers(self, create_embedding):
+        self.assertEqual(EmbeddingCacheService.get_embedding("보증금 반환"), [0.5, 0.25])
+        create_embedding.assert_called_once_with("보증금 반환", is_query=True)
+        self.assertEqual(EmbeddingCache.objects.get().task_type, "RETRIEVAL_QUERY")
+        self.assertEqual(len(EmbeddingCacheService._memory), 1)
+
+    def test_memory_hit_skips_db_and_api(self, create_embedding):
+        EmbeddingCacheService.get_embedding("보증금 반환")
+        with self.assertNumQueries(0):
+            self.assertEqual(EmbeddingCacheService.get_embedding("  보증금   반환 "), [0.5, 0.25])
+        create_embedding.assert_called_once()
+
+    def test_db_hit_after_memory_eviction(self, create_embedding):
+        EmbeddingCacheService.get_embedding("보증금 반환")
+        EmbeddingCacheService._memory.clear()
+        self.assertEqual(EmbeddingCacheService.get_embedding("보증금 반환"), [0.5, 0.25])
+        create_embedding.assert_called_once()
+
+    def test_query_and_document_embeddings_are_cached_separately(self, create_embedding):
+        EmbeddingCacheService.get_embedding("보증금 반환", is_query=True)
+        EmbeddingCacheService.get_embedding("보증금 반환", is_query=False)
+        self.assertEqual(create_embedding.call_count, 2)
+        self.assertEqual(EmbeddingCache.objects.count(), 2)
+
+    def test_expired_db_row_is_ignored_and_purged(self, create_embedding):
+        EmbeddingCacheService.get_embedding("보증금 반환")
+        EmbeddingCacheService._memory.clear()
+        EmbeddingCache.objects.update(updated_at=timezone.now() - timedelta(days=365))
+
+        EmbeddingCacheService.get_embedding("보증금 반환")
+        self.assertEqual(create_embedding.call_count, 2)
+
+        EmbeddingCache.objects.update(updated_at=timezone.now() - timedelta(days=365))
+        self.assertEqual(EmbeddingCacheService.purge_expired(batch_size=10), 1)
+        self.assertFalse(EmbeddingCache.objects.exists())
+        self.assertEqual(EmbeddingCacheService.purge_expired(batch_size=10), 0)
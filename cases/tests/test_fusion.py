@@ -0,0 +1,33 @@
+from django.test import SimpleTestCase
+
+from cases.search import reciprocal_rank_fusion, weighted_score_fusion
+
+
+class FusionTests(SimpleTestCase):
+    RANKED = {
+        "vector": [{"case_No": "a", "similarity": 0.9}, {"case_No": "b", "similarity": 0.5}],
+        "lexical": [{"case_No": "b", "similarity": 12.0}, {"case_No": "c", "similarity": 3.0}],
+    }
+
+    def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion(self.RANKED, {"vector": 1.0, "lexical": 1.0}, rrf_k=60)
+        self.assertEqual([r["case_No"] for r in fused], ["b", "a", "c"])
+        self.assertAlmostEqual(fused[0]["fusion_score"], 1 / 62 + 1 / 61)
+        self.assertAlmostEqual(fused[1]["fusion_score"], 1 / 61)
+
+    def test_reciprocal_rank_fusion_weights(self):
+        fused = reciprocal_rank_fusion(self.RANKED, {"vector": 1.0, "lexical": 0.0}, rrf_k=60)
+        self.assertEqual([r["case_No"] for r in fused], ["a", "b", "c"])
+        self.assertEqual(fused[2]["fusion_score"], 0.0)
+
+    def test_weighted_score_fusion_normalizes_each_path(self):
+        fused = weighted_score_fusion(self.RANKED, {"vector": 1.0, "lexical": 0.5})
+        scores = {r["case_No"]: r["fusion_score"] for r in fused}
+        self.assertAlmostEqual(scores["a"], 1.0)
+        self.assertAlmostEqual(scores["b"], 0.0 + 0.5)
+        self.assertAlmostEqual(scores["c"], 0.0)
+
+    def test_weighted_score_fusion_single_result_and_empty_path(self):
+        fused = weighted_score_fusion({"vector": [{"case_No": "a", "similarity": 0.3}], "lexical": []}, {})
+        self.assertEqual([(r["case_No"], r["fusion_score"]) for r in fused], [("a", 1.0)])
+
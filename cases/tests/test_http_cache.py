@@ -0,0 +1,44 @@
+from django.test import RequestFactory, TestCase
+
+from cases.http_cache import not_modified_response, precedent_validators
+from cases.models import PrecedentSummary, SearchIndexGeneration
+from cases.search_cache import CHUNKED_INDEX_NAME
+from cases.service import SUMMARY_PROMPT_VERSION
+
+
+class PrecedentValidatorTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        PrecedentSummary.objects.create(
+            case_no="2020다1", content_hash="h1", prompt_version=SUMMARY_PROMPT_VERSION,
+            model_name="m", summary={}, status=PrecedentSummary.STATUS_READY,
+        )
+
+    def test_no_validators_without_ready_summary(self):
+        self.assertIsNone(precedent_validators("2020다2"))
+        PrecedentSummary.objects.create(
+            case_no="2020다2", content_hash="h2", prompt_version=SUMMARY_PROMPT_VERSION,
+            status=PrecedentSummary.STATUS_PENDING,
+        )
+        self.assertIsNone(precedent_validators("2020다2"))
+        self.assertIsNone(precedent_validators("2020다1", digest="other"))
+
+    def test_etag_depends_on_variant_and_index_generation(self):
+        etag, last_modified = precedent_validators("2020다1")
+        self.assertIsNotNone(last_modified)
+        self.assertEqual(precedent_validators("2020다1", digest="h1")[0], etag)
+        self.assertNotEqual(precedent_validators("2020다1", variant={"fields": "summary"})[0], etag)
+        SearchIndexGeneration.objects.create(index_name=CHUNKED_INDEX_NAME, generation=2)
+        self.assertNotEqual(precedent_validators("2020다1")[0], etag)
+
+    def test_not_modified_response(self):
+        validators = precedent_validators("2020다1")
+        request = self.factory.get("/cases/precedents/2020다1/", HTTP_IF_NONE_MATCH=validators[0])
+        response = not_modified_response(request, validators, max_age=60, s_maxage=600)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], validators[0])
+        self.assertIn("max-age=60", response["Cache-Control"])
+
+        stale = self.factory.get("/cases/precedents/2020다1/", HTTP_IF_NONE_MATCH='"stale"')
+        self.assertIsNone(not_modified_response(stale, validators, max_age=60, s_maxage=600))
+        self.assertIsNone(not_modified_response(request, None, max_age=60, s_maxage=600))
@@ -0,0 +1,144 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from cases.jobs import JobQueue, PermanentJobError, job_handler, JOB_RETRY_BACKOFF
+from cases.metrics import BACKGROUND_JOBS
+from cases.models import BackgroundJob, Case, Category
+
+
+@job_handler("test_noop")
+def _noop_job(payload):
+    return payload
+
+
+def counter_value(result: str) -> float:
+    return BACKGROUND_JOBS.labels(kind="test_noop", result=result)._value.get()
+
+
+class JobQueueFailTests(TestCase):
+    def claimed(self, max_attempts=3):
+        JobQueue.submit("test_noop", {"n": 1}, max_attempts=max_attempts)
+        job = JobQueue.claim("worker-1", kinds=["test_noop"])
+        self.assertIsNotNone(job)
+        return job
+
+    def test_transient_failure_requeues_with_backoff(self):
+        job = self.claimed()
+        before = timezone.now()
+        JobQueue._fail(job, RuntimeError("boom"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_QUEUED)
+        self.assertEqual(job.error, "boom")
+        self.assertIsNone(job.locked_until)
+        delay = (job.run_after - before).total_seconds()
+        self.assertGreaterEqual(delay, JOB_RETRY_BACKOFF)
+        self.assertLessEqual(delay, JOB_RETRY_BACKOFF * 1.5 + 1)
+
+    def test_backoff_doubles_per_attempt(self):
+        job = self.claimed()
+        job.attempts = 3
+        job.max_attempts = 5
+        BackgroundJob.objects.filter(job_id=job.job_id).update(attempts=3, max_attempts=5)
+        before = timezone.now()
+        JobQueue._fail(job, RuntimeError("boom"))
+        job.refresh_from_db()
+        self.assertGreaterEqual((job.run_after - before).total_seconds(), JOB_RETRY_BACKOFF * 4)
+
+    def test_last_attempt_fails_permanently(self):
+        job = self.claimed(max_attempts=1)
+        JobQueue._fail(job, RuntimeError("boom"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_permanent_error_skips_retries(self):
+        job = self.claimed()
+        JobQueue._fail(job, PermanentJobError("gone"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_FAILED)
+        self.assertEqual(job.attempts, 1)
+
+    def test_result_of_lost_lease_is_not_recorded(self):
+        job = self.claimed()
+        BackgroundJob.objects.filter(job_id=job.job_id).update(worker="worker-2")
+        counters = {result: counter_value(result) for result in ("retried", "failed", "succeeded")}
+        JobQueue._fail(job, RuntimeError("boom"))
+        JobQueue._fail(job, PermanentJobError("gone"))
+        JobQueue._succeed(job, {"n": 1})
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_RUNNING)
+        self.assertEqual(job.error, "")
+        self.assertEqual({result: counter_value(result) for result in counters}, counters)
+
+    def test_recorded_results_are_counted(self):
+        job = self.claimed()
+        retried = counter_value("retried")
+        JobQueue._fail(job, RuntimeError("boom"))
+        self.assertEqual(counter_value("retried"), retried + 1)
+
+    def test_expired_lease_is_claimed_again(self):
+        job = self.claimed()
+        BackgroundJob.objects.filter(job_id=job.job_id).update(locked_until=timezone.now() - timedelta(seconds=1))
+        again = JobQueue.claim("worker-2", kinds=["test_noop"])
+        self.assertEqual(again.job_id, job.job_id)
+        self.assertEqual(again.attempts, 2)
+
+    def test_run_records_success(self):
+        job = self.claimed()
+        JobQueue.run(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_SUCCEEDED)
+        self.assertEqual(job.result, {"n": 1})
+
+
+class DocumentJobIdempotencyTests(TestCase):
+    """결과 기록 전에 워커가 중단되어 작업이 다시 실행되어도 문서 생성/수정이 한 번만 적용되는지"""
+
+    def setUp(self):
+        import documents.jobs  # noqa: F401  (document_* 작업 등록)
+        from documents.models import Document, Template
+
+        self.Document = Document
+        category = Category.objects.create(name="c")
+        self.case = Case.objects.create(category=category, who="a", what="b", detail="d")
+        Template.objects.create(type="complaint", content="template")
+
+    def rerun(self, job):
+        """점유 만료를 흉내 내 다른 워커가 작업을 다시 가져감"""
+        BackgroundJob.objects.filter(job_id=job.job_id).update(
+            status=BackgroundJob.STATUS_RUNNING, locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        again = JobQueue.claim("worker-2")
+        self.assertEqual(again.job_id, job.job_id)
+        JobQueue.run(again)
+        again.refresh_from_db()
+        return again
+
+    def test_generate_reuses_created_document(self):
+        job = JobQueue.submit("document_generate", {"case_id": self.case.id, "doc_type": "complaint"})
+        with mock.patch("documents.jobs.generate_legal_document", return_value="generated") as generate:
+            JobQueue.run(JobQueue.claim("worker-1"))
+            job.refresh_from_db()
+            self.assertEqual(job.status, BackgroundJob.STATUS_SUCCEEDED)
+            job = self.rerun(job)
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(self.Document.objects.count(), 1)
+        self.assertEqual(job.result["document_id"], job.checkpoints["document_id"])
+
+    def test_edit_is_applied_once(self):
+        document = self.Document.objects.create(type="complaint", content="original")
+        job = JobQueue.submit("document_edit", {
+            "document_id": document.document_id, "doc_type": "complaint", "user_request": "edit",
+        })
+        with mock.patch("documents.jobs.edit_legal_document_with_ai",
+                        side_effect=lambda content, request: f"{content} +{request}") as edit:
+            JobQueue.run(JobQueue.claim("worker-1"))
+            job = self.rerun(job)
+        self.assertEqual(edit.call_count, 1)
+        document.refresh_from_db()
+        self.assertEqual(document.content, "original +edit")
+        self.assertEqual(job.status, BackgroundJob.STATUS_SUCCEEDED)
+        self.assertEqual(job.result["content"], "original +edit")
@@ -0,0 +1,44 @@
+from django.test import SimpleTestCase
+
+from cases.json_stream import JsonSectionParser
+
+
+class JsonSectionParserTests(SimpleTestCase):
+    TEXT = (
+        '```json\n{"outcome_prediction": {"probability": "70%", "note": "a \\"quoted\\" {brace}"},\n'
+        ' "action_roadmap": [{"step": 1}, {"step": 2}],\n "score": 3}\n```'
+    )
+
+    def feed_all(self, text, size):
+        parser = JsonSectionParser()
+        sections = []
+        for start in range(0, len(text), size):
+            sections.extend(parser.feed(text[start:start + size]))
+        return parser, sections
+
+    def test_sections_complete_in_order_regardless_of_chunking(self):
+        for size in (1, 3, 7, len(self.TEXT)):
+            parser, sections = self.feed_all(self.TEXT, size)
+            self.assertEqual([key for key, _ in sections], ["outcome_prediction", "action_roadmap", "score"])
+            self.assertEqual(sections[0][1]["note"], 'a "quoted" {brace}')
+            self.assertEqual(sections[1][1], [{"step": 1}, {"step": 2}])
+            self.assertEqual(sections[2][1], 3)
+
+    def test_object_section_is_emitted_when_it_closes(self):
+        parser = JsonSectionParser()
+        self.assertEqual(parser.feed('{"a": {"x": 1}'), [("a", {"x": 1})])
+        self.assertEqual(parser.feed(', "b": 2'), [])
+        self.assertEqual(parser.feed("}"), [("b", 2)])
+
+    def test_result_validates_the_whole_object(self):
+        parser, _ = self.feed_all(self.TEXT, 5)
+        result = parser.result(required=("outcome_prediction", "action_roadmap"))
+        self.assertEqual(result["score"], 3)
+        with self.assertRaises(ValueError):
+            parser.result(required=("legal_foundation",))
+
+    def test_truncated_output_is_rejected(self):
+        parser = JsonSectionParser()
+        self.assertEqual(parser.feed('{"a": 1, "b": [1, 2'), [("a", 1)])
+        with self.assertRaises(ValueError):
+            parser.result()
@@ -0,0 +1,123 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from cases.llm_gateway import CircuitBreaker, LLMGateway, LLMUnavailableError
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_threshold_failures(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=60)
+        breaker.record(False)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record(False)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertTrue(breaker.is_open())
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=60)
+        breaker.record(False)
+        breaker.record(True)
+        breaker.record(False)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_allows_a_single_trial(self):
+        breaker = CircuitBreaker(threshold=1, cooldown=0)
+        breaker.record(False)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        # 결과 없이 끝난 시험 호출은 다음 호출에 자리를 넘김
+        breaker.record(None)
+        self.assertTrue(breaker.allow())
+        breaker.record(True)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker(threshold=3, cooldown=0)
+        for _ in range(3):
+            breaker.record(False)
+        self.assertTrue(breaker.allow())
+        breaker.record(False)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+
+@mock.patch("cases.llm_gateway._backoff", lambda attempt: 0)
+@mock.patch("cases.llm_gateway.LLM_MAX_RETRIES", 2)
+@mock.patch.object(LLMGateway, "_bucket", None)
+class LLMGatewayCallTests(SimpleTestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(threshold=2, cooldown=60)
+        patcher = mock.patch.object(LLMGateway, "breaker", self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def failing(self, error, calls):
+        def func():
+            calls.append(1)
+            raise error
+        return func
+
+    def test_retries_transient_errors_then_succeeds(self):
+        calls = []
+
+        def func():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ConnectionError("reset")
+            return "ok"
+
+        self.assertEqual(LLMGateway.call(func), "ok")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_exhausted_retries_count_as_one_breaker_failure(self):
+        calls = []
+        with self.assertRaises(ConnectionError):
+            LLMGateway.call(self.failing(ConnectionError("down"), calls))
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.breaker._failures, 1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        with self.assertRaises(ConnectionError):
+            LLMGateway.call(self.failing(ConnectionError("down"), calls))
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(LLMUnavailableError):
+            LLMGateway.call(lambda: "never")
+
+    def test_permanent_errors_are_not_retried_or_counted(self):
+        calls = []
+        with self.assertRaises(ValueError):
+            LLMGateway.call(self.failing(ValueError("bad request"), calls))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.breaker._failures, 0)
+
+    def test_breaker_opening_during_backoff_raises_last_error(self):
+        calls = []
+
+        def func():
+            calls.append(1)
+            # 다른 호출들의 실패로 재시도 대기 중 차단기가 열림
+            self.breaker.record(False)
+            self.breaker.record(False)
+            raise ConnectionError("down")
+
+        with self.assertRaises(ConnectionError):
+            LLMGateway.call(func)
+        self.assertEqual(len(calls), 1)
+
+    def test_slot_is_released_after_each_attempt(self):
+        calls = []
+        with self.assertRaises(ConnectionError):
+            LLMGateway.call(self.failing(ConnectionError("down"), calls))
+        self.assertEqual(LLMGateway.call(lambda: "ok"), "ok")
+        # 모든 자리가 반납되었는지: BoundedSemaphore는 초과 반납 시 ValueError
+        acquired = 0
+        while LLMGateway._slots.acquire(blocking=False):
+            acquired += 1
+        for _ in range(acquired):
+            LLMGateway._slots.release()
+        self.assertGreater(acquired, 0)
+        with self.assertRaises(ValueError):
+            LLMGateway._slots.release()
@@ -0,0 +1,47 @@
+from django.test import SimpleTestCase
+
+from cases.service import (
+    OpenSearchService, SEARCH_CANDIDATE_MULTIPLIER, SEARCH_TWO_STAGE_EXPANSION, compact_embedding,
+)
+
+
+class OpenSearchQueryBodyTests(SimpleTestCase):
+    filters = {"category": "민사", "court": "대법원", "date_from": "2015-01-01", "date_to": "2020-12-31"}
+
+    def test_filter_clauses(self):
+        self.assertEqual(OpenSearchService.build_filter_clauses(self.filters), [
+            {"term": {"category": "민사"}},
+            {"term": {"court": "대법원"}},
+            {"range": {"date": {"gte": "2015-01-01", "lte": "2020-12-31"}}},
+        ])
+        self.assertEqual(OpenSearchService.build_filter_clauses({"category": ""}), [])
+
+    def test_knn_body_pushes_filter_into_knn_and_collapses_by_precedent(self):
+        body = OpenSearchService.build_knn_body([0.1, 0.2], k=5, filters=self.filters, two_stage=False)
+        knn = body["query"]["knn"]["content_embedding"]
+        self.assertEqual(knn["filter"], {"bool": {"filter": OpenSearchService.build_filter_clauses(self.filters)}})
+        self.assertEqual(body["collapse"]["field"], "id")
+
+    def test_knn_body_without_filters_has_no_filter(self):
+        body = OpenSearchService.build_knn_body([0.1, 0.2], k=5, two_stage=False)
+        self.assertNotIn("filter", body["query"]["knn"]["content_embedding"])
+
+    def test_parse_collapsed_hits_aggregates_inner_hits(self):
+        response = {"hits": {"hits": [
+            {"_score": 0.5, "_source": {"id": "B", "chunk_content": "b"}},
+            {"_score": 0.9, "_source": {"id": "A", "chunk_content": "a"},
+             "inner_hits": {"chunks": {"hits": {"hits": [{"_score": 0.9}, {"_score": 0.7}]}}}},
+        ]}}
+        results = OpenSearchService.parse_collapsed_hits(response, k=1)
+        self.assertEqual([(r["case_No"], r["similarity"]) for r in results], [("A", 0.9)])
+
+    def test_two_stage_knn_body_rescores_with_full_vector(self):
+        embedding = [0.1] * 768
+        body = OpenSearchService.build_knn_body(embedding, k=5, filters=self.filters, two_stage=True, space_type="l2")
+        script_score = body["query"]["script_score"]
+        knn = script_score["query"]["knn"]["compact_embedding"]
+        self.assertEqual(len(knn["vector"]), len(compact_embedding(embedding)))
+        self.assertEqual(knn["k"], 5 * SEARCH_CANDIDATE_MULTIPLIER * SEARCH_TWO_STAGE_EXPANSION)
+        self.assertIn("filter", knn)
+        self.assertEqual(script_score["script"]["params"]["query_value"], embedding)
+        self.assertEqual(script_score["script"]["params"]["space_type"], "l2")
@@ -0,0 +1,83 @@
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from cases.precedent_store import LocalPrecedentFile, PrecedentStore
+from cases.service import OpenSearchService
+
+
+def document(case_no, content="원문"):
+    return {"case_no": case_no, "case_title": f"판례 {case_no}", "judgment_date": "2020-01-01", "content": content}
+
+
+class PrecedentStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.path = self.tmp / "precedent_store.sqlite3"
+        patcher = mock.patch("cases.precedent_store.PRECEDENT_STORE_PATH", self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        PrecedentStore.reset()
+        self.addCleanup(PrecedentStore.reset)
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+
+    @mock.patch.object(OpenSearchService, "get_precedent_by_case_number")
+    def test_local_file_then_memory(self, remote):
+        LocalPrecedentFile.build([document("2020다1")], path=self.path)
+
+        self.assertEqual(PrecedentStore.get("2020다1"), document("2020다1"))
+        self.assertEqual(PrecedentStore._get_local("2020다1")[1], "memory")
+        self.assertEqual(PrecedentStore.get("2020다1", ["content"]), {"content": "원문"})
+        remote.assert_not_called()
+
+    @mock.patch.object(OpenSearchService, "get_precedent_by_case_number")
+    def test_falls_back_to_opensearch_and_caches_full_documents_only(self, remote):
+        LocalPrecedentFile.build([document("2020다1")], path=self.path)
+        remote.side_effect = lambda case_no, fields: (
+            document(case_no) if fields is None else {field: document(case_no)[field] for field in fields}
+        )
+
+        self.assertEqual(PrecedentStore.get("2020다2", ["content"]), {"content": "원문"})
+        self.assertEqual(PrecedentStore._get_local("2020다2"), (None, None))
+        self.assertEqual(PrecedentStore.get("2020다2"), document("2020다2"))
+        self.assertEqual(PrecedentStore._get_local("2020다2")[1], "memory")
+        self.assertEqual(remote.call_count, 2)
+
+    @mock.patch.object(OpenSearchService, "get_precedent_by_case_number", return_value=None)
+    def test_without_local_file_uses_opensearch(self, remote):
+        self.assertIsNone(PrecedentStore.local_file())
+        self.assertIsNone(PrecedentStore.get("2020다1"))
+        remote.assert_called_once_with("2020다1", None)
+
+    @mock.patch.object(OpenSearchService, "get_precedent_by_case_number", return_value=None)
+    def test_rebuilt_file_is_reopened(self, remote):
+        LocalPrecedentFile.build([document("2020다1", "이전 원문")], path=self.path)
+        self.assertEqual(PrecedentStore.get("2020다1")["content"], "이전 원문")
+
+        LocalPrecedentFile.build([document("2020다1", "새 원문")], path=self.path)
+        self.assertEqual(PrecedentStore.get("2020다1")["content"], "새 원문")
+        remote.assert_not_called()
+
+    def test_returned_documents_are_copies(self):
+        LocalPrecedentFile.build([document("2020다1")], path=self.path)
+        PrecedentStore.get("2020다1")["content"] = "changed"
+        self.assertEqual(PrecedentStore.get("2020다1")["content"], "원문")
+
+    @mock.patch.object(OpenSearchService, "get_precedents_by_case_numbers")
+    def test_get_many_fetches_only_missing_documents_remotely(self, remote):
+        LocalPrecedentFile.build([document("2020다1"), document("2020다2")], path=self.path)
+        remote.return_value = {"2020다3": document("2020다3")}
+
+        result = PrecedentStore.get_many(["2020다1", "2020다3", "2020다2", "2020다1", "2020다4"])
+
+        self.assertEqual(list(result), ["2020다1", "2020다3", "2020다2"])
+        remote.assert_called_once_with(["2020다3", "2020다4"], None)
+
+    def test_stats(self):
+        LocalPrecedentFile.build([document("2020다1", "원문" * 500)], path=self.path)
+        stats = PrecedentStore.local_file().stats()
+        self.assertEqual(stats["documents"], 1)
+        self.assertLess(stats["compressed_bytes"], stats["raw_bytes"])
@@ -0,0 +1,68 @@
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from cases.quantization import ENCODINGS, VectorCodec, get_codec
+
+
+class CodecRoundTripTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.matrix = rng.normal(size=(300, 32)).astype(np.float32)
+        self.query = rng.normal(size=32).astype(np.float32)
+
+    def codec(self, encoding):
+        codec = get_codec(encoding)
+        if encoding == "pq":
+            codec.m = 8
+        codec.train(self.matrix)
+        return codec
+
+    def test_encode_decode_round_trip(self):
+        tolerances = {"fp32": 0.0, "fp16": 1e-2, "int8": None, "pq": None}
+        for encoding in ENCODINGS:
+            with self.subTest(encoding=encoding):
+                codec = self.codec(encoding)
+                restored = codec.decode(codec.encode(self.matrix))
+                self.assertEqual(restored.shape, self.matrix.shape)
+                if encoding == "int8":
+                    # 차원별 양자화 간격의 절반 이내
+                    self.assertTrue(np.all(np.abs(restored - self.matrix) <= codec.scale / 2 + 1e-5))
+                elif encoding == "pq":
+                    error = np.linalg.norm(restored - self.matrix) / np.linalg.norm(self.matrix)
+                    self.assertLess(error, 0.8)
+                else:
+                    np.testing.assert_allclose(restored, self.matrix, atol=tolerances[encoding])
+
+    def test_dots_match_decoded_vectors(self):
+        for encoding in ENCODINGS:
+            with self.subTest(encoding=encoding):
+                codec = self.codec(encoding)
+                codes = codec.encode(self.matrix)
+                np.testing.assert_allclose(
+                    codec.dots(codes, self.query), codec.decode(codes) @ self.query, rtol=1e-3, atol=1e-3
+                )
+
+    def test_parameters_survive_save_and_load(self):
+        for encoding in ENCODINGS:
+            with self.subTest(encoding=encoding), tempfile.TemporaryDirectory() as path:
+                codec = self.codec(encoding)
+                codes = codec.encode(self.matrix)
+                codec.save(Path(path))
+                loaded = get_codec(encoding)
+                loaded.load(Path(path))
+                np.testing.assert_array_equal(loaded.decode(codes), codec.decode(codes))
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(ValueError):
+            get_codec("bf16")
+
+    def test_codec_must_implement_encode_decode_and_dots(self):
+        class EncodeOnly(VectorCodec):
+            def encode(self, matrix):
+                return matrix
+
+        with self.assertRaises(TypeError):
+            EncodeOnly()
@@ -0,0 +1,44 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from cases.rerank import PrecedentReranker
+
+
+def candidates():
+    return [
+        {"case_No": "a", "similarity": 0.9, "keywords": ["건축"]},
+        {"case_No": "b", "similarity": 0.8, "keywords": ["보증금", "건축"]},
+        {"case_No": "c", "similarity": 0.7, "keywords": ["보증금", "임대차"]},
+        {"case_No": "d", "similarity": 0.1, "keywords": ["보증금", "임대차"]},
+    ]
+
+
+@mock.patch("cases.rerank.SEARCH_RERANK_WEIGHT", 0.9)
+@mock.patch("cases.rerank.SEARCH_RERANK", "keyword")
+class PrecedentRerankerTests(SimpleTestCase):
+    query = "임대차 보증금을 돌려받지 못했습니다"
+
+    def test_keyword_rerank_reorders_all_candidates(self):
+        reranked = PrecedentReranker.rerank(candidates(), self.query)
+        self.assertEqual([r["case_No"] for r in reranked], ["c", "d", "b", "a"])
+
+    @mock.patch("cases.rerank.SEARCH_RERANK_TOP_N", 2)
+    def test_only_top_n_candidates_are_reranked(self):
+        reranked = PrecedentReranker.rerank(candidates(), self.query)
+        self.assertEqual([r["case_No"] for r in reranked], ["b", "a", "c", "d"])
+        self.assertNotIn("rerank_score", reranked[2])
+
+    @mock.patch("cases.rerank.SEARCH_RERANK_BUDGET_MS", 5.0)
+    def test_budget_exceeded_keeps_remaining_order(self):
+        # 시작 시각 0초, 후보 두 개를 매긴 뒤 1초가 지난 것으로 처리
+        with mock.patch("cases.rerank.time") as clock:
+            clock.perf_counter.side_effect = [0.0, 0.0, 0.001, 1.0]
+            reranked = PrecedentReranker.rerank(candidates(), self.query)
+        self.assertEqual([r["case_No"] for r in reranked], ["b", "a", "c", "d"])
+        self.assertNotIn("rerank_score", reranked[2])
+
+    def test_disabled_returns_input(self):
+        results = candidates()
+        with mock.patch("cases.rerank.SEARCH_RERANK", "none"):
+            self.assertIs(PrecedentReranker.rerank(results, self.query), results)
@@ -0,0 +1,47 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from cases.models import SearchIndexGeneration
+from cases.search_cache import CHUNKED_INDEX_NAME, SearchResultCache
+
+
+@mock.patch("cases.search_cache.reset_vector_store")
+class SearchResultCacheTests(TestCase):
+    def setUp(self):
+        SearchResultCache._memory.clear()
+        SearchResultCache._generation.clear()
+        SearchResultCache._seen_generation = None
+
+    def key(self, generation, embedding=(0.1, 0.2)):
+        return SearchResultCache.make_key(generation, "vector", 5, {"court": "대법원"}, list(embedding), None)
+
+    def test_hit_returns_copies(self, reset_vector_store):
+        key = self.key(SearchResultCache.current_generation())
+        SearchResultCache.set(key, [{"case_No": "a"}])
+        cached = SearchResultCache.get(key)
+        cached[0]["case_No"] = "changed"
+        self.assertEqual(SearchResultCache.get(key), [{"case_No": "a"}])
+
+    def test_key_ignores_tiny_float_differences_but_not_generation(self, reset_vector_store):
+        self.assertEqual(self.key(0, (0.1, 0.2)), self.key(0, (0.1000001, 0.2)))
+        self.assertNotEqual(self.key(0), self.key(1))
+
+    def test_other_workers_bump_invalidates_cache_and_resets_vector_store(self, reset_vector_store):
+        generation = SearchResultCache.current_generation()
+        SearchResultCache.set(self.key(generation), [{"case_No": "a"}])
+
+        # 다른 프로세스의 재색인: DB 세대만 증가하고 이 프로세스의 세대 캐시는 TTL이 지나 만료
+        SearchIndexGeneration.objects.create(index_name=CHUNKED_INDEX_NAME, generation=generation + 1)
+        SearchResultCache._generation.clear()
+
+        self.assertEqual(SearchResultCache.current_generation(), generation + 1)
+        self.assertEqual(len(SearchResultCache._memory), 0)
+        reset_vector_store.assert_called_once()
+
+    def test_bump_generation_clears_cache(self, reset_vector_store):
+        SearchResultCache.set(self.key(SearchResultCache.current_generation()), [{"case_No": "a"}])
+        self.assertEqual(SearchResultCache.bump_generation(), 1)
+        self.assertEqual(len(SearchResultCache._memory), 0)
+        self.assertEqual(SearchResultCache.current_generation(), 1)
+        reset_vector_store.assert_called_once()
@@ -0,0 +1,92 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from cases.models import PrecedentSummary
+from cases.service import SUMMARY_PROMPT_VERSION
+from cases.summary_store import PrecedentSummaryStore, content_hash
+
+CONTENT = "【판시사항】 임대차보증금 반환"
+
+
+@mock.patch("cases.summary_store.GeminiService.llm_model_name", lambda: "test-model")
+@mock.patch("cases.summary_store.GeminiService.summarize_precedent_langchain")
+class PrecedentSummaryStoreTests(TestCase):
+    def pending(self, lease_until, version=SUMMARY_PROMPT_VERSION, content=CONTENT):
+        return PrecedentSummary.objects.create(
+            case_no="2020다1", content_hash=content_hash(content), prompt_version=version,
+            status=PrecedentSummary.STATUS_PENDING, lease_until=lease_until,
+        )
+
+    def test_miss_generates_once_and_hit_reuses(self, summarize):
+        summarize.return_value = {"요약": "a"}
+        self.assertEqual(PrecedentSummaryStore.get_summary("2020다1", CONTENT), {"요약": "a"})
+        self.assertEqual(PrecedentSummaryStore.get_summary("2020다1", CONTENT), {"요약": "a"})
+        self.assertEqual(summarize.call_count, 1)
+        row = PrecedentSummary.objects.get()
+        self.assertEqual((row.status, row.lease_until), (PrecedentSummary.STATUS_READY, None))
+
+    def test_waits_for_other_workers_pending_row(self, summarize):
+        row = self.pending(timezone.now() + timedelta(minutes=1))
+
+        def other_worker_finishes(_seconds):
+            PrecedentSummary.objects.filter(pk=row.pk).update(
+                status=PrecedentSummary.STATUS_READY, summary={"요약": "b"}, lease_until=None,
+            )
+
+        with mock.patch("cases.summary_store.time.sleep", side_effect=other_worker_finishes) as sleep:
+            self.assertEqual(PrecedentSummaryStore.get_summary("2020다1", CONTENT), {"요약": "b"})
+        sleep.assert_called_once()
+        summarize.assert_not_called()
+
+    def test_expired_lease_is_taken_over(self, summarize):
+        summarize.return_value = {"요약": "c"}
+        self.pending(timezone.now() - timedelta(seconds=1))
+        self.assertEqual(PrecedentSummaryStore.get_summary("2020다1", CONTENT), {"요약": "c"})
+        self.assertEqual(PrecedentSummary.objects.get().status, PrecedentSummary.STATUS_READY)
+
+    def test_failed_generation_releases_pending_row(self, summarize):
+        summarize.side_effect = RuntimeError("llm down")
+        with self.assertRaises(RuntimeError):
+            PrecedentSummaryStore.get_summary("2020다1", CONTENT)
+        self.assertFalse(PrecedentSummary.objects.exists())
+
+    def test_cleanup_keeps_other_versions_pending_rows(self, summarize):
+        summarize.return_value = {"요약": "d"}
+        in_flight = self.pending(timezone.now() + timedelta(minutes=1), version="v-next")
+        PrecedentSummary.objects.create(
+            case_no="2020다1", content_hash=content_hash("예전 원문"), prompt_version=SUMMARY_PROMPT_VERSION,
+            status=PrecedentSummary.STATUS_READY, summary={"요약": "old"},
+        )
+
+        PrecedentSummaryStore.get_summary("2020다1", CONTENT)
+
+        self.assertEqual(
+            set(PrecedentSummary.objects.values_list("pk", flat=True)),
+            {in_flight.pk, PrecedentSummary.objects.get(prompt_version=SUMMARY_PROMPT_VERSION).pk},
+        )
+
+    def test_concurrent_misses_share_one_fill(self, summarize):
+        calls = []
+
+        def slow_fill(key, content, config=None):
+            calls.append(key)
+            time.sleep(0.1)
+            return {"요약": "e"}
+
+        results = []
+        with mock.patch.object(PrecedentSummaryStore, "_fill", side_effect=slow_fill):
+            threads = [
+                threading.Thread(target=lambda: results.append(PrecedentSummaryStore.get_summary("2020다1", CONTENT)))
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"요약": "e"}] * 4)
@@ -0,0 +1,117 @@
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from cases.vector_store import NumpyVectorStore, VectorStore
+
+
+def chunk(case_no, vector, text, category="민사", court="대법원", date="2020-01-01"):
+    return {
+        "id": case_no, "caseNm": f"사건 {case_no}", "title": f"판례 {case_no}", "category": category,
+        "subcategory": "", "court": court, "date": date, "keywords": [],
+        "chunk_content": text, "content_embedding": vector,
+    }
+
+
+# 판례 A는 청크 3개가 모두 쿼리([1, 0, 0, 0])와 가까워 판례 중복 제거가 필요한 경우
+CHUNKS = [
+    chunk("A", [1.0, 0.0, 0.0, 0.0], "A-1"),
+    chunk("A", [0.9, 0.1, 0.0, 0.0], "A-2"),
+    chunk("A", [0.8, 0.2, 0.0, 0.0], "A-3"),
+    chunk("B", [0.7, 0.3, 0.0, 0.0], "B-1", category="형사", date="2015-06-01"),
+    chunk("C", [0.0, 0.0, 1.0, 0.0], "C-1", court="서울고등법원", date="2022-03-01"),
+    chunk("D", [0.6, 0.0, 0.4, 0.0], "D-1", date=""),
+]
+QUERY = [1.0, 0.0, 0.0, 0.0]
+
+
+class NumpyVectorStoreTestCase(SimpleTestCase):
+    encoding = "fp32"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = Path(tempfile.mkdtemp())
+        NumpyVectorStore.build(CHUNKS, path=cls.tmp / "index", encoding=cls.encoding, space_type="cosinesimil")
+        cls.store = NumpyVectorStore(cls.tmp / "index")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+        super().tearDownClass()
+
+    def case_nos(self, results):
+        return [result["case_No"] for result in results]
+
+
+class NumpyVectorStoreSearchTests(NumpyVectorStoreTestCase):
+    def test_vector_store_is_abstract(self):
+        with self.assertRaises(TypeError):
+            VectorStore()
+
+    def test_results_are_deduplicated_per_precedent(self):
+        results = self.store.search(QUERY, k=3, two_stage=False)
+        self.assertEqual(self.case_nos(results), ["A", "B", "D"])
+        self.assertEqual(results[0]["preview"], "A-1")
+        self.assertAlmostEqual(results[0]["similarity"], 1.0, places=5)
+
+    def test_k_larger_than_corpus_returns_each_precedent_once(self):
+        self.assertEqual(sorted(self.case_nos(self.store.search(QUERY, k=10, two_stage=False))), ["A", "B", "C", "D"])
+
+    def test_chunk_vectors_and_max_cosine(self):
+        texts, vectors = self.store.chunk_vectors("A")
+        self.assertEqual(texts, ["A-1", "A-2", "A-3"])
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+        self.assertEqual(set(self.store.max_cosine(QUERY, ["A", "Z"])), {"A"})
+
+
+class NumpyVectorStoreFilterTests(NumpyVectorStoreTestCase):
+    def test_category_filter(self):
+        self.assertEqual(self.case_nos(self.store.search(QUERY, k=5, filters={"category": "형사"})), ["B"])
+
+    def test_court_filter(self):
+        self.assertEqual(self.case_nos(self.store.search(QUERY, k=5, filters={"court": "서울고등법원"})), ["C"])
+
+    def test_date_range_excludes_undated_precedents(self):
+        results = self.store.search(QUERY, k=5, filters={"date_from": "2016-01-01", "date_to": "2021-12-31"})
+        self.assertEqual(self.case_nos(results), ["A"])
+
+    def test_filter_is_applied_before_top_k(self):
+        # 상위 k개를 자른 뒤 거르면 빈 결과가 되는 경우에도 조건에 맞는 판례를 반환
+        self.assertEqual(self.case_nos(self.store.search(QUERY, k=1, filters={"court": "서울고등법원"})), ["C"])
+
+    def test_no_match_returns_empty(self):
+        self.assertEqual(self.store.search(QUERY, k=5, filters={"category": "행정"}), [])
+
+
+class NumpyVectorStoreTwoStageTests(NumpyVectorStoreTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # 앞 2차원만 쓰는 compact 행렬로 1차 후보를 고름
+        with mock.patch("cases.vector_store.COMPACT_EMBEDDING_DIMENSION", 2):
+            super().setUpClass()
+
+    def test_compact_matrix_is_built(self):
+        self.assertEqual(self.store.compact.shape, (len(CHUNKS), 2))
+
+    def test_two_stage_matches_full_search(self):
+        full = self.store.search(QUERY, k=3, two_stage=False)
+        two_stage = self.store.search(QUERY, k=3, two_stage=True)
+        self.assertEqual(self.case_nos(two_stage), self.case_nos(full))
+        for a, b in zip(full, two_stage):
+            self.assertAlmostEqual(a["similarity"], b["similarity"], places=5)
+
+    def test_two_stage_applies_filters_to_candidates(self):
+        results = self.store.search(QUERY, k=5, filters={"court": "서울고등법원"}, two_stage=True)
+        self.assertEqual(self.case_nos(results), ["C"])
+
+    @mock.patch("cases.vector_store.SEARCH_TWO_STAGE_EXPANSION", 1)
+    @mock.patch("cases.vector_store.SEARCH_CANDIDATE_MULTIPLIER", 1)
+    def test_chunks_outside_first_stage_are_not_scored(self):
+        # 앞 2차원만 보면 D-1([0.6, 0])이 A-2보다 가까우므로 1차 후보는 A-1, D-1뿐이고 B는 재채점되지 않음
+        self.assertEqual(self.case_nos(self.store.search(QUERY, k=2, two_stage=True)), ["A", "D"])
+        self.assertEqual(self.case_nos(self.store.search(QUERY, k=2, two_stage=False)), ["A", "B"])
@@ -0,0 +1,19 @@
+import functools
+
+from django.db import close_old_connections
+
+
+def with_db_cleanup(func):
+    """
+    스레드 풀에서 ORM을 사용하는 작업용 래퍼.
+    요청 스레드가 아니면 request_finished 시그널로 DB 연결이 정리되지 않으므로
+    작업 전후에 close_old_connections()로 CONN_MAX_AGE/끊긴 연결을 직접 정리합니다.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return wrapper
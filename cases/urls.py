@@ -1,10 +1,26 @@
 from django.urls import path, re_path  # re_path 임포트
 from .views import *
+from .async_views import (
+    AsyncCaseSearchView, AsyncPrecedentDetailView, AsyncCaseAnswerView, AsyncPrecedentBatchView,
+    AsyncCaseMultiAnswerView, AsyncJobStatusView,
+)
 
 urlpatterns = [
     path('', CaseSearchView.as_view(), name='case_search'),
     # 'init/' 대신 정규표현식을 사용하여 슬래시 유무에 상관없이 대응
     re_path(r'^init/?$', InitDataAPIView.as_view(), name='init-data'), 
+    # ASGI(uvicorn) 배포용 비동기 엔드포인트 (판례 상세 경로보다 먼저 매칭되어야 함)
+    path('async/', AsyncCaseSearchView.as_view(), name='case_search_async'),
+    path('async/answer/batch/', AsyncCaseMultiAnswerView.as_view(), name='case_multi_answer_async'),
+    path('async/answer/<str:precedents_id>/', AsyncCaseAnswerView.as_view(), name='case_answer_async'),
+    path('async/jobs/<uuid:job_id>/', AsyncJobStatusView.as_view(), name='job_status_async'),
+    path('async/batch/', AsyncPrecedentBatchView.as_view(), name='precedent_batch_async'),
+    path('async/<str:precedents_id>/', AsyncPrecedentDetailView.as_view(), name='precedent_detail_async'),
+    # 판례 일괄 조회 (판례 상세 경로보다 먼저 매칭되어야 함)
+    path('batch/', PrecedentBatchView.as_view(), name='precedent_batch'),
+    path('answer/batch/', CaseMultiAnswerView.as_view(), name='case_multi_answer'),
+    # 백그라운드 작업 상태 (폴링 또는 SSE)
+    path('jobs/<uuid:job_id>/', JobStatusView.as_view(), name='job_status'),
     path('<str:precedents_id>/', PrecedentDetailView.as_view(), name='precedent_detail'),
     path('answer/<str:precedents_id>/', CaseAnswerView.as_view(), name='case_answer'),
 ]
@@ -0,0 +1,470 @@
+import os
+import abc
+import json
+import shutil
+import logging
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .quantization import SPACE_TYPES, DECODE_BLOCK_ROWS, get_codec, space_scores
+from .service import (
+    OpenSearchService, SEARCH_CANDIDATE_MULTIPLIER, SEARCH_CHUNKS_PER_PRECEDENT, VECTOR_SPACE_TYPE,
+    COMPACT_EMBEDDING_DIMENSION, SEARCH_TWO_STAGE, SEARCH_TWO_STAGE_EXPANSION, compact_embedding,
+)
+
+# 검색 백엔드 선택: "opensearch"(기본, 원격 kNN) | "numpy"(프로세스 내 mmap 인덱스)
+VECTOR_STORE_BACKEND = os.environ.get("VECTOR_STORE_BACKEND", "opensearch").lower()
+VECTOR_INDEX_PATH = Path(os.environ.get(
+    "VECTOR_INDEX_PATH", Path(__file__).resolve().parent.parent / "data" / "vector_index"
+))
+# 색인 시 선택하는 벡터 인코딩(fp32 | fp16 | int8 | pq)과 유사도 공간(VECTOR_SPACE_TYPE, cases/service.py).
+# 로컬 인덱스와 OpenSearch 매핑에 같은 값이 적용되며, 로컬 인덱스는 metadata.json에 기록된 값으로 검색합니다.
+# (VECTOR_INDEX_DTYPE=float16은 이전 설정과의 호환을 위해 fp16으로 취급)
+VECTOR_INDEX_ENCODING = os.environ.get(
+    "VECTOR_INDEX_ENCODING", "fp16" if os.environ.get("VECTOR_INDEX_DTYPE") == "float16" else "fp32"
+).lower()
+
+EMBEDDINGS_FILE = "embeddings.npy"
+SQ_NORMS_FILE = "sq_norms.npy"
+DOC_OFFSETS_FILE = "doc_offsets.npy"
+METADATA_FILE = "metadata.json"
+COMPACT_FILE = "compact.npy"
+DOC_COLUMNS_FILE = "doc_columns.npy"
+DOC_IDS_FILE = "doc_ids.npy"
+DOC_ID_POSITIONS_FILE = "doc_id_positions.npy"
+# 문자열 열(offsets + UTF-8 blob): 청크 원문과 판례별 메타데이터(JSON)
+CHUNK_TEXTS = "chunk_texts"
+DOCUMENTS = "documents"
+# 색인 중 청크 벡터를 그대로 이어 쓰는 임시 float32 파일 (인코딩이 끝나면 삭제)
+RAW_VECTORS_FILE = "vectors.f32"
+
+DOCUMENT_FIELDS = ("id", "caseNm", "title", "category", "subcategory", "court", "date", "keywords")
+# 필터에 쓰는 판례 단위 컬럼
+COLUMN_FIELDS = ("category", "court", "date")
+
+
+class _BlobColumn:
+    """
+    offsets(int64, 항목 수 + 1)와 UTF-8 바이트 blob으로 저장한 문자열 열.
+    두 파일 모두 mmap으로 열고 요청된 항목만 디코딩하므로 워커 힙에 전체 목록을 올리지 않습니다.
+    """
+
+    def __init__(self, path: Path, name: str, decode=None):
+        self.offsets = np.load(path / f"{name}_offsets.npy", mmap_mode="r")
+        blob_path = path / f"{name}.bin"
+        # 크기가 0인 파일은 mmap할 수 없음
+        self.blob = (np.memmap(blob_path, dtype=np.uint8, mode="r")
+                     if blob_path.stat().st_size else np.empty(0, dtype=np.uint8))
+        self.decode = decode
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _item(self, i: int):
+        value = self.blob[int(self.offsets[i]):int(self.offsets[i + 1])].tobytes().decode("utf-8")
+        return self.decode(value) if self.decode else value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._item(i) for i in range(*index.indices(len(self)))]
+        return self._item(int(index))
+
+    def __iter__(self):
+        return (self._item(i) for i in range(len(self)))
+
+
+class _BlobColumnWriter:
+    def __init__(self, path: Path, name: str):
+        self.path = path
+        self.name = name
+        self._file = open(path / f"{name}.bin", "wb")
+        self._offsets = [0]
+
+    def write(self, value: str) -> None:
+        data = value.encode("utf-8")
+        self._file.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+
+    def close(self) -> None:
+        self._file.close()
+        np.save(self.path / f"{self.name}_offsets.npy", np.asarray(self._offsets, dtype=np.int64))
+
+
+class VectorStore(abc.ABC):
+    """
+    유사 판례 검색 백엔드 인터페이스. search()는 판례 단위로 중복 제거된 상위 k개를 반환합니다.
+    filters: {"category", "court", "date_from", "date_to"} 중 일부 (모두 선택)
+    """
+    name = ""
+
+    @abc.abstractmethod
+    def search(self, query_embedding: List[float], k: int = 5,
+               filters: Optional[Dict[str, Any]] = None,
+               two_stage: Optional[bool] = None) -> List[Dict[str, Any]]:
+        ...
+
+
+class OpenSearchVectorStore(VectorStore):
+    name = "opensearch"
+
+    def search(self, query_embedding: List[float], k: int = 5,
+               filters: Optional[Dict[str, Any]] = None,
+               two_stage: Optional[bool] = None) -> List[Dict[str, Any]]:
+        return OpenSearchService.search_similar_precedents(query_embedding, k=k, filters=filters, two_stage=two_stage)
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    indexing 스크립트가 만든 파일을 np.load(mmap_mode='r')로 여는 로컬 벡터 인덱스.
+    mmap된 행렬은 OS 페이지 캐시를 통해 모든 워커 프로세스가 한 벌을 공유합니다.
+
+    - embeddings.npy : 청크 벡터를 인코딩한 행렬(fp32/fp16 값, int8/pq 코드). 같은 판례의 청크는 연속 구간에 저장
+    - sq_norms.npy   : 각 청크의 (복원) 벡터 제곱 노름 (l2/코사인 점수 계산용)
+    - doc_offsets.npy: 판례별 청크 구간 시작 인덱스
+    - metadata.json  : 인코딩/유사도 공간과 판례/청크 수
+    - chunk_texts.bin / chunk_texts_offsets.npy: 청크 원문 (mmap, 읽을 때만 디코딩)
+    - documents.bin / documents_offsets.npy    : 판례별 메타데이터 JSON (mmap, 읽을 때만 디코딩)
+    - doc_columns.npy: 필터용 판례 단위 컬럼(category/court/date) 구조화 배열
+    - doc_ids.npy / doc_id_positions.npy: 정렬된 판례 번호와 판례 위치 (판례 번호 조회용)
+    - sq_params.npy / pq_codebooks.npy: int8/pq 인코딩의 복원 파라미터
+    - compact.npy    : 2단계 검색용 앞부분 차원(재정규화) float32 행렬 (COMPACT_EMBEDDING_DIMENSION이 0이면 생략)
+    """
+    name = "numpy"
+
+    def __init__(self, path: Path = VECTOR_INDEX_PATH):
+        self.path = Path(path)
+        self.embeddings = np.load(self.path / EMBEDDINGS_FILE, mmap_mode="r")
+        self.sq_norms = np.load(self.path / SQ_NORMS_FILE, mmap_mode="r")
+        self.doc_offsets = np.load(self.path / DOC_OFFSETS_FILE)
+        with open(self.path / METADATA_FILE, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        if "chunk_texts" in metadata:
+            raise FileNotFoundError(f"이전 형식의 로컬 벡터 인덱스입니다. 다시 색인하세요: {self.path}")
+        self.encoding = metadata.get("encoding", "fp16" if self.embeddings.dtype == np.float16 else "fp32")
+        self.space_type = metadata.get("space_type", "l2")
+        self.codec = get_codec(self.encoding)
+        self.codec.load(self.path)
+        self.documents = _BlobColumn(self.path, DOCUMENTS, decode=json.loads)
+        self.chunk_texts = _BlobColumn(self.path, CHUNK_TEXTS)
+        compact_path = self.path / COMPACT_FILE
+        self.compact = np.load(compact_path, mmap_mode="r") if compact_path.exists() else None
+        self.doc_ends = np.append(self.doc_offsets[1:], self.embeddings.shape[0])
+        # 청크 → 판례 번호 (2단계 검색에서 청크 단위 필터 적용용)
+        self.chunk_docs = np.repeat(np.arange(len(self.documents)), self.doc_ends - self.doc_offsets)
+        self.doc_ids = np.load(self.path / DOC_IDS_FILE, mmap_mode="r")
+        self.doc_id_positions = np.load(self.path / DOC_ID_POSITIONS_FILE, mmap_mode="r")
+        # 필터용 판례 단위 컬럼 (벡터화된 비교를 위해 고정 길이 문자열 배열로 저장)
+        doc_columns = np.load(self.path / DOC_COLUMNS_FILE, mmap_mode="r")
+        self.columns = {field: doc_columns[field] for field in COLUMN_FIELDS}
+        logging.info(
+            f"Local vector index loaded: {len(self.documents)} precedents, "
+            f"{self.embeddings.shape[0]} chunks, encoding={self.encoding}, space={self.space_type}"
+        )
+
+    def _doc_position(self, case_no: str) -> Optional[int]:
+        i = int(np.searchsorted(self.doc_ids, str(case_no)))
+        if i < len(self.doc_ids) and self.doc_ids[i] == str(case_no):
+            return int(self.doc_id_positions[i])
+        return None
+
+    def _chunk_scores(self, query: np.ndarray) -> np.ndarray:
+        # OpenSearch(faiss)와 같은 점수 스케일 (l2이면 1 / (1 + ||q - x||^2))
+        return space_scores(self.codec.dots(self.embeddings, query), self.sq_norms, query, self.space_type)
+
+    def size_bytes(self) -> int:
+        """벡터 데이터(인코딩된 행렬 + 복원 파라미터)의 디스크 크기"""
+        files = [EMBEDDINGS_FILE] + self.codec.parameter_files()
+        if self.compact is not None:
+            files.append(COMPACT_FILE)
+        return sum((self.path / name).stat().st_size for name in files)
+
+    def iter_chunks(self):
+        """build()에 다시 넣을 수 있는 청크 문서(_source) 형태로 순회 (벤치마크/재인코딩용, 벡터는 복원값)"""
+        for doc_idx, doc in enumerate(self.documents):
+            start, end = int(self.doc_offsets[doc_idx]), int(self.doc_ends[doc_idx])
+            vectors = self.codec.decode(self.embeddings[start:end])
+            for offset, vector in enumerate(vectors):
+                yield {**doc, "chunk_content": self.chunk_texts[start + offset], "content_embedding": vector}
+
+    def _filter_mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if not filters:
+            return None
+        mask = np.ones(len(self.documents), dtype=bool)
+        for field in ("category", "court"):
+            if filters.get(field):
+                mask &= self.columns[field] == filters[field]
+        dates = self.columns["date"]
+        if filters.get("date_from"):
+            mask &= (dates != "") & (dates >= str(filters["date_from"]))
+        if filters.get("date_to"):
+            mask &= (dates != "") & (dates <= str(filters["date_to"]))
+        return mask
+
+    def _two_stage_scores(self, query: np.ndarray, k: int, mask: Optional[np.ndarray]) -> np.ndarray:
+        """compact 행렬로 청크 후보를 넓게 고른 뒤 후보만 전체 차원으로 재채점 (나머지 청크는 -inf)"""
+        compact_query = np.asarray(compact_embedding(query, self.compact.shape[1]), dtype=np.float32)
+        coarse = self.compact @ compact_query
+        if mask is not None:
+            coarse = np.where(mask[self.chunk_docs], coarse, -np.inf)
+        n_valid = int(np.isfinite(coarse).sum())
+        n_first = min(max(k * SEARCH_CANDIDATE_MULTIPLIER, k) * SEARCH_TWO_STAGE_EXPANSION, n_valid)
+        scores = np.full(coarse.shape[0], -np.inf, dtype=np.float32)
+        if n_first == 0:
+            return scores
+        rows = np.sort(np.argpartition(-coarse, n_first - 1)[:n_first])
+        dots = self.codec.dots(np.asarray(self.embeddings[rows]), query)
+        scores[rows] = space_scores(dots, np.asarray(self.sq_norms[rows]), query, self.space_type)
+        return scores
+
+    def search(self, query_embedding: List[float], k: int = 5,
+               filters: Optional[Dict[str, Any]] = None,
+               two_stage: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """two_stage가 None이면 SEARCH_TWO_STAGE 설정을 따르며, compact.npy가 없으면 전체 차원으로 검색합니다."""
+        if not len(self.documents):
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        mask = self._filter_mask(filters)
+        two_stage = SEARCH_TWO_STAGE if two_stage is None else two_stage
+        if two_stage and self.compact is not None:
+            scores = self._two_stage_scores(query, k, mask)
+        else:
+            scores = self._chunk_scores(query)
+
+        # 판례별 최고 청크 점수로 후보 판례를 고른 뒤(판례 중복 제거), 후보만 청크 점수를 집계
+        doc_scores = np.maximum.reduceat(scores, self.doc_offsets)
+        if mask is not None:
+            doc_scores = np.where(mask, doc_scores, -np.inf)
+        n_valid = int(np.isfinite(doc_scores).sum())
+        n_candidates = min(max(k * SEARCH_CANDIDATE_MULTIPLIER, k), n_valid)
+        if n_candidates == 0:
+            return []
+        candidates = np.argpartition(-doc_scores, n_candidates - 1)[:n_candidates]
+
+        results = []
+        for doc_idx in candidates:
+            start, end = int(self.doc_offsets[doc_idx]), int(self.doc_ends[doc_idx])
+            chunk_scores = scores[start:end]
+            order = np.argsort(-chunk_scores)[:SEARCH_CHUNKS_PER_PRECEDENT]
+            order = order[np.isfinite(chunk_scores[order])]
+            doc = self.documents[doc_idx]
+            results.append({
+                "case_No": doc.get("id"),
+                "case_name": doc.get("caseNm"),
+                "case_title": doc.get("title"),
+                "law_category": doc.get("category"),
+                "law_subcategory": doc.get("subcategory"),
+                "court": doc.get("court"),
+                "judgment_date": doc.get("date"),
+                "similarity": OpenSearchService.aggregate_chunk_scores(chunk_scores[order].tolist()),
+                "preview": self.chunk_texts[start + int(order[0])],
+                "keywords": doc.get("keywords") or [],
+            })
+        results.sort(key=lambda r: r["similarity"], reverse=True)
+        return results[:k]
+
+    def max_cosine(self, query_embedding: List[float], case_nos: Iterable[str]) -> Dict[str, float]:
+        """판례별로 청크 벡터와 쿼리의 코사인 유사도 최댓값 (리랭킹용, 인덱스에 없는 판례는 제외)"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        result = {}
+        for case_no in case_nos:
+            doc_idx = self._doc_position(case_no)
+            if doc_idx is None:
+                continue
+            start, end = int(self.doc_offsets[doc_idx]), int(self.doc_ends[doc_idx])
+            dots = self.codec.decode(self.embeddings[start:end]) @ query
+            norms = np.sqrt(np.asarray(self.sq_norms[start:end]))
+            result[case_no] = float(np.max(dots / np.maximum(norms, 1e-12)))
+        return result
+
+    def chunk_vectors(self, case_no: str) -> Tuple[List[str], np.ndarray]:
+        """판례의 청크 원문과 단위 길이로 정규화한 (복원) 청크 벡터 (인덱스에 없으면 빈 값)"""
+        doc_idx = self._doc_position(case_no)
+        if doc_idx is None:
+            return [], np.empty((0, self.embeddings.shape[1]), dtype=np.float32)
+        start, end = int(self.doc_offsets[doc_idx]), int(self.doc_ends[doc_idx])
+        vectors = np.asarray(self.codec.decode(self.embeddings[start:end]), dtype=np.float32)
+        norms = np.sqrt(np.asarray(self.sq_norms[start:end], dtype=np.float32))
+        return self.chunk_texts[start:end], vectors / np.maximum(norms, 1e-12)[:, None]
+
+    @classmethod
+    def build(cls, chunks: Iterable[Dict[str, Any]], path: Path = VECTOR_INDEX_PATH,
+              encoding: str = VECTOR_INDEX_ENCODING, space_type: str = VECTOR_SPACE_TYPE) -> int:
+        """
+        chunked 인덱스 문서(_source)들로 로컬 인덱스 파일을 생성하고 청크 수를 반환합니다.
+        같은 판례의 청크는 연속해서 들어와야 합니다 (색인 스크립트와 iter_chunks()의 순서).
+        """
+        writer = LocalVectorIndexWriter(path, encoding=encoding, space_type=space_type)
+        for chunk in chunks:
+            writer.add(chunk)
+        return writer.finish()
+
+
+class LocalVectorIndexWriter:
+    """
+    청크를 받는 즉시 벡터와 원문을 임시 파일에 이어 써서, 코퍼스 전체를 메모리에 모으지 않고 로컬 인덱스를 만듭니다.
+    finish()에서 mmap한 벡터로 인코딩을 학습·적용하고, 완성된 파일을 기존 인덱스 위치로 교체합니다
+    (os.replace로 바꾸므로 기존 파일을 mmap 중인 워커는 재시작 전까지 이전 인덱스를 그대로 읽음).
+    """
+
+    def __init__(self, path: Path = VECTOR_INDEX_PATH, encoding: str = VECTOR_INDEX_ENCODING,
+                 space_type: str = VECTOR_SPACE_TYPE):
+        if space_type not in SPACE_TYPES:
+            raise ValueError(f"알 수 없는 space_type: {space_type} (지원: {', '.join(SPACE_TYPES)})")
+        self.codec = get_codec(encoding)
+        self.encoding = encoding
+        self.space_type = space_type
+        self.path = Path(path)
+        self.staging = self.path.with_name(self.path.name + ".building")
+        shutil.rmtree(self.staging, ignore_errors=True)
+        self.staging.mkdir(parents=True)
+        self._vectors = open(self.staging / RAW_VECTORS_FILE, "wb")
+        self._texts = _BlobColumnWriter(self.staging, CHUNK_TEXTS)
+        self._documents = _BlobColumnWriter(self.staging, DOCUMENTS)
+        self._doc_offsets: List[int] = []
+        self._doc_ids: List[str] = []
+        self._doc_columns: List[Tuple[str, ...]] = []
+        self._current: Optional[str] = None
+        self.dimension: Optional[int] = None
+        self.count = 0
+
+    def add(self, chunk: Dict[str, Any]) -> None:
+        vector = np.asarray(chunk["content_embedding"], dtype=np.float32)
+        if self.dimension is None:
+            self.dimension = vector.shape[0]
+        elif vector.shape[0] != self.dimension:
+            raise ValueError(f"임베딩 차원이 다릅니다: {vector.shape[0]} (기대값 {self.dimension})")
+        case_no = str(chunk["id"])
+        if case_no != self._current:
+            self._current = case_no
+            self._doc_offsets.append(self.count)
+            doc = {key: chunk.get(key) for key in DOCUMENT_FIELDS}
+            self._documents.write(json.dumps(doc, ensure_ascii=False))
+            self._doc_ids.append(case_no)
+            self._doc_columns.append(tuple(str(doc.get(field) or "") for field in COLUMN_FIELDS))
+        self._vectors.write(vector.tobytes())
+        self._texts.write(chunk.get("chunk_content") or "")
+        self.count += 1
+
+    def abort(self) -> None:
+        self._close()
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+    def _close(self) -> None:
+        if not self._vectors.closed:
+            self._vectors.close()
+            self._texts.close()
+            self._documents.close()
+
+    def finish(self) -> int:
+        self._close()
+        if not self.count:
+            self.abort()
+            raise ValueError("로컬 벡터 인덱스에 넣을 청크가 없습니다.")
+        ids = np.asarray(self._doc_ids)
+        if len(np.unique(ids)) != len(ids):
+            self.abort()
+            raise ValueError("같은 판례의 청크가 연속해서 들어오지 않았습니다.")
+
+        staging, codec = self.staging, self.codec
+        matrix = np.memmap(staging / RAW_VECTORS_FILE, dtype=np.float32, mode="r",
+                           shape=(self.count, self.dimension))
+        codec.train(matrix)
+        first = codec.encode(matrix[:1])
+        codes = np.lib.format.open_memmap(
+            staging / EMBEDDINGS_FILE, mode="w+", dtype=first.dtype, shape=(self.count,) + first.shape[1:]
+        )
+        sq_norms = np.lib.format.open_memmap(staging / SQ_NORMS_FILE, mode="w+", dtype=np.float32, shape=(self.count,))
+        compact = None
+        if COMPACT_EMBEDDING_DIMENSION:
+            compact = np.lib.format.open_memmap(
+                staging / COMPACT_FILE, mode="w+", dtype=np.float32,
+                shape=(self.count, min(COMPACT_EMBEDDING_DIMENSION, self.dimension)),
+            )
+        for start in range(0, self.count, DECODE_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + DECODE_BLOCK_ROWS])
+            block_codes = codec.encode(block)
+            codes[start:start + len(block)] = block_codes
+            # 점수 계산이 저장된 값과 일치하도록 복원 벡터 기준으로 노름을 기록
+            restored = codec.decode(block_codes)
+            sq_norms[start:start + len(block)] = np.einsum("ij,ij->i", restored, restored)
+            if compact is not None:
+                head = block[:, :compact.shape[1]]
+                compact[start:start + len(block)] = head / np.maximum(np.linalg.norm(head, axis=1, keepdims=True), 1e-12)
+        for array in (codes, sq_norms, compact):
+            if array is not None:
+                array.flush()
+        has_compact = compact is not None
+        del matrix, codes, sq_norms, compact
+        (staging / RAW_VECTORS_FILE).unlink()
+        codec.save(staging)
+
+        np.save(staging / DOC_OFFSETS_FILE, np.asarray(self._doc_offsets, dtype=np.int64))
+        widths = [max(1, max(len(row[i]) for row in self._doc_columns)) for i in range(len(COLUMN_FIELDS))]
+        np.save(staging / DOC_COLUMNS_FILE, np.array(
+            self._doc_columns, dtype=[(field, f"U{width}") for field, width in zip(COLUMN_FIELDS, widths)]
+        ))
+        order = np.argsort(ids, kind="stable")
+        np.save(staging / DOC_IDS_FILE, ids[order])
+        np.save(staging / DOC_ID_POSITIONS_FILE, order.astype(np.int64))
+        with open(staging / METADATA_FILE, "w", encoding="utf-8") as f:
+            json.dump({
+                "encoding": self.encoding,
+                "space_type": self.space_type,
+                "documents": len(self._doc_ids),
+                "chunks": self.count,
+            }, f, ensure_ascii=False)
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        if not has_compact and (self.path / COMPACT_FILE).exists():
+            (self.path / COMPACT_FILE).unlink()
+        for file in staging.iterdir():
+            os.replace(file, self.path / file.name)
+        staging.rmdir()
+        return self.count
+
+
+_BACKENDS = {
+    OpenSearchVectorStore.name: OpenSearchVectorStore,
+    NumpyVectorStore.name: NumpyVectorStore,
+}
+_store: Optional[VectorStore] = None
+_local_index: Optional[NumpyVectorStore] = None
+_store_lock = threading.Lock()
+
+
+def get_vector_store() -> VectorStore:
+    """VECTOR_STORE_BACKEND 설정에 따른 프로세스 단일 인스턴스를 반환합니다."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = _BACKENDS.get(VECTOR_STORE_BACKEND)
+                if backend is None:
+                    raise ValueError(f"알 수 없는 VECTOR_STORE_BACKEND: {VECTOR_STORE_BACKEND}")
+                _store = backend()
+    return _store
+
+
+def get_local_vector_index() -> Optional[NumpyVectorStore]:
+    """로컬 인덱스 파일이 있으면 (검색 백엔드와 무관하게) 캐시된 청크 벡터 접근용으로 반환합니다."""
+    global _local_index
+    store = get_vector_store()
+    if isinstance(store, NumpyVectorStore):
+        return store
+    if _local_index is None and (VECTOR_INDEX_PATH / EMBEDDINGS_FILE).exists():
+        with _store_lock:
+            if _local_index is None:
+                _local_index = NumpyVectorStore()
+    return _local_index
+
+
+def reset_vector_store() -> None:
+    """재색인 후 새 인덱스 파일을 다시 열도록 캐시된 인스턴스를 버립니다."""
+    global _store, _local_index
+    with _store_lock:
+        _store = None
+        _local_index = None
@@ -1,13 +1,134 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.settings import api_settings
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
 from .models import Case, Category
 from .serializers import *
-from .service import GeminiService, OpenSearchService
+from .search import PrecedentSearchService
+from .case_service import CaseService
+from .precedent_store import PrecedentStore
+from .summary_store import PrecedentSummaryStore, content_hash
+from .analysis_store import CaseAnalysisStore
+from .analysis_report import MultiPrecedentAnalysisService
+from .jobs import JobQueue, job_accepted_data, job_data, wants_job
+from .http_cache import (
+    INIT_CACHE_MAX_AGE, INIT_CACHE_S_MAXAGE, PRECEDENT_CACHE_MAX_AGE, PRECEDENT_CACHE_S_MAXAGE,
+    apply_validators, init_data_validators, is_conditional, not_modified_response, precedent_validators,
+)
+from .sse import EventStreamRenderer, event_stream_response, wants_event_stream
+
+# 사건 저장(DB)을 임베딩/검색과 동시에 실행하기 위한 스레드 풀
+_persist_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="case-persist")
+
+
+def server_timing_header(timings):
+    """단계별 소요 시간(ms)을 브라우저 개발자 도구에서 볼 수 있는 Server-Timing 헤더 값으로 변환"""
+    return ", ".join(f"{stage};dur={ms}" for stage, ms in timings.items() if ms is not None)
+
+def precedent_detail_data(precedent, query=None):
+    """
+    판례 상세 응답의 data (summary 제외).
+    query(PrecedentDetailQuerySerializer)의 fields로 필드를 고르고, offset/length로 content 구간만 잘라 보냅니다.
+    """
+    query = query or {}
+    data = {
+        "case_no": precedent.get("case_no"),
+        "court": precedent.get("court"),
+        "case_name": precedent.get("case_name"),
+        "judgment_date": precedent.get("judgment_date"),
+        "content": precedent.get("content"),
+    }
+    offset, length = query.get("offset", 0), query.get("length")
+    if data["content"] is not None and (offset or length is not None):
+        content = data["content"]
+        data["content"] = content[offset:offset + length if length is not None else None]
+        # 다음 구간을 이어서 요청할 수 있도록 전체 길이를 함께 전달
+        data["content_range"] = {"offset": offset, "length": len(data["content"]), "total": len(content)}
+    fields = query.get("fields")
+    if fields is not None:
+        data = {
+            key: value for key, value in data.items()
+            if key in fields or (key == "content_range" and "content" in fields)
+        }
+    return data
+
+
+def precedent_wants_summary(query):
+    fields = (query or {}).get("fields")
+    return fields is None or "summary" in fields
+
+
+def precedent_source_fields(query):
+    """요청 필드 → 판례 _source 필드 (None이면 전체). 요약을 만들려면 원문이 필요하므로 content를 포함"""
+    fields = (query or {}).get("fields")
+    if fields is None:
+        return None
+    source_fields = [field for field in fields if field != "summary"]
+    if "summary" in fields and "content" not in source_fields:
+        source_fields.append("content")
+    return source_fields
+
+
+def precedent_detail_events(precedents_id, precedent, query=None):
+    """SSE 이벤트 순서: precedent(메타데이터+원문) → summary_partial* → summary(최종 객체) → done"""
+    yield "precedent", precedent_detail_data(precedent, query)
+    if precedent_wants_summary(query):
+        try:
+            yield from PrecedentSummaryStore.stream_summary(precedents_id, precedent.get("content") or "")
+        except Exception as e:
+            logging.error(f"Summary Stream Error: {str(e)}")
+            yield "error", {"message": str(e)}
+    yield "done", {}
+
+
+def wants_refresh(request):
+    return request.GET.get("refresh", "").lower() in ("1", "true")
+
+
+def case_answer_events(case_obj, precedents_id, precedent, refresh=False):
+    """SSE 이벤트 순서: section*(최상위 섹션이 완성될 때마다) → analysis(검증된 전체 객체) → done"""
+    try:
+        yield from CaseAnalysisStore.stream_analysis(
+            case_obj, precedents_id, precedent.get("content", ""), refresh=refresh
+        )
+    except Exception as e:
+        logging.error(f"Analysis Stream Error: {str(e)}")
+        yield "error", {"message": str(e)}
+    yield "done", {}
+
+
+def precedent_batch_data(case_nos, fields, documents, summaries):
+    """요청 순서대로 판례를 나열하고, 찾지 못한 사건번호는 missing으로 분리"""
+    results, missing = [], []
+    for case_no in dict.fromkeys(str(case_no) for case_no in case_nos):
+        document = documents.get(case_no)
+        if document is None:
+            missing.append(case_no)
+            continue
+        item = {"case_no": case_no, **document}
+        if "summary" in fields:
+            # 아직 생성되지 않은 요약은 null (일괄 조회에서는 LLM을 호출하지 않음)
+            item["summary"] = summaries.get(case_no)
+        results.append(item)
+    return {"results": results, "missing": missing}
+
+
+def multi_answer_status(data):
+    """하나라도 분석되면 200 (부분 결과 포함), 모두 실패하면 사유에 따라 404/504/500"""
+    if data["analyses"]:
+        return status.HTTP_200_OK
+    reasons = set(data["failed"].values())
+    if reasons == {"not_found"}:
+        return status.HTTP_404_NOT_FOUND
+    if reasons <= {"not_found", "timeout"}:
+        return status.HTTP_504_GATEWAY_TIMEOUT
+    return status.HTTP_500_INTERNAL_SERVER_ERROR
+
 
 # 1. 초기 데이터 조회 (Init)
 class InitDataAPIView(APIView):
@@ -23,11 +144,18 @@ class InitDataAPIView(APIView):
     )
     def get(self, request):
         try:
+            # 카테고리/질문 버전이 같으면 직렬화 없이 304
+            validators = init_data_validators()
+            not_modified = not_modified_response(request, validators, INIT_CACHE_MAX_AGE, INIT_CACHE_S_MAXAGE)
+            if not_modified is not None:
+                return not_modified
+
             # is_deleted가 False인 카테고리만 가져오기
             categories = Category.objects.filter(is_deleted=False).prefetch_related('questions')
             serializer = InitDataSerializer(categories, many=True)
             # 이전 에러 수정: status.status -> status
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            response = Response(serializer.data, status=status.HTTP_200_OK)
+            return apply_validators(response, validators, INIT_CACHE_MAX_AGE, INIT_CACHE_S_MAXAGE)
         except Exception as e:
             logging.error(f"Init Error: {str(e)}")
             return Response({"status": "error", "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -52,31 +180,32 @@ class CaseSearchView(APIView):
         v_data = serializer.validated_data
 
         try:
-            # 1. 카테고리 및 사건 저장
-            category_obj, _ = Category.objects.get_or_create(name=v_data.get('category', '일반'))
-            new_case = Case.objects.create(
-                category=category_obj,
-                who=v_data['who'],
-                when=v_data['when'],
-                what=v_data['what'],
-                want=v_data['want'],
-                detail=v_data['detail']
-            )
+            # 1. 카테고리 및 사건 저장 (응답 지연에 영향이 적도록 별도 스레드에서 검색과 동시에 실행)
+            persist_timings = {}
+            persist_future = _persist_executor.submit(CaseService.create_case_in_thread, v_data, persist_timings)
 
-            # 2. 임베딩 및 검색
-            query_embedding = GeminiService.create_embedding(new_case.detail)
-            precedents = OpenSearchService.search_similar_precedents(query_embedding, k=5)
+            # 2. 임베딩(캐시 우선) 및 검색 (SEARCH_MODE: vector / hybrid / lexical)
+            precedents, search_info = PrecedentSearchService.search(
+                v_data['detail'], k=5, filters=v_data.get('filters')
+            )
+            new_case = persist_future.result()
+            timings = {**persist_timings, **search_info["timings_ms"]}
 
-            return Response({
+            response = Response({
                 "status": "success",
                 "code": 201,
                 "message": "유사 판례 검색 완료",
                 "data": {
                     "case_id": new_case.id,
                     "total_count": len(precedents),
-                    "results": precedents
+                    "results": precedents,
+                    "search_mode": search_info["mode"],
+                    "cached": search_info["cached"],
+                    "timings_ms": timings
                 }
             }, status=status.HTTP_201_CREATED)
+            response["Server-Timing"] = server_timing_header(timings)
+            return response
 
         except Exception as e:
             logging.error(f"Search Error: {str(e)}")
@@ -85,6 +214,9 @@ class CaseSearchView(APIView):
 
 # 3. 판례 상세 조회 및 AI 분석 (Detail)
 class PrecedentDetailView(APIView):
+    # Accept: text/event-stream 요청을 콘텐츠 협상에서 허용 (SSE 모드)
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + [EventStreamRenderer]
+
     @swagger_auto_schema(
         operation_id="precedent_detail",
         manual_parameters=[
@@ -94,39 +226,68 @@ class PrecedentDetailView(APIView):
                 description="판례 사건번호",
                 type=openapi.TYPE_STRING,
                 required=True
+            ),
+            openapi.Parameter(
+                'stream',
+                openapi.IN_QUERY,
+                description="1이면 SSE로 응답 (Accept: text/event-stream과 동일). "
+                            "precedent → summary_partial → summary → done 이벤트 순서",
+                type=openapi.TYPE_STRING,
+                required=False
             )
         ],
+        query_serializer=PrecedentDetailQuerySerializer,
         responses={
             200: PrecedentDetailResponseSerializer,
+            304: openapi.Response(description="If-None-Match의 ETag와 같아 변경 없음"),
             404: openapi.Response(description="판례를 찾을 수 없습니다.")
         },
         operation_summary="판례 상세 조회 및 AI 분석",
-        operation_description="사건번호로 판례 정보와 AI가 구조화한 요약 데이터를 조회합니다.",
+        operation_description="사건번호로 판례 정보와 AI가 구조화한 요약 데이터를 조회합니다. "
+                              "fields로 필요한 필드만, offset/length로 원문 일부만 받을 수 있습니다.",
         tags=["cases"]
     )
     def get(self, request, precedents_id):
-        precedent = OpenSearchService.get_precedent_by_case_number(precedents_id)
-        if not precedent:
+        query_serializer = PrecedentDetailQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        query = dict(query_serializer.validated_data)
+
+        stream = wants_event_stream(request)
+        # 조건부 요청은 저장된 요약과 인덱스 세대만으로 검증해 OpenSearch/LLM 호출 전에 304
+        if not stream and is_conditional(request):
+            not_modified = not_modified_response(
+                request, precedent_validators(precedents_id, variant=query),
+                PRECEDENT_CACHE_MAX_AGE, PRECEDENT_CACHE_S_MAXAGE
+            )
+            if not_modified is not None:
+                return not_modified
+
+        precedent = PrecedentStore.get(precedents_id, precedent_source_fields(query))
+        if precedent is None:
             return Response({"message": "판례를 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
 
-        # AI 요약 수행
-        summary = GeminiService.summarize_precedent_langchain(precedent.get("content", ""))
-
-        return Response({
-            "status": "success",
-            "data": {
-                "case_no": precedent.get("case_no"),
-                "court" : precedent.get("court"),
-                "case_name": precedent.get("case_name"),
-                "judgment_date": precedent.get("judgment_date"),
-                "content": precedent.get("content"),
-                "summary": summary
-            }
-        }, status=status.HTTP_200_OK)
+        # SSE 모드: 판례 원문을 먼저 보내고 요약은 생성되는 대로 전송
+        if stream:
+            return event_stream_response(precedent_detail_events(precedents_id, precedent, query))
+
+        data = precedent_detail_data(precedent, query)
+        content = precedent.get("content")
+        if precedent_wants_summary(query):
+            # AI 요약 (저장된 요약 우선, 없으면 한 번만 생성해 저장)
+            data["summary"] = PrecedentSummaryStore.get_summary(precedents_id, content or "")
+
+        response = Response({"status": "success", "data": data}, status=status.HTTP_200_OK)
+        validators = precedent_validators(
+            precedents_id, content_hash(content) if content is not None else None, variant=query
+        )
+        return apply_validators(response, validators, PRECEDENT_CACHE_MAX_AGE, PRECEDENT_CACHE_S_MAXAGE)
 
 
 # 4. 판례 기반 심층 분석 (Answer)
 class CaseAnswerView(APIView):
+    # Accept: text/event-stream 요청을 콘텐츠 협상에서 허용 (SSE 모드)
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + [EventStreamRenderer]
+
     @swagger_auto_schema(
         operation_id="case_answer",
         manual_parameters=[
@@ -136,6 +297,28 @@ class CaseAnswerView(APIView):
                 description="판례 사건번호",
                 type=openapi.TYPE_STRING,
                 required=True
+            ),
+            openapi.Parameter(
+                'refresh',
+                openapi.IN_QUERY,
+                description="1이면 저장된 분석 결과를 무시하고 다시 생성",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+            openapi.Parameter(
+                'async',
+                openapi.IN_QUERY,
+                description="1이면 백그라운드 작업으로 제출하고 job_id를 바로 반환 (결과는 /cases/jobs/<job_id>/ 폴링 또는 SSE)",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+            openapi.Parameter(
+                'stream',
+                openapi.IN_QUERY,
+                description="1이면 SSE로 응답 (Accept: text/event-stream과 동일). "
+                            "section(outcome_prediction → action_roadmap → legal_foundation) → analysis → done 이벤트 순서",
+                type=openapi.TYPE_STRING,
+                required=False
             )
         ],
         request_body=openapi.Schema(
@@ -150,26 +333,42 @@ class CaseAnswerView(APIView):
         ),
         responses={
             200: CaseAnswerApiResponseSerializer,
+            202: openapi.Response(description="백그라운드 작업 제출됨 (?async=1)"),
             404: openapi.Response(description="사건 또는 판례를 찾을 수 없습니다."),
             500: openapi.Response(description="서버 오류")
         },
         operation_summary="판례 기반 심층 분석",
-        operation_description="저장된 사건과 판례를 기반으로 AI 심층 분석을 수행합니다.",
+        operation_description="저장된 사건과 판례를 기반으로 AI 심층 분석을 수행합니다. "
+                              "같은 사건/판례/모델/프롬프트 버전의 분석 결과는 저장해 두고 재사용합니다.",
         tags=["cases"]
     )
     def post(self, request, precedents_id):
         case_id = request.data.get('case_id')
         try:
             case_obj = Case.objects.get(id=case_id)
-            precedent = OpenSearchService.get_precedent_by_case_number(precedents_id)
+            precedent = PrecedentStore.get(precedents_id)
 
-            if not precedent:
+            if precedent is None:
                 return Response({"error": "판례 정보 없음"}, status=status.HTTP_404_NOT_FOUND)
 
-            # 심층 분석 실행
-            analysis = GeminiService.analyze_case_deeply(
-                {"who": case_obj.who, "detail": case_obj.detail},
-                precedent.get("content", "")
+            if wants_job(request):
+                # 요청 안에서 LLM을 기다리지 않고 작업만 제출 (manage.py run_jobs 워커가 처리)
+                job = JobQueue.submit("case_analysis", {
+                    "case_id": case_obj.id, "precedent_no": precedents_id, "refresh": wants_refresh(request),
+                })
+                data = job_accepted_data(request, job)
+                return Response({"status": "accepted", "data": data},
+                                status=status.HTTP_202_ACCEPTED, headers={"Location": data["status_url"]})
+
+            # SSE 모드: 섹션이 완성되는 대로 전송해 프론트엔드가 나머지 생성 중에도 차트를 먼저 그릴 수 있게 함
+            if wants_event_stream(request):
+                return event_stream_response(
+                    case_answer_events(case_obj, precedents_id, precedent, refresh=wants_refresh(request))
+                )
+
+            # 심층 분석 (저장된 결과 우선, 없거나 refresh=1이면 한 번만 생성해 저장)
+            analysis = CaseAnalysisStore.get_analysis(
+                case_obj, precedents_id, precedent.get("content", ""), refresh=wants_refresh(request)
             )
 
             return Response({"status": "success", "data": analysis}, status=status.HTTP_200_OK)
@@ -177,3 +376,118 @@ class CaseAnswerView(APIView):
             return Response({"error": "사건 ID를 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"status": "error", "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# 5. 판례 일괄 조회 (Batch)
+class PrecedentBatchView(APIView):
+    @swagger_auto_schema(
+        operation_id="precedent_batch",
+        request_body=PrecedentBatchRequestSerializer,
+        responses={
+            200: PrecedentBatchResponseSerializer,
+            500: openapi.Response(description="서버 오류")
+        },
+        operation_summary="판례 일괄 조회",
+        operation_description="여러 사건번호의 판례를 한 번에 조회합니다. fields로 필요한 필드만 선택할 수 있으며, "
+                              "로컬 판례 저장소에 없는 판례만 OpenSearch mget 한 번으로 가져옵니다.",
+        tags=["cases"]
+    )
+    def post(self, request):
+        serializer = PrecedentBatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        case_nos = serializer.validated_data["case_nos"]
+        fields = serializer.validated_data["fields"]
+
+        try:
+            source_fields = [field for field in fields if field != "summary"]
+            documents = PrecedentStore.get_many(case_nos, source_fields)
+            summaries = PrecedentSummaryStore.stored_summaries(list(documents)) if "summary" in fields else {}
+            return Response({
+                "status": "success",
+                "data": precedent_batch_data(case_nos, fields, documents, summaries)
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            logging.error(f"Batch Error: {str(e)}")
+            return Response({"status": "error", "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# 6. 여러 판례 기반 심층 분석 (Multi Answer)
+class CaseMultiAnswerView(APIView):
+    @swagger_auto_schema(
+        operation_id="case_multi_answer",
+        manual_parameters=[
+            openapi.Parameter(
+                'refresh',
+                openapi.IN_QUERY,
+                description="1이면 저장된 분석 결과를 무시하고 다시 생성",
+                type=openapi.TYPE_STRING,
+                required=False
+            )
+        ],
+        request_body=CaseMultiAnswerRequestSerializer,
+        responses={
+            200: CaseMultiAnswerResponseSerializer,
+            404: openapi.Response(description="사건 또는 판례를 찾을 수 없습니다."),
+            504: openapi.Response(description="모든 판례 분석이 제한 시간을 넘겼습니다."),
+            500: openapi.Response(description="서버 오류")
+        },
+        operation_summary="여러 판례 기반 심층 분석",
+        operation_description="저장된 사건을 여러 판례와 동시에 비교 분석하고 결과를 하나의 보고서로 합칩니다. "
+                              "판례별 분석은 제한 시간(ANALYSIS_CALL_TIMEOUT) 안에 끝난 것만 합치고, "
+                              "나머지는 failed에 사유와 함께 담아 부분 결과로 응답합니다.",
+        tags=["cases"]
+    )
+    def post(self, request):
+        serializer = CaseMultiAnswerRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            case_obj = Case.objects.get(id=serializer.validated_data["case_id"])
+            data = MultiPrecedentAnalysisService.analyze(
+                case_obj, serializer.validated_data["precedent_ids"], refresh=wants_refresh(request)
+            )
+            response = Response({"status": "success" if data["analyses"] else "error", "data": data},
+                                status=multi_answer_status(data))
+            response["Server-Timing"] = server_timing_header({"analysis": data["elapsed_ms"]})
+            return response
+        except Case.DoesNotExist:
+            return Response({"error": "사건 ID를 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logging.error(f"Multi Answer Error: {str(e)}")
+            return Response({"status": "error", "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# 7. 백그라운드 작업 상태 조회 (Job)
+class JobStatusView(APIView):
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + [EventStreamRenderer]
+
+    @swagger_auto_schema(
+        operation_id="job_status",
+        manual_parameters=[
+            openapi.Parameter(
+                'stream',
+                openapi.IN_QUERY,
+                description="1이면 상태가 바뀔 때마다 SSE로 전달 (Accept: text/event-stream과 같음)",
+                type=openapi.TYPE_STRING,
+                required=False
+            )
+        ],
+        responses={
+            200: openapi.Response(description="작업 상태 (status: queued/running/succeeded/failed, result, error)"),
+            404: openapi.Response(description="작업을 찾을 수 없습니다.")
+        },
+        operation_summary="백그라운드 작업 상태 조회",
+        operation_description="?async=1로 제출한 작업의 상태와 결과를 조회합니다. "
+                              "SSE 모드에서는 status 이벤트 후 result 또는 error, done 순서로 전달합니다.",
+        tags=["cases"]
+    )
+    def get(self, request, job_id):
+        job = JobQueue.get(job_id)
+        if job is None:
+            return Response({"error": "작업을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+        if wants_event_stream(request):
+            return event_stream_response(JobQueue.events(job_id))
+        response = Response({"status": "success", "data": job_data(job)}, status=status.HTTP_200_OK)
+        if not job.is_finished:
+            # 폴링 간격 안내
+            response["Retry-After"] = "1"
+        return response
@@ -0,0 +1,51 @@
+import os
+
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:  # brotli가 없으면 gzip만 사용
+        brotli = None
+
+# 동적 응답용 brotli 품질 (0~11, 높을수록 작지만 느림)
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", 5))
+COMPRESSION_MIN_LENGTH = 200
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    응답 압축: 클라이언트가 지원하면 brotli, 아니면 gzip (django GZipMiddleware).
+    SSE(text/event-stream) 응답은 이벤트가 압축 버퍼에 묶여 늦게 전달되지 않도록 압축하지 않습니다.
+    """
+
+    def process_response(self, request, response):
+        if response.get("Content-Type", "").startswith("text/event-stream"):
+            return response
+        if (
+            brotli is None
+            or response.streaming
+            or len(response.content) < COMPRESSION_MIN_LENGTH
+            or response.has_header("Content-Encoding")
+            or not re_accepts_brotli.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed_content = brotli.compress(response.content, quality=COMPRESSION_BROTLI_QUALITY)
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers["Content-Length"] = str(len(response.content))
+        # 압축된 표현은 바이트가 달라지므로 강한 ETag를 약한 ETag로 (GZipMiddleware와 동일)
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
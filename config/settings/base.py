@@ -33,6 +33,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django_prometheus.middleware.PrometheusBeforeMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'config.middleware.CompressionMiddleware',  # brotli/gzip 응답 압축 (SSE 제외), 본문을 바꾸는 미들웨어보다 위
     'corsheaders.middleware.CorsMiddleware',  # <--- Common 및 WhiteNoise보다 위로 이동
     'django.middleware.common.CommonMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', # CORS 처리 후 정적 파일 처리
@@ -5,3 +5,7 @@ class DocumentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'documents'
     verbose_name = '문서 자동생성'
+
+    def ready(self):
+        # 백그라운드 작업 종류(document_generate, document_edit) 등록
+        from . import jobs  # noqa: F401
@@ -0,0 +1,54 @@
+from typing import Any, Dict
+
+from cases.jobs import job_handler, job_checkpoint, record_job_checkpoint, PermanentJobError
+from cases.models import Case
+from .models import Template, Document
+from .serializers import DocumentResponseSerializer
+from .service import generate_legal_document, edit_legal_document_with_ai, format_case_info
+
+# 문서 API ?async=1 요청을 처리하는 백그라운드 작업 (manage.py run_jobs 워커에서 실행)
+
+
+@job_handler("document_generate")
+def run_document_generate(payload: Dict[str, Any]) -> Dict[str, Any]:
+    doc_type = payload["doc_type"]
+    try:
+        case_obj = Case.objects.get(id=payload["case_id"], is_deleted=False)
+        template = Template.objects.get(type=doc_type, is_deleted=False)
+    except (Case.DoesNotExist, Template.DoesNotExist):
+        raise PermanentJobError("문서 생성에 필요한 사건/템플릿 정보를 찾을 수 없습니다.")
+
+    # 이전 실행에서 문서를 이미 만들었다면(결과 기록 전 워커 중단 등) 다시 생성하지 않고 그 문서를 반환
+    document_id = job_checkpoint("document_id")
+    if document_id is None:
+        content = generate_legal_document(format_case_info(case_obj), payload.get("precedent", ""),
+                                          template.content, doc_type)
+        document_id = record_job_checkpoint(
+            "document_id", lambda: Document.objects.create(type=doc_type, content=content).document_id
+        )
+    new_doc = Document.objects.get(document_id=document_id)
+    return DocumentResponseSerializer(new_doc).data
+
+
+@job_handler("document_edit")
+def run_document_edit(payload: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        document = Document.objects.get(
+            document_id=payload["document_id"], type=payload["doc_type"], is_deleted=False
+        )
+    except Document.DoesNotExist:
+        raise PermanentJobError(f"ID {payload['document_id']}에 해당하는 문서를 찾을 수 없습니다.")
+
+    # 이전 실행에서 이미 수정·저장했다면(결과 기록 전 워커 중단 등) 같은 요청을 두 번 적용하지 않고 저장된 문서를 반환
+    if not job_checkpoint("edited"):
+        edited = edit_legal_document_with_ai(document.content, payload["user_request"])
+
+        def save_edit() -> bool:
+            document.content = edited
+            document.save()
+            return True
+
+        # 문서 저장과 체크포인트 기록을 한 트랜잭션에서 (점유를 잃은 워커는 저장하지 않음)
+        record_job_checkpoint("edited", save_edit)
+        document.refresh_from_db()
+    return DocumentResponseSerializer(document).data
@@ -1,23 +1,25 @@
-import os
 import logging
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
+from cases.llm_gateway import LLMGateway
 
-def get_llm():
-    api_key = os.environ.get("GEMINI_API_KEY")
-    model_name = os.environ.get("GEMINI_MODEL").replace("models/", "").strip()
-    return ChatGoogleGenerativeAI(
-        model=model_name,
-        google_api_key=api_key,
-        temperature=0.1,
-        max_output_tokens=4096
-    )
+
+def get_llm(operation: str = "document"):
+    """
+    operation: 호출 지표(external_call_*, llm_tokens)에 붙일 작업 이름.
+    클라이언트 재사용, 동시 호출/속도 제한, 재시도와 차단기는 LLMGateway가 담당합니다.
+    """
+    return LLMGateway.llm(operation, temperature=0.1, max_output_tokens=4096)
+
+
+def format_case_info(case_obj) -> str:
+    """문서 생성 프롬프트에 넣는 사건 내용"""
+    return f"대상:{case_obj.who}, 일시:{case_obj.when}, 내용:{case_obj.what}, 상세:{case_obj.detail}"
 
 
 def generate_legal_document(case_data: str, precedent_data: str, template_content: str, doc_type_name: str) -> str:
-    llm = get_llm()
+    llm = get_llm("generate_doc")
 
     # 1. 문서 타입별 명칭 및 특화 지침 매핑
     doc_meta = {
@@ -66,7 +68,7 @@ def generate_legal_document(case_data: str, precedent_data: str, template_conten
 
 
 def edit_legal_document_with_ai(original_content: str, user_request: str) -> str:
-    llm = get_llm()
+    llm = get_llm("edit_doc")
     prompt = ChatPromptTemplate.from_messages([
         ("system", "법률 전문 AI 어시스턴트입니다. 원본 문서의 틀을 유지하며 사용자의 수정 요청사항만 정확히 반영하십시오. 부연 설명 없이 본문만 출력합니다."),
         ("human", "[원본 문서]:\n{original_content}\n\n[수정 요청]:\n{user_request}")
@@ -7,25 +7,37 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.renderers import BaseRenderer, JSONRenderer
 from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
 import google.genai as genai
 from .models import Template, Document
 from cases.models import Case
-from .service import generate_legal_document, edit_legal_document_with_ai
+from cases.jobs import JobQueue, job_accepted_data, wants_job
+from .service import generate_legal_document, edit_legal_document_with_ai, format_case_info
 from .serializers import (
     DocumentCreateRequestSerializer,
     DocumentResponseSerializer,
     DocumentPatchRequestSerializer
 )
 
+ASYNC_PARAMETER = openapi.Parameter(
+    'async',
+    openapi.IN_QUERY,
+    description="1이면 백그라운드 작업으로 제출하고 job_id를 바로 반환 (결과는 /cases/jobs/<job_id>/ 폴링 또는 SSE)",
+    type=openapi.TYPE_STRING,
+    required=False
+)
+
 # Swagger 설정 딕셔너리 (Protected 멤버 접근 경고 방지)
 SWAGGER_DOCS = {
     "post": {
         "request_body": DocumentCreateRequestSerializer,
-        "responses": {201: DocumentResponseSerializer(), 404: "사건/템플릿 없음"}
+        "manual_parameters": [ASYNC_PARAMETER],
+        "responses": {201: DocumentResponseSerializer(), 202: "작업 제출됨 (job_id)", 404: "사건/템플릿 없음"}
     },
     "patch": {
         "request_body": DocumentPatchRequestSerializer,
-        "responses": {200: DocumentResponseSerializer()}
+        "manual_parameters": [ASYNC_PARAMETER],
+        "responses": {200: DocumentResponseSerializer(), 202: "작업 제출됨 (job_id)"}
     }
 }
 
@@ -47,6 +59,12 @@ class BaseLegalDocumentView(APIView):
     def _sse(self, event, data):
         return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
+    def _job_response(self, request, kind, payload):
+        """?async=1: 요청 안에서 LLM을 호출하지 않고 작업만 제출한 뒤 202로 job_id 반환"""
+        data = job_accepted_data(request, JobQueue.submit(kind, payload))
+        return Response({"status": "accepted", "data": data},
+                        status=status.HTTP_202_ACCEPTED, headers={"Location": data["status_url"]})
+
     def _iter_chunks(self, text, chunk_size=30):
         for i in range(0, len(text), chunk_size):
             yield text[i:i + chunk_size]
@@ -70,7 +88,12 @@ class BaseLegalDocumentView(APIView):
         except (Case.DoesNotExist, Template.DoesNotExist):
             return Response({"error": f"{self.doc_name_ko} 관련 정보를 찾을 수 없습니다."}, status=404)
 
-        case_info = f"대상:{case_obj.who}, 일시:{case_obj.when}, 내용:{case_obj.what}, 상세:{case_obj.detail}"
+        if wants_job(request):
+            return self._job_response(request, "document_generate", {
+                "doc_type": self.doc_type, "case_id": case_obj.id, "precedent": precedent,
+            })
+
+        case_info = format_case_info(case_obj)
 
         response = StreamingHttpResponse(
             self._stream_generation(case_info, precedent, template.content),
@@ -102,6 +125,11 @@ class BaseLegalDocumentView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        if wants_job(request):
+            return self._job_response(request, "document_edit", {
+                "doc_type": self.doc_type, "document_id": document.document_id, "user_request": user_request,
+            })
+
         response = StreamingHttpResponse(
             self._stream_edit(document, user_request),
             content_type="text/event-stream"
@@ -1,14 +1,28 @@
 import os
+import sys
 import json
+import time
+import random
 import logging
 import re
 from pathlib import Path
-from typing import List, Dict, Any, Generator
+from typing import List, Dict, Any, Generator, Iterable, Set, Tuple
 
 # 서비스 클래스 임포트
-from cases.service import GeminiService, OpenSearchService
+from cases.service import (
+    EmbeddingProvider, OpenSearchService, EMBEDDING_BATCH_SIZE, EMBEDDING_CONCURRENCY,
+    COMPACT_EMBEDDING_DIMENSION, compact_embedding,
+)
+from cases.vector_store import NumpyVectorStore, LocalVectorIndexWriter, VECTOR_INDEX_PATH, VECTOR_INDEX_ENCODING, VECTOR_SPACE_TYPE
+from cases.knn_index import knn_field_mapping, compact_field_mapping, train_pq_model
+from cases.quantization import VECTOR_PQ_TRAIN_SIZE
+from cases.precedent_store import (
+    LocalPrecedentFile, PRECEDENT_STORE_PATH, iter_merged_precedents, parse_date, precedent_source,
+)
+import numpy as np
 from opensearchpy import helpers
 from dotenv import load_dotenv
+import django
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -17,25 +31,29 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 env_path = Path(__file__).parent / ".env.prod"
 load_dotenv(dotenv_path=env_path, override=True)
 
+# 검색 결과 캐시 세대 번호(Postgres) 갱신을 위해 Django ORM 사용
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
 # 설정 상수
 CHUNKED_INDEX_NAME = "precedents_chunked"
 PRECEDENTS_INDEX_NAME = "precedents"
 VECTOR_DIMENSION = 768
 MERGED_DATA_DIR = Path(__file__).parent / "data" / "merged"
+# 여러 판례의 청크를 모아 한 번에 임베딩 (배치 크기 x 동시 요청 수만큼 버퍼링)
+EMBEDDING_BUFFER_SIZE = EMBEDDING_BATCH_SIZE * EMBEDDING_CONCURRENCY
+PQ_MODEL_ID = f"{CHUNKED_INDEX_NAME}-pq"
+# 임베딩 배치 실패 시 재시도 횟수와 대기 시간(초, 재시도마다 2배 + 지터). 재시도 후에도 실패하면 배치를 반으로 나눠 문제 입력을 찾음
+INDEX_EMBEDDING_RETRIES = int(os.environ.get("INDEX_EMBEDDING_RETRIES", 3))
+INDEX_EMBEDDING_BACKOFF = float(os.environ.get("INDEX_EMBEDDING_BACKOFF", 2.0))
+
+# 청크 임베딩에 끝내 실패한 판례 (색인 종료 시 요약 출력 후 0이 아닌 종료 코드로 끝냄)
+failed_precedents: Set[str] = set()
 
 opensearch_client = OpenSearchService.get_client()
 
 # --- [전처리 유틸리티] 벡터 검색 노이즈 제거 ---
 
-def parse_date(date_str: str) -> str:
-    """날짜를 필터링용(yyyy-MM-dd)으로 정규화"""
-    if not date_str:
-        return None
-    nums = re.findall(r'\d+', str(date_str))
-    if len(nums) >= 3:
-        return f"{nums[0]}-{nums[1].zfill(2)}-{nums[2].zfill(2)}"
-    return date_str
-
 def clean_legal_text(text: str) -> str:
     """벡터 검색에 방해되는 노이즈(태그, 이름, 사건번호 등) 제거"""
     if not text:
@@ -64,6 +82,24 @@ def smart_split(text_list: List[str]) -> List[str]:
 
 # --- [인덱스 설정] ---
 
+def bump_search_generation():
+    """precedents_chunked 세대 번호를 올려 모든 워커의 검색 결과 캐시를 무효화"""
+    from cases.search_cache import SearchResultCache
+    generation = SearchResultCache.bump_generation()
+    logging.info(f"검색 인덱스 세대 갱신: {generation}")
+
+def pq_training_vectors() -> np.ndarray:
+    """PQ 코드북 학습용 샘플: 이전 색인에서 만든 로컬 벡터 인덱스의 청크 벡터를 사용"""
+    try:
+        local_index = NumpyVectorStore()
+    except FileNotFoundError:
+        raise RuntimeError(
+            f"PQ 학습용 벡터가 없습니다. 먼저 다른 인코딩으로 한 번 색인해 {VECTOR_INDEX_PATH}를 만드세요."
+        )
+    rows = local_index.embeddings.shape[0]
+    sample = np.random.default_rng(0).choice(rows, min(rows, VECTOR_PQ_TRAIN_SIZE), replace=False)
+    return local_index.codec.decode(local_index.embeddings[np.sort(sample)])
+
 def create_indices():
     """인덱스 초기화 (변호인 필드 제외, 벡터 최적화)"""
     
@@ -71,23 +107,39 @@ def create_indices():
     if opensearch_client.indices.exists(index=CHUNKED_INDEX_NAME):
         opensearch_client.indices.delete(index=CHUNKED_INDEX_NAME)
 
+    # 벡터 인코딩/유사도 공간 (VECTOR_INDEX_ENCODING, VECTOR_SPACE_TYPE)
+    model_id = None
+    if VECTOR_INDEX_ENCODING == "pq":
+        model_id = train_pq_model(opensearch_client, PQ_MODEL_ID, pq_training_vectors(), VECTOR_SPACE_TYPE)
+    logging.info(f"벡터 인코딩: {VECTOR_INDEX_ENCODING}, 유사도 공간: {VECTOR_SPACE_TYPE}")
+
     chunked_body = {
         "settings": {"index": {"knn": True, "refresh_interval": "1s"}},
         "mappings": {
             "properties": {
-                "content_embedding": {
-                    "type": "knn_vector",
-                    "dimension": VECTOR_DIMENSION,
-                    "method": {"name": "hnsw", "space_type": "l2", "engine": "faiss"}
-                },
+                "content_embedding": knn_field_mapping(
+                    VECTOR_DIMENSION, VECTOR_INDEX_ENCODING, VECTOR_SPACE_TYPE, model_id=model_id
+                ),
                 "id": {"type": "keyword"},
                 "caseNm": {"type": "text"},
+                "title": {"type": "text"},
+                # 검색 시 kNN efficient filter로 사용하는 필드
+                "category": {"type": "keyword"},
+                "subcategory": {"type": "keyword"},
+                "court": {"type": "keyword"},
+                "keywords": {"type": "keyword"},
                 "date": {"type": "date", "format": "yyyy-MM-dd"},
                 "chunk_content": {"type": "text"} # 정제된 텍스트 저장
             }
         }
     }
+    if COMPACT_EMBEDDING_DIMENSION:
+        # 2단계(Matryoshka) 검색의 1차 후보용 저차원 필드
+        chunked_body["mappings"]["properties"]["compact_embedding"] = compact_field_mapping(
+            COMPACT_EMBEDDING_DIMENSION, VECTOR_INDEX_ENCODING, VECTOR_SPACE_TYPE
+        )
     opensearch_client.indices.create(index=CHUNKED_INDEX_NAME, body=chunked_body)
+    bump_search_generation()
 
     # 2. 원본 인덱스 (조회용)
     if not opensearch_client.indices.exists(index=PRECEDENTS_INDEX_NAME):
@@ -105,8 +157,51 @@ def create_indices():
 
 # --- [인덱싱 실행] ---
 
+def embed_chunks(items: List[Dict[str, Any]], retries: int = INDEX_EMBEDDING_RETRIES) -> List[Tuple[Dict[str, Any], Any]]:
+    """
+    청크들을 임베딩해 (청크, 벡터) 목록을 반환. 일시적 오류는 지수 백오프로 재시도하고,
+    그래도 실패하면 배치를 반으로 나눠 실패 원인이 된 청크만 제외합니다 (제외된 청크의 판례는 failed_precedents에 기록).
+    """
+    for attempt in range(retries + 1):
+        try:
+            vectors = EmbeddingProvider.create_embeddings([p["chunk_content"] for p in items], is_query=False)
+            return list(zip(items, vectors))
+        except Exception as api_err:
+            error = api_err
+            if attempt < retries:
+                delay = INDEX_EMBEDDING_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5)
+                logging.warning(f"임베딩 API 에러 ({len(items)}개 청크), {delay:.1f}초 후 재시도: {api_err}")
+                time.sleep(delay)
+    if len(items) == 1:
+        logging.error(f"청크 임베딩 실패 (판례 {items[0]['id']}, {items[0]['_id']}): {error}")
+        failed_precedents.add(str(items[0]["id"]))
+        return []
+    # 나눈 배치는 한 번씩만 시도 (입력 자체의 문제를 찾는 단계이므로 재시도 대기를 반복하지 않음)
+    middle = len(items) // 2
+    return embed_chunks(items[:middle], retries=0) + embed_chunks(items[middle:], retries=0)
+
+def embed_pending_chunks(pending: List[Dict[str, Any]]) -> Generator[Dict[str, Any], None, None]:
+    """버퍼에 모인 청크들을 배치 임베딩하여 chunked 인덱스 액션으로 변환"""
+    if not pending:
+        return
+    for item, embedding_vector in embed_chunks(pending):
+        if not embedding_vector:
+            logging.error(f"빈 임베딩 결과 (판례 {item['id']}, {item['_id']})")
+            failed_precedents.add(str(item["id"]))
+            continue
+        doc_id = item.pop("_id")
+        source = {**item, "content_embedding": embedding_vector}
+        if COMPACT_EMBEDDING_DIMENSION:
+            source["compact_embedding"] = compact_embedding(embedding_vector)
+        yield {
+            "_index": CHUNKED_INDEX_NAME,
+            "_id": doc_id,
+            "_source": source
+        }
+
 def get_indexing_actions() -> Generator[Dict[str, Any], None, None]:
     json_files = list(MERGED_DATA_DIR.glob("*.json"))
+    pending: List[Dict[str, Any]] = []
     
     for file_path in json_files:
         try:
@@ -119,15 +214,11 @@ def get_indexing_actions() -> Generator[Dict[str, Any], None, None]:
             normalized_date = parse_date(data.get("judmnAdjuDe"))
 
             # [A] 'precedents' (원본 데이터 보존 - 변호인 필드는 아예 삭제)
+            # 로컬 판례 저장소(cases/precedent_store.py)와 같은 문서 형식
             yield {
                 "_index": PRECEDENTS_INDEX_NAME,
                 "_id": str(case_no),
-                "_source": {
-                    "case_no": case_no,
-                    "case_title": data.get("caseTitle"),
-                    "judgment_date": normalized_date,
-                    "content": data.get("판례내용", "")
-                }
+                "_source": precedent_source(data)
             }
 
             # [B] 'precedents_chunked' (벡터 검색 최적화)
@@ -142,40 +233,80 @@ def get_indexing_actions() -> Generator[Dict[str, Any], None, None]:
             # 노이즈 제거 및 청크 분할
             chunks = smart_split(target_raw_texts)
 
+            class_info = data.get("Class_info") or {}
+            keywords = [t.get("keyword") for t in data.get("keyword_tagg", []) if t.get("keyword")]
             for i, chunk in enumerate(chunks):
-                try:
-                    # 임베딩 생성 (정제된 텍스트만 전달)
-                    embedding_vector = GeminiService.create_embedding(chunk, is_query=False)
-                    if embedding_vector:
-                        yield {
-                            "_index": CHUNKED_INDEX_NAME,
-                            "_id": f"{case_no}_{i}",
-                            "_source": {
-                                "id": case_no,
-                                "caseNm": data.get("caseNm"),
-                                "date": normalized_date,
-                                "chunk_content": chunk, # 노이즈 없는 깨끗한 텍스트
-                                "content_embedding": embedding_vector
-                            }
-                        }
-                except Exception as api_err:
-                    logging.error(f"API 에러 ({case_no}): {api_err}")
-                    continue
+                pending.append({
+                    "_id": f"{case_no}_{i}",
+                    "id": case_no,
+                    "caseNm": data.get("caseNm"),
+                    "title": data.get("caseTitle"),
+                    "court": data.get("courtNm"),
+                    "category": class_info.get("class_name"),
+                    "subcategory": class_info.get("instance_name"),
+                    "keywords": keywords,
+                    "date": normalized_date,
+                    "chunk_content": chunk, # 노이즈 없는 깨끗한 텍스트
+                })
+
+            if len(pending) >= EMBEDDING_BUFFER_SIZE:
+                yield from embed_pending_chunks(pending)
+                pending = []
 
         except Exception as e:
             logging.error(f"파일 {file_path.name} 처리 중 에러: {e}")
+            failed_precedents.add(file_path.name)
+
+    yield from embed_pending_chunks(pending)
+
+def collect_chunks(actions: Iterable[Dict[str, Any]], writer: LocalVectorIndexWriter) -> Generator[Dict[str, Any], None, None]:
+    """bulk로 넘기는 액션 중 chunked 문서를 로컬 벡터 인덱스 파일에 바로 기록합니다 (코퍼스 전체를 메모리에 모으지 않음)."""
+    for action in actions:
+        if action["_index"] == CHUNKED_INDEX_NAME:
+            writer.add(action["_source"])
+        yield action
 
 def index_documents():
     logging.info("벡터 검색 최적화 인덱싱 시작...")
+    writer = LocalVectorIndexWriter()
     success, errors = helpers.bulk(
         opensearch_client,
-        get_indexing_actions(),
+        collect_chunks(get_indexing_actions(), writer),
         chunk_size=50, # 임베딩 호출 효율을 위해 조정
         request_timeout=300,
         raise_on_error=False
     )
     logging.info(f"성공: {success}건, 에러: {len(errors) if isinstance(errors, list) else errors}건")
 
+    # 상세/분석 조회용 로컬 판례 저장소 (OpenSearch precedents 인덱스와 같은 문서)
+    stored = LocalPrecedentFile.build(iter_merged_precedents(MERGED_DATA_DIR))
+    logging.info(f"로컬 판례 저장소 생성 완료: {stored}건 → {PRECEDENT_STORE_PATH}")
+
+    # 같은 임베딩으로 프로세스 내 검색용(VECTOR_STORE_BACKEND=numpy) 로컬 인덱스 파일 생성
+    if not writer.count:
+        writer.abort()
+        logging.warning("임베딩된 청크가 없어 로컬 벡터 인덱스를 생성하지 않습니다.")
+        bump_search_generation()
+        return
+    chunk_count = writer.finish()
+    logging.info(f"로컬 벡터 인덱스 생성 완료: {chunk_count}개 청크 → {VECTOR_INDEX_PATH}")
+    # 색인 중 캐시된 (불완전한) 결과도 버리도록 완료 시점에 한 번 더 갱신
+    bump_search_generation()
+
+def report_failures() -> int:
+    """실패한 판례가 있으면 목록을 출력하고 종료 코드 1을 반환 (부분 색인이 조용히 배포되지 않도록)"""
+    if not failed_precedents:
+        logging.info("모든 판례를 색인했습니다.")
+        return 0
+    failed = sorted(failed_precedents)
+    logging.error(
+        f"색인 실패 판례 {len(failed)}건 (일부 청크 누락 포함): {', '.join(failed[:50])}"
+        + (f" 외 {len(failed) - 50}건" if len(failed) > 50 else "")
+    )
+    logging.error("검색 인덱스가 불완전합니다. 원인을 확인한 뒤 다시 색인하세요.")
+    return 1
+
 if __name__ == "__main__":
     create_indices()
     index_documents()
+    sys.exit(report_failures())